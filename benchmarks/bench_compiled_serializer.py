@@ -0,0 +1,79 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks
+# File: bench_compiled_serializer.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 4:00 PM
+
+# Representation of one poll with 10k votes by PollSerializer (prefetch of choices, votes and their users -
+# the best case of stock DRF) vs CompiledSerializer (pollsapi.compiled) from values() rows.
+# Both include the queries. Test database is used.
+#
+#   python -m benchmarks.bench_compiled_serializer [--choices 10] [--votes 1000] [--repeat 5]
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+
+
+def measure(func, repeat: int) -> tuple[object, list[float]]:
+    timings, data = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = func()
+        timings.append(time.perf_counter() - started)
+    return data, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--choices', type=int, default=10)
+    parser.add_argument('--votes', type=int, default=1000, help='votes per choice')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from pollsapi.compiled import compile_serializer
+    from pollsapi.models import Poll
+    from pollsapi.serializers import PollSerializer
+
+    from benchmarks.suite.seed import seed
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    scale = {
+        'users': args.choices * args.votes, 'polls': 1, 'choices': args.choices, 'votes': args.votes,
+        'snippets': 0, 'snippet_lines': (),
+    }
+    poll_id = seed(scale)['poll_ids'][0]
+
+    def stock():
+        poll = Poll.objects.prefetch_related('choices__votes__voted_by').get(pk=poll_id)
+        return PollSerializer(poll).data
+
+    def compiled():
+        return compile_serializer(PollSerializer).represent(Poll.objects.filter(pk=poll_id))[0]
+
+    stock_data, stock_timings = measure(stock, args.repeat)
+    compiled_data, compiled_timings = measure(compiled, args.repeat)
+    assert json.dumps(stock_data) == json.dumps(compiled_data), 'representations differ'
+
+    stock_time, compiled_time = statistics.median(stock_timings), statistics.median(compiled_timings)
+    print(f'poll with {args.choices} choices x {args.votes} votes, median of {args.repeat}:')
+    print(f'  PollSerializer      {stock_time * 1000:8.1f} ms')
+    print(f'  CompiledSerializer  {compiled_time * 1000:8.1f} ms')
+    print(f'  speedup             {stock_time / compiled_time:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
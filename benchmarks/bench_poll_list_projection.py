@@ -0,0 +1,101 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks
+# File: bench_poll_list_projection.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 6:10 PM
+
+# GET of the large page of PollList (?votes=list) by the three paths:
+#     serializers  - PollSerializer over instances with prefetch_related of choices, votes and their users
+#                    (compiled_read = False, the best case of stock DRF)
+#     instances    - CompiledSerializer over the page of Poll instances (projection_list = False)
+#     projection   - CompiledSerializer over values() rows of polls, choices and votes (PollList default)
+# Time and peak of allocations (tracemalloc, separate request) per request. Test database is used.
+#
+#   python -m benchmarks.bench_poll_list_projection [--page-size 500] [--choices 4] [--votes 5] [--repeat 5]
+
+import argparse
+import logging
+import os
+import statistics
+import time
+import tracemalloc
+from unittest import mock
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+
+
+def measure(client, url: str, params: dict, repeat: int) -> tuple[object, float, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url, params)
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+
+    tracemalloc.start()
+    try:
+        client.get(url, params)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response.data['results'], statistics.median(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--choices', type=int, default=4)
+    parser.add_argument('--votes', type=int, default=5, help='votes per choice')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment
+    from rest_framework.reverse import reverse
+    from rest_framework.test import APIClient
+
+    from benchmarks.suite.seed import seed
+    from pollsapi.pagination import PollPagination
+    from pollsapi.views import PollList
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    seed({
+        'users': args.choices * args.votes, 'polls': args.page_size, 'choices': args.choices, 'votes': args.votes,
+        'snippets': 0, 'snippet_lines': (),
+    })
+
+    paths = {
+        'serializers': {'compiled_read': False, 'list_prefetch': ('choices__votes__voted_by',)},
+        'instances': {'projection_list': False},
+        'projection': {'projection_list': True},
+    }
+    # serializers path exceeds the query budget
+    logging.getLogger('tutorial.queries').setLevel(logging.ERROR)
+    client, url, params = APIClient(), reverse('pollsapi:poll_list'), {'votes': 'list'}
+    results = {}
+    with override_settings(QUERY_BUDGET={'RAISE': False}), \
+            mock.patch.object(PollPagination, 'page_size', args.page_size):
+        for name, attrs in paths.items():
+            with mock.patch.multiple(PollList, **attrs):
+                results[name] = measure(client, url, params, args.repeat)
+
+    data = results['serializers'][0]
+    assert all(result[0] == data for result in results.values()), 'representations differ'
+
+    _, base_time, base_peak = results['serializers']
+    print(f'page of {args.page_size} polls x {args.choices} choices x {args.votes} votes, median of {args.repeat}:')
+    for name, (_, timing, peak) in results.items():
+        print(f'  {name:<12} {timing * 1000:8.1f} ms {base_time / timing:6.2f}x'
+              f'   peak {peak / 1024:9.1f} kb {base_peak / peak:6.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks
+# File: bench_url_reverse.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 10:05 AM
+
+# Serialization of the list of snippets by SnippetModelSerializer with urls built by templates
+# (tutorial.snippets.relations) vs stock reverse() per link. Database is not used.
+#
+#   python -m benchmarks.bench_url_reverse [--snippets 1000] [--repeat 5]
+
+import argparse
+import os
+import statistics
+import time
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+
+
+def make_snippets(count: int):
+    from django.contrib.auth.models import User
+    from tutorial.snippets.models import Snippet
+
+    owner = User(pk=1, username='owner')
+    return [
+        Snippet(pk=pk, owner=owner, title=f'snippet {pk}', code=f'print({pk})', language='python', style='friendly')
+        for pk in range(1, count + 1)
+    ]
+
+
+def make_request():
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    # localhost is allowed by ALLOWED_HOSTS in DEBUG mode
+    return Request(APIRequestFactory().get('/api-snippets/snippets/', HTTP_HOST='localhost'))
+
+
+def stock_serializer_class():
+    from rest_framework import serializers
+    from tutorial.snippets.serializers import SnippetModelSerializer
+
+    class StockSnippetModelSerializer(SnippetModelSerializer):
+        serializer_url_field = serializers.HyperlinkedIdentityField
+        highlight = serializers.HyperlinkedIdentityField(view_name='snippets:snippet-highlight', format='html')
+
+    return StockSnippetModelSerializer
+
+
+def measure(serializer_class, snippets, repeat: int) -> tuple[list, list[float]]:
+    timings, data = [], None
+    for _ in range(repeat):
+        # new request - templates of URLBuilder are built once per request
+        context = {'request': make_request()}
+        started = time.perf_counter()
+        data = serializer_class(snippets, many=True, context=context).data
+        timings.append(time.perf_counter() - started)
+    return data, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--snippets', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from tutorial.snippets.serializers import SnippetModelSerializer
+
+    snippets = make_snippets(args.snippets)
+    stock_data, stock = measure(stock_serializer_class(), snippets, args.repeat)
+    templated_data, templated = measure(SnippetModelSerializer, snippets, args.repeat)
+    assert stock_data == templated_data, 'representations differ'
+
+    stock, templated = statistics.median(stock), statistics.median(templated)
+    print(f'{args.snippets} snippets, median of {args.repeat}:')
+    print(f'  reverse()  {stock * 1000:8.1f} ms')
+    print(f'  templates  {templated * 1000:8.1f} ms')
+    print(f'  speedup    {stock / templated:8.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks
+# File: bench_view_metrics.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 7:00 PM
+
+# Overhead of ViewMetricsMixin (tutorial.metrics) on the requests of the list of polls.
+# A/B of whole requests (VIEW_METRICS enabled vs None, alternating rounds) is dominated by noise
+# for so small difference, so the bookkeeping of one request (timer, phases, observations, render wrap)
+# is measured separately and compared with the median request time. Test database is used.
+#
+#   python -m benchmarks.bench_view_metrics [--polls 10] [--requests 200] [--rounds 10]
+
+import argparse
+import os
+import statistics
+import time
+import timeit
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+
+
+def make_polls(count: int):
+    from django.contrib.auth.models import User
+    from pollsapi.models import Choice, Poll
+
+    owner = User.objects.create_user(username='owner', password='12345678')
+    polls = Poll.objects.bulk_create(Poll(question=f'question {i}', created_by=owner) for i in range(count))
+    Choice.objects.bulk_create(Choice(poll=poll, choice_text=f'choice {i}') for poll in polls for i in range(3))
+
+
+def measure(client, url: str, requests: int, enabled: bool) -> float:
+    from django.test import override_settings
+
+    with override_settings(VIEW_METRICS={} if enabled else None):
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return (time.perf_counter() - started) / requests
+
+
+def bookkeeping(number: int = 100000) -> float:
+    """
+        Time of what ViewMetricsMixin adds to one request, except the execute_wrapper of queries
+    """
+    from tutorial.metrics import PhaseTimer, ViewMetrics, ViewMetricsMixin
+
+    metrics = ViewMetrics()
+
+    def request():
+        timer = PhaseTimer()
+        started = time.perf_counter()
+        with timer.measure('authentication'):
+            pass
+        with timer.measure('permissions'):
+            pass
+        timer.times['serialization'] = time.perf_counter() - started
+        metrics.observe('pollsapi:poll_list', timer.times)
+        ViewMetricsMixin._timed_render(lambda: None, metrics, 'pollsapi:poll_list')()
+
+    return timeit.timeit(request, number=number) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--polls', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from rest_framework.reverse import reverse
+    from rest_framework.test import APIClient
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+    make_polls(args.polls)
+
+    client, url = APIClient(), reverse('pollsapi:poll_list')
+    # warm up
+    measure(client, url, args.requests, True)
+
+    plain, measured = [], []
+    for _ in range(args.rounds):
+        plain.append(measure(client, url, args.requests, False))
+        measured.append(measure(client, url, args.requests, True))
+
+    plain, measured = statistics.median(plain), statistics.median(measured)
+    cost = bookkeeping()
+    print(f'GET {url} ({args.polls} polls), median of {args.rounds} rounds x {args.requests} requests:')
+    print(f'  without metrics  {plain * 1000:8.3f} ms')
+    print(f'  with metrics     {measured * 1000:8.3f} ms   (A/B difference is mostly noise)')
+    print(f'  bookkeeping      {cost * 1000:8.3f} ms')
+    print(f'  overhead         {cost / plain * 100:8.2f} %')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks/suite
+# File: __init__.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 9:00 AM
+
+# Benchmark suite of the pollsapi and snippets endpoints.
+#
+# The test database is seeded by Faker at the given scale (seed.py), each scenario (scenarios.py) requests
+# its endpoint through APIClient and the results - p50/p95/p99 latency, queries per request and allocations
+# (tracemalloc, separate pass) - are emitted as JSON, so the runs of different commits can be compared.
+#
+#   python -m benchmarks.suite --scale small --output before.json
+#   python -m benchmarks.suite --scale small --output after.json --compare before.json
+#   python -m benchmarks.suite --scale medium --votes 200 --only polls. --requests 50
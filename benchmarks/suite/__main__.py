@@ -0,0 +1,134 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks/suite
+# File: __main__.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 10:40 AM
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from benchmarks.suite.seed import SCALES
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    import django
+    django.setup()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.suite', description='Benchmarks of endpoints')
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    for name in ('users', 'polls', 'choices', 'votes', 'snippets'):
+        parser.add_argument(f'--{name}', type=int, help='overrides the value of scale')
+    parser.add_argument('--snippet-lines', type=lambda value: tuple(map(int, value.split(','))),
+                        help='sizes of snippets, for example 10,100,1000')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--alloc-requests', type=int, default=10, help='requests traced by tracemalloc')
+    parser.add_argument('--only', default='', help='prefix of names of scenarios')
+    parser.add_argument('--poll-cache', action='store_true', help='POLLSAPI_CACHE of the default alias (locmem)')
+    parser.add_argument('--output', help='json file, stdout by default')
+    parser.add_argument('--compare', help='json file of the baseline run')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    scale = SCALES[args.scale] | {
+        name: getattr(args, name)
+        for name in ('users', 'polls', 'choices', 'votes', 'snippets', 'snippet_lines')
+        if getattr(args, name) is not None
+    }
+
+    setup_django()
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test import override_settings
+    from django.test.utils import setup_test_environment
+    from rest_framework.test import APIClient
+
+    from benchmarks.suite.runner import compare, run_scenario
+    from benchmarks.suite.scenarios import get_scenarios
+    from benchmarks.suite.seed import seed
+
+    # the suite exceeds budgets on purpose at large scale
+    logging.getLogger('tutorial.queries').setLevel(logging.ERROR)
+
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+    overrides = {'QUERY_BUDGET': {'RAISE': False}}
+    if args.poll_cache:
+        # single process, so locmem is enough
+        overrides['POLLSAPI_CACHE'] = {'ALIAS': 'default'}
+
+    with override_settings(**overrides):
+        started = time.perf_counter()
+        seeded = seed(scale, args.seed)
+        print(f'seeded in {time.perf_counter() - started:.1f} s: {scale}', file=sys.stderr)
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {seeded["user"].auth_token.key}')
+
+        results = {}
+        for scenario in get_scenarios(seeded):
+            if not scenario.name.startswith(args.only):
+                continue
+            for alias in caches:
+                caches[alias].clear()
+            result = results[scenario.name] = run_scenario(
+                client, scenario, args.requests, args.warmup, args.alloc_requests
+            )
+            print(
+                f'{scenario.name:<28} p50 {result["p50_ms"]:9.2f} ms  p99 {result["p99_ms"]:9.2f} ms  '
+                f'queries {result["queries"]["max"]:3}  peak {result["alloc_peak_kb"]} kb',
+                file=sys.stderr
+            )
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'scale': {name: list(value) if isinstance(value, tuple) else value for name, value in scale.items()},
+            'seed': args.seed,
+            'requests': args.requests,
+            'poll_cache': args.poll_cache,
+        },
+        'scenarios': results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(report, baseline)), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
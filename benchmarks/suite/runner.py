@@ -0,0 +1,106 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks/suite
+# File: runner.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 10:05 AM
+
+import statistics
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import ExitStack
+
+from benchmarks.suite.scenarios import Scenario
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    if len(values) < 2:
+        value = values[0] if values else 0.0
+        return {'p50': value, 'p95': value, 'p99': value}
+
+    quantiles = statistics.quantiles(values, n=100, method='inclusive')
+    return {'p50': quantiles[49], 'p95': quantiles[94], 'p99': quantiles[98]}
+
+
+def request(client, url: str, params: dict):
+    response = client.get(url, params)
+    if response.streaming:
+        # highlighted page is streamed, it is produced while consumed
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+def run_scenario(client, scenario: Scenario, requests=100, warmup=10, alloc_requests=10) -> dict:
+    from django.db import connections
+    from tutorial.middleware import QueryStats
+
+    url = scenario.url()
+    for _ in range(warmup):
+        request(client, url, scenario.params)
+
+    timings, db_timings, queries, statuses = [], [], [], Counter()
+    for _ in range(requests):
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            started = time.perf_counter()
+            response = request(client, url, scenario.params)
+            timings.append(time.perf_counter() - started)
+        db_timings.append(stats.duration)
+        queries.append(stats.count)
+        statuses[response.status_code] += 1
+
+    # tracemalloc slows down everything, so allocations are measured by separate requests
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_requests):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            request(client, url, scenario.params)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    latency = percentiles(timings)
+    return {
+        'url': url,
+        'params': scenario.params,
+        'requests': requests,
+        'status': {str(code): count for code, count in sorted(statuses.items())},
+        **{f'{name}_ms': round(value * 1000, 3) for name, value in latency.items()},
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3) if timings else 0.0,
+        'db_p50_ms': round(percentiles(db_timings)['p50'] * 1000, 3),
+        'queries': {'median': statistics.median(queries) if queries else 0, 'max': max(queries, default=0)},
+        'alloc_peak_kb': round(statistics.median(peaks) / 1024, 1) if peaks else None,
+        'alloc_retained_kb': round(statistics.median(retained) / 1024, 1) if retained else None,
+    }
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """
+        Lines of the report of changes against the baseline run (the scenarios of both runs)
+    """
+    lines = [f'{"scenario":<28}{"p50 ms":>26}{"p95 ms":>26}{"queries":>14}{"peak kb":>26}']
+    for name, result in results['scenarios'].items():
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+
+        def change(key):
+            old, new = base[key], result[key]
+            if old is None or new is None:
+                return '-'
+            ratio = f'{new / old:.2f}x' if old else '-'
+            return f'{old:.2f} > {new:.2f} {ratio}'
+
+        queries = f'{base["queries"]["max"]} > {result["queries"]["max"]}'
+        lines.append(
+            f'{name:<28}{change("p50_ms"):>26}{change("p95_ms"):>26}{queries:>14}{change("alloc_peak_kb"):>26}'
+        )
+    return lines
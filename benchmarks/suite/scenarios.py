@@ -0,0 +1,56 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks/suite
+# File: scenarios.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 9:40 AM
+
+# Read-only requests of the endpoints. Writes are not repeatable (one vote per user and poll ...),
+# so they are not included.
+
+from typing import Optional
+
+
+class Scenario:
+
+    def __init__(self, name: str, view_name: str, kwargs: Optional[dict] = None, params: Optional[dict] = None):
+        self.name = name
+        self.view_name = view_name
+        self.kwargs = kwargs or {}
+        self.params = params or {}
+
+    def url(self) -> str:
+        from rest_framework.reverse import reverse
+        return reverse(self.view_name, kwargs=self.kwargs)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r})'
+
+
+def get_scenarios(seeded: dict) -> list[Scenario]:
+    from pollsapi.models import Choice
+
+    poll_id = seeded['poll_ids'][0]
+    choice_id = Choice.objects.filter(poll=poll_id).order_by('pk').values_list('pk', flat=True).first()
+    poll, choice = {'pk': poll_id}, {'pk': poll_id, 'choice_pk': choice_id}
+
+    scenarios = [
+        Scenario('polls.list', 'pollsapi:poll_list'),
+        Scenario('polls.list.votes', 'pollsapi:poll_list', params={'votes': 'list'}),
+        Scenario('polls.list.cursor', 'pollsapi:poll_list', params={'pagination': 'cursor'}),
+        Scenario('polls.detail', 'pollsapi:poll_detail', poll),
+        Scenario('polls.detail.votes', 'pollsapi:poll_detail', poll, params={'votes': 'list'}),
+        Scenario('polls.results', 'pollsapi:poll_results', poll),
+        Scenario('choices.list', 'pollsapi:choice_list', poll),
+        Scenario('choices.list.votes', 'pollsapi:choice_list', poll, params={'votes': 'list'}),
+        Scenario('votes.list', 'pollsapi:vote_list', choice),
+        Scenario('snippets.list', 'snippets:snippet-list'),
+        Scenario('snippets.users', 'snippets:user-list'),
+    ]
+    for lines, snippet_ids in seeded['snippet_ids'].items():
+        snippet = {'pk': snippet_ids[0]}
+        scenarios += [
+            Scenario(f'snippets.detail.{lines}', 'snippets:snippet-detail', snippet),
+            Scenario(f'snippets.highlight.{lines}', 'snippets:snippet-highlight', snippet),
+        ]
+    return scenarios
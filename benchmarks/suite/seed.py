@@ -0,0 +1,116 @@
+# IDE: PyCharm
+# Project: drf
+# Path: benchmarks/suite
+# File: seed.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 9:10 AM
+
+# Seeding of database by Faker. The same scale and seed give the same data.
+
+import random
+
+# votes - per choice, each user votes once per poll, so users >= choices * votes
+# snippet_lines - sizes of snippets (lines of code), `snippets` of each size
+SCALES = {
+    'small': {
+        'users': 50, 'polls': 20, 'choices': 4, 'votes': 5, 'snippets': 5, 'snippet_lines': (10, 100, 1000),
+    },
+    'medium': {
+        'users': 500, 'polls': 100, 'choices': 5, 'votes': 50, 'snippets': 20, 'snippet_lines': (10, 100, 1000),
+    },
+    'large': {
+        'users': 10000, 'polls': 20, 'choices': 10, 'votes': 1000, 'snippets': 20,
+        'snippet_lines': (10, 1000, 10000),
+    },
+}
+
+BATCH_SIZE = 500
+PASSWORD = '12345678'
+
+
+def make_code(fake, lines: int) -> str:
+    statements = (
+        lambda: f'{fake.word()}_{fake.word()} = {fake.pyint()}',
+        lambda: f'print({fake.sentence()!r})',
+        lambda: f'# {fake.sentence()}',
+        lambda: f'def {fake.word()}_{fake.word()}({fake.word()}, {fake.word()}=None):',
+        lambda: f'    return {fake.pylist(3, value_types=[int, float])!r}',
+    )
+    return '\n'.join(fake.random_element(statements)() for _ in range(lines)) + '\n'
+
+
+def seed_users(fake, count: int) -> list:
+    from django.contrib.auth.hashers import make_password
+    from django.contrib.auth.models import User
+    from rest_framework.authtoken.models import Token
+
+    # hashing is slow, all users have the same password
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        [User(username=f'{fake.user_name()}{i}', email=fake.email(), password=password) for i in range(count)],
+        batch_size=BATCH_SIZE
+    )
+    users = list(User.objects.order_by('pk'))
+    Token.objects.bulk_create([Token(key=Token.generate_key(), user=user) for user in users], batch_size=BATCH_SIZE)
+    return users
+
+
+def seed_polls(fake, rng: random.Random, users: list, polls: int, choices: int, votes: int) -> list[int]:
+    from pollsapi.models import Choice, Poll, Vote
+
+    poll_objs = Poll.objects.bulk_create(
+        [Poll(question=fake.sentence(nb_words=6)[:100], created_by=rng.choice(users)) for _ in range(polls)],
+        batch_size=BATCH_SIZE
+    )
+    Choice.objects.bulk_create(
+        [Choice(poll=poll, choice_text=fake.sentence(nb_words=3)[:100]) for poll in poll_objs for _ in range(choices)],
+        batch_size=BATCH_SIZE
+    )
+
+    user_ids = [user.pk for user in users]
+    for poll in poll_objs:
+        choice_ids = list(Choice.objects.filter(poll=poll).order_by('pk').values_list('pk', flat=True))
+        voters = iter(rng.sample(user_ids, len(choice_ids) * votes))
+        batch = [
+            Vote(poll_id=poll.pk, choice_id=choice_id, voted_by_id=next(voters))
+            for choice_id in choice_ids for _ in range(votes)
+        ]
+        # bulk_cast maintains the counters of polls and choices
+        for i in range(0, len(batch), BATCH_SIZE):
+            Vote.objects.bulk_cast(batch[i:i + BATCH_SIZE])
+    return [poll.pk for poll in poll_objs]
+
+
+def seed_snippets(fake, rng: random.Random, users: list, snippets: int, snippet_lines) -> dict[int, list[int]]:
+    from django.test import override_settings
+    from tutorial.snippets.models import Snippet
+
+    result = {}
+    # synchronous highlighting - all renderings exist before the run
+    with override_settings(SNIPPETS_HIGHLIGHTER=None):
+        for lines in snippet_lines:
+            result[lines] = []
+            for _ in range(snippets):
+                snippet = Snippet(
+                    title=fake.sentence(nb_words=4)[:100], code=make_code(fake, lines), language='python',
+                    linenos=rng.random() < 0.5, owner=rng.choice(users)
+                )
+                snippet.save()
+                result[lines].append(snippet.pk)
+    return result
+
+
+def seed(scale: dict, seed: int = 0) -> dict:
+    """
+        Fills the (empty) database. Returns the ids that scenarios refer to
+    """
+    from faker import Faker
+
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+
+    users = seed_users(fake, max(scale['users'], scale['choices'] * scale['votes']))
+    poll_ids = seed_polls(fake, rng, users, scale['polls'], scale['choices'], scale['votes'])
+    snippet_ids = seed_snippets(fake, rng, users, scale['snippets'], scale['snippet_lines'])
+    return {'user': users[0], 'poll_ids': poll_ids, 'snippet_ids': snippet_ids}
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PollsapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'pollsapi'
+
+    def ready(self):
+        # connects receivers that maintain counters, invalidate cached representations and tokens, registers checks
+        from pollsapi import counters, cache, authentication, checks  # noqa: F401
@@ -0,0 +1,218 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: authentication.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-18 (y-m-d) 8:40 AM
+
+# Drop-in replacement of rest_framework.authentication.TokenAuthentication,
+# it keeps token -> user in the process-wide LRU cache with TTL, so the warm requests make no auth queries.
+#
+# settings.POLLSAPI_TOKEN_CACHE = {
+#     'MAX_SIZE': 10000,    # max number of tokens
+#     'TTL': 30,            # seconds
+#     'ALIAS': 'default',   # one of settings.CACHES, it keeps the versions of tokens
+# }
+#
+# Each token has a version in the cache ALIAS, it is replaced when Token is deleted (rotated) or the user
+# is saved/deleted (changes of is_active, is_staff ...). The entry of LRU is used only while its version
+# is current, so with the shared ALIAS (file based, redis ...) the revocation is seen by all processes
+# on the next request. The version is read before the database, so the token deleted concurrently
+# is not cached as valid.
+#
+# Revocation delay - the changes that bypass post_save / post_delete (QuerySet.update(), bulk_update(),
+# raw SQL) and all changes with the alias of locmem in other processes are seen after TTL at most.
+# Code that deactivates users by update() can call invalidate_users(*user_ids).
+
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'TTL': 30,
+    'ALIAS': 'default',
+}
+
+
+class TokenCache:
+
+    def __init__(self, max_size=10000, ttl=30, alias='default') -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.versions = caches[alias]
+        # key -> (expires, version, user, token)
+        self._entries: OrderedDict[str, tuple[float, int, User, Token]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def _version_key(self, key: str) -> str:
+        # token itself is not exposed to the cache backend
+        return f'pollsapi:token:{hashlib.sha256(key.encode()).hexdigest()}:version'
+
+    def get_version(self, key: str) -> int:
+        version_key = self._version_key(key)
+        version = self.versions.get(version_key)
+        if version is None:
+            # new version (not 0) - otherwise the evicted key could make the revoked entries current again
+            self.versions.add(version_key, time.time_ns(), timeout=self.ttl)
+            version = self.versions.get(version_key)
+        return version
+
+    def replace_versions(self, *keys: str) -> None:
+        # entries older than TTL are expired anyway, so the versions live no longer
+        version = time.time_ns()
+        self.versions.set_many({self._version_key(key): version for key in keys}, timeout=self.ttl)
+
+    def get(self, key: str) -> Optional[tuple[User, Token]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+
+        if entry is not None and entry[1] != self.get_version(key):
+            # revoked (by other process too)
+            self.invalidate_key(key)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            _, _, user, token = entry
+
+        # each request gets its own instance, so the changes of it do not leak to others
+        return copy.copy(user), token
+
+    def set(self, key: str, user: User, token: Token, version: int) -> None:
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, version, copy.copy(user), token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            keys = self._keys_by_user.get(entry[2].pk, set())
+            keys.discard(key)
+            if not keys:
+                self._keys_by_user.pop(entry[2].pk, None)
+
+    def invalidate_key(self, key: str) -> None:
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_user(self, user_id) -> None:
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / requests, 4) if requests else 0.0,
+            }
+
+
+_token_cache: Optional[TokenCache] = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache() -> TokenCache:
+    global _token_cache
+
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                options = DEFAULTS | getattr(settings, 'POLLSAPI_TOKEN_CACHE', {})
+                _token_cache = TokenCache(**{key.lower(): value for key, value in options.items()})
+    return _token_cache
+
+
+@receiver(setting_changed)
+def reset_token_cache(*, setting, **kwargs):
+    global _token_cache
+
+    if setting in ('POLLSAPI_TOKEN_CACHE', 'CACHES'):
+        _token_cache = None
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+
+    def authenticate_credentials(self, key):
+        token_cache = get_token_cache()
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # before the database - if the token is deleted meanwhile, the entry is outdated already
+        version = token_cache.get_version(key)
+        # invalid token and inactive user raise AuthenticationFailed, they are not cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token, version)
+        return user, token
+
+
+def invalidate_tokens(*keys: str) -> None:
+    """
+        Revokes the cached tokens in all processes (shared alias) and in this one
+    """
+    if not keys:
+        return
+
+    token_cache = get_token_cache()
+    token_cache.replace_versions(*keys)
+    for key in keys:
+        token_cache.invalidate_key(key)
+
+
+def invalidate_users(*user_ids) -> None:
+    """
+        Revokes the cached tokens of users, for the changes that do not send post_save (QuerySet.update() ...)
+    """
+    invalidate_tokens(*Token.objects.filter(user__in=user_ids).values_list('key', flat=True))
+    if _token_cache is not None:
+        for user_id in user_ids:
+            _token_cache.invalidate_user(user_id)
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Token)
+def token_changed(sender, instance: Token, **kwargs):
+    invalidate_tokens(instance.key)
+    if _token_cache is not None:
+        _token_cache.invalidate_user(instance.user_id)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_save, sender=User)
+def user_changed(sender, instance: User, **kwargs):
+    invalidate_users(instance.pk)
@@ -0,0 +1,221 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: buffer.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-14 (y-m-d) 9:12 AM
+
+# Optional buffered mode of views.Vote.
+# Votes are validated synchronously and acknowledged with 202, but written by a background thread
+# in batches through Vote.objects.bulk_cast(), so writers do not contend on SQLite's single-writer lock.
+#
+# settings.POLLSAPI_VOTE_BUFFER = {
+#     'MAX_SIZE': 10000,           # capacity of the queue
+#     'FLUSH_ITEMS': 500,          # flush as soon as the queue has so many items
+#     'FLUSH_INTERVAL_MS': 200,    # or every N ms
+#     'PUT_TIMEOUT_MS': 500,       # backpressure - how long request waits for free space in the queue
+#     'BACKGROUND': True,          # False - nothing is written until .flush() is called
+#     'SPOOL': None,               # file for votes that could not be written on shutdown
+# }
+#
+# The dedup set is in-process, in case of multiple processes the unique constraint (poll, voted_by)
+# will silently drop duplicates on flush.
+
+import atexit
+import json
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connection
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from pollsapi import models
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_SIZE': 10000,
+    'FLUSH_ITEMS': 500,
+    'FLUSH_INTERVAL_MS': 200,
+    'PUT_TIMEOUT_MS': 500,
+    'BACKGROUND': True,
+    'SPOOL': None,
+}
+
+
+class VoteBufferFull(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many votes at the moment, try again later.'
+    default_code = 'vote_buffer_full'
+
+
+class VoteBuffer:
+
+    def __init__(self, max_size=10000, flush_items=500, flush_interval_ms=200, put_timeout_ms=500,
+                 background=True, spool=None) -> None:
+        self.queue = queue.Queue(max_size)
+        self.flush_items = flush_items
+        self.flush_interval = flush_interval_ms / 1000
+        self.put_timeout = put_timeout_ms / 1000
+        self.background = background
+        self.spool: Optional[Path] = Path(spool) if spool else None
+
+        # (poll_id, voted_by_id) of the votes that are not written yet
+        self._pending: set[tuple[int, int]] = set()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def is_pending(self, poll_id, voted_by_id) -> bool:
+        with self._lock:
+            return (poll_id, voted_by_id) in self._pending
+
+    def add(self, poll_id, choice_id, voted_by_id) -> bool:
+        """
+        Returns False if user has a pending vote on this poll already.
+        Raises VoteBufferFull if there is no free space in the queue during 'PUT_TIMEOUT_MS'.
+        """
+        key = (poll_id, voted_by_id)
+        with self._lock:
+            if key in self._pending:
+                return False
+            self._pending.add(key)
+
+        try:
+            self.queue.put((poll_id, choice_id, voted_by_id), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(key)
+            raise VoteBufferFull()
+
+        self.start()
+        if self.queue.qsize() >= self.flush_items:
+            self._wakeup.set()
+        return True
+
+    def _take(self) -> list[tuple[int, int, int]]:
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _release(self, items):
+        with self._lock:
+            self._pending.difference_update((poll_id, voted_by_id) for poll_id, _, voted_by_id in items)
+
+    def flush(self) -> int:
+        """
+        Writes all queued votes, returns the number of inserted ones.
+        """
+        with self._flush_lock:
+            items = self._take()
+            if not items:
+                return 0
+
+            votes = [
+                models.Vote(poll_id=poll_id, choice_id=choice_id, voted_by_id=voted_by_id)
+                for poll_id, choice_id, voted_by_id in items
+            ]
+            try:
+                inserted = models.Vote.objects.bulk_cast(votes)
+            except Exception:
+                self.save_to_spool(items)
+                raise
+            finally:
+                # votes are in database (or spool) now, so the unique constraint is responsible for duplicates
+                self._release(items)
+
+            if len(inserted) != len(items):
+                logger.warning('Vote buffer: %d of %d votes were rejected by database',
+                               len(items) - len(inserted), len(items))
+            return len(inserted)
+
+    def save_to_spool(self, items) -> None:
+        if self.spool is None:
+            logger.error('Vote buffer: %d votes are lost, SPOOL is not configured', len(items))
+            return
+
+        with self.spool.open('a') as f:
+            for item in items:
+                f.write(json.dumps(item) + '\n')
+        logger.warning('Vote buffer: %d votes are saved into %s', len(items), self.spool)
+
+    def start(self) -> None:
+        if not self.background or self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='vote-buffer', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Vote buffer: flush failed')
+        connection.close()
+
+    def stop(self) -> None:
+        """
+        Stops the background thread and writes the rest of votes.
+        Votes that can not be written are saved into spool (see drain_vote_buffer command).
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Vote buffer: final flush failed')
+
+
+_buffer: Optional[VoteBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_vote_buffer() -> Optional[VoteBuffer]:
+    """
+    Returns the process-wide buffer or None if buffered mode is not enabled by settings.POLLSAPI_VOTE_BUFFER
+    """
+    global _buffer
+
+    options = getattr(settings, 'POLLSAPI_VOTE_BUFFER', None)
+    if options is None:
+        return None
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                options = DEFAULTS | options
+                _buffer = VoteBuffer(**{key.lower(): value for key, value in options.items()})
+                atexit.register(_buffer.stop)
+    return _buffer
+
+
+@receiver(setting_changed)
+def reset_vote_buffer(*, setting, **kwargs):
+    global _buffer
+
+    if setting == 'POLLSAPI_VOTE_BUFFER' and _buffer is not None:
+        atexit.unregister(_buffer.stop)
+        _buffer.stop()
+        _buffer = None
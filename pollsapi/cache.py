@@ -0,0 +1,176 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: cache.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-16 (y-m-d) 10:12 AM
+
+# Read-through cache of serialized responses of the poll's views (PollDetail, ChoiceList).
+#
+# settings.POLLSAPI_CACHE = {
+#     'ALIAS': 'default',   # one of settings.CACHES, shared between processes (file based, redis ...)
+#     'TIMEOUT': 300,       # seconds
+# }
+#
+# The generations are replaced in the cache itself, so the alias of locmem (memory of one process)
+# would leave the other workers with stale representations - it is reported by `manage.py check`.
+# Disabled (None) by default, tests enable it with locmem.
+#
+# Each poll has a generation stored in cache, it is a part of the keys of all cached representations
+# of the poll. Any change of the poll, its choices or votes replaces the generation,
+# so all its representations become unreachable at once and expire by TIMEOUT.
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from pollsapi import models
+from pollsapi.signals import votes_cast
+
+# should be increased when representation (serializers) is changed
+REPRESENTATION_VERSION = 1
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+}
+
+
+class PollCache:
+
+    def __init__(self, alias='default', timeout=300) -> None:
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self._stats = defaultdict(lambda: {'hits': 0, 'misses': 0})
+        self._lock = threading.Lock()
+
+    def _generation_key(self, poll_id) -> str:
+        return f'pollsapi:poll:{poll_id}:generation'
+
+    def get_generation(self, poll_id) -> int:
+        key = self._generation_key(poll_id)
+        generation = self.cache.get(key)
+        if generation is None:
+            # new generation (not 0) - otherwise the evicted key could resurrect the old representations
+            self.cache.add(key, time.time_ns(), timeout=None)
+            generation = self.cache.get(key)
+        return generation
+
+    def make_key(self, poll_id, representation: str) -> str:
+        digest = hashlib.md5(representation.encode(), usedforsecurity=False).hexdigest()
+        return f'pollsapi:poll:{poll_id}:{self.get_generation(poll_id)}:v{REPRESENTATION_VERSION}:{digest}'
+
+    def get(self, key: str, name: str):
+        data = self.cache.get(key)
+        with self._lock:
+            self._stats[name]['hits' if data is not None else 'misses'] += 1
+        return data
+
+    def set(self, key: str, data) -> None:
+        self.cache.set(key, data, timeout=self.timeout)
+
+    def invalidate(self, *poll_ids) -> None:
+        generation = time.time_ns()
+        keys = [self._generation_key(poll_id) for poll_id in poll_ids]
+        self.cache.set_many(dict.fromkeys(keys, generation), timeout=None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+
+_poll_cache: Optional[PollCache] = None
+_poll_cache_lock = threading.Lock()
+
+
+def get_poll_cache() -> Optional[PollCache]:
+    """
+    Returns the process-wide cache or None if it is disabled by settings.POLLSAPI_CACHE = None
+    """
+    global _poll_cache
+
+    options = getattr(settings, 'POLLSAPI_CACHE', None)
+    if options is None:
+        return None
+
+    if _poll_cache is None:
+        with _poll_cache_lock:
+            if _poll_cache is None:
+                options = DEFAULTS | options
+                _poll_cache = PollCache(**{key.lower(): value for key, value in options.items()})
+    return _poll_cache
+
+
+@receiver(setting_changed)
+def reset_poll_cache(*, setting, **kwargs):
+    global _poll_cache
+
+    if setting in ('POLLSAPI_CACHE', 'CACHES'):
+        _poll_cache = None
+
+
+@checks.register(checks.Tags.caches)
+def check_poll_cache(app_configs=None, **kwargs):
+    options = getattr(settings, 'POLLSAPI_CACHE', None)
+    if options is None:
+        return []
+
+    alias = (DEFAULTS | options)['ALIAS']
+    if alias not in settings.CACHES:
+        return [checks.Error(
+            f'POLLSAPI_CACHE["ALIAS"] = {alias!r} is not defined in settings.CACHES',
+            id='pollsapi.E001',
+        )]
+
+    try:
+        backend = import_string(settings.CACHES[alias].get('BACKEND', ''))
+    except ImportError:
+        # reported by the checks of Django
+        return []
+    if issubclass(backend, LocMemCache):
+        return [checks.Error(
+            f'POLLSAPI_CACHE["ALIAS"] = {alias!r} is the local memory cache, invalidations are not seen '
+            f'by other processes',
+            hint='Use the cache that is shared between processes (file based, redis ...) '
+                 'or disable it by POLLSAPI_CACHE = None.',
+            id='pollsapi.E002',
+        )]
+    return []
+
+
+def invalidate_polls(*poll_ids) -> None:
+    poll_cache = get_poll_cache()
+    if poll_cache is None or not poll_ids:
+        return
+
+    # immediately and once more after commit - the readers between them could cache the old state
+    poll_cache.invalidate(*poll_ids)
+    transaction.on_commit(lambda: poll_cache.invalidate(*poll_ids))
+
+
+@receiver([post_save, post_delete], sender=models.Poll)
+def poll_changed(sender, instance: models.Poll, **kwargs):
+    invalidate_polls(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=models.Choice)
+@receiver([post_save, post_delete], sender=models.Vote)
+def choice_or_vote_changed(sender, instance, **kwargs):
+    invalidate_polls(instance.poll_id)
+
+
+@receiver(votes_cast)
+def votes_were_cast(sender, poll_ids, **kwargs):
+    invalidate_polls(*poll_ids)
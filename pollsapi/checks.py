@@ -0,0 +1,92 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: checks.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 8:30 AM
+
+# Database check of query plans of the hot querysets of pollsapi.
+# It runs by `manage.py check --database default` (and by migrate, test runner) and warns
+# if any of them falls back to the full scan of table or sorts rows in a temporary b-tree.
+# Only SQLite is checked - its EXPLAIN QUERY PLAN does not depend on the size of tables.
+
+import re
+
+from django.core import checks
+from django.db import connections, DatabaseError
+from django.db.models import QuerySet
+
+from pollsapi import models
+
+# 'SCAN pollsapi_vote' (or 'SCAN TABLE pollsapi_vote' by older SQLite) - without 'USING [COVERING] INDEX'
+FULL_SCAN_RE = re.compile(r'\bSCAN (?:TABLE )?(\w+)(?! USING)(?:\s|$)')
+TEMP_SORT_RE = re.compile(r'\bUSE TEMP B-TREE FOR (ORDER BY|GROUP BY)')
+
+
+def view_queryset(view_class, **attrs) -> QuerySet:
+    """
+        Queryset of view as get_object() and list() filter it, without request (default representation)
+    """
+    view = view_class(request=None, format_kwarg=None, **attrs)
+    return view.filter_queryset(view.get_queryset())
+
+
+def hot_querysets() -> dict[str, QuerySet]:
+    """
+        Lookups that are made by views on each request, they are built by the views themselves.
+        Values of url kwargs do not matter.
+    """
+    # views (DRF, serializers, ...) are imported by the database check only, not by apps.ready at startup
+    from pollsapi import views
+
+    kwargs, poll = {'pk': 1, 'choice_pk': 1}, models.Poll(pk=1)
+    querysets = {
+        'etag of poll': views.PollDetail(kwargs=kwargs).get_etag_queryset(),
+        'polls page': view_queryset(views.PollList, kwargs={}).order_by(*views.PollList.pagination_class.ordering),
+        'choices of poll': view_queryset(views.ChoiceList, kwargs=kwargs, _poll=poll),
+        'results of poll': views.PollResults().get_choices_queryset(poll),
+        'votes of choice': view_queryset(views.VoteList, kwargs=kwargs).order_by(
+            views.VoteList.pagination_class.ordering
+        ),
+        'votes by (poll, voted_by)': views.VoteBulk().get_voted_queryset([1], [1]),
+    }
+    for view_class in (views.PollDetail, views.PollResults, views.ChoiceDetail):
+        lookup_url_kwarg = view_class.lookup_url_kwarg or view_class.lookup_field
+        querysets[f'object of {view_class.__name__}'] = view_queryset(view_class, kwargs=kwargs, _poll=poll).filter(
+            **{view_class.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+    return querysets
+
+
+def plan_problems(queryset: QuerySet) -> list[str]:
+    """
+        Lines of EXPLAIN QUERY PLAN that show the full scan of table or the sorting in temporary b-tree
+    """
+    return [
+        line for line in queryset.explain().splitlines()
+        if FULL_SCAN_RE.search(line) or TEMP_SORT_RE.search(line)
+    ]
+
+
+@checks.register(checks.Tags.database)
+def check_query_plans(app_configs=None, databases=None, **kwargs):
+    errors = []
+    for alias in databases or ():
+        if connections[alias].vendor != 'sqlite':
+            continue
+
+        for name, queryset in hot_querysets().items():
+            try:
+                problems = plan_problems(queryset.using(alias))
+            except DatabaseError:
+                # tables are not created yet (check is run by migrate before migrations)
+                return errors
+
+            if problems:
+                errors.append(checks.Warning(
+                    f'Query "{name}" of pollsapi does not use index: {"; ".join(problems)}',
+                    hint='Add the index that matches this lookup (and migration for it).',
+                    obj=queryset.model,
+                    id='pollsapi.W001',
+                ))
+    return errors
@@ -0,0 +1,181 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: compiled.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 1:15 PM
+
+# Read-only representations of ModelSerializer classes (PollSerializer -> ChoiceSerializer -> VoteSerializer)
+# without the field machinery of DRF per object.
+#
+# The fields of serializer class are inspected once (compile_serializer), each field becomes an accessor -
+# lookup of values() or attribute getter of instance, and converter (None if the value is represented as is).
+# Nested serializers (many=True) of reverse foreign keys are fetched by one values() query per level
+# and are grouped by parent id, so the tree of 10k votes is 3 queries and plain dicts / lists.
+#
+# Supported fields - model fields, PrimaryKeyRelatedField (dotted source too) and nested serializers of
+# reverse foreign keys. Others (SerializerMethodField, hyperlinks, properties ...) raise ImproperlyConfigured.
+# Serializers (nested ones too) that override to_representation() / to_internal_value() raise it as well,
+# their custom output would be lost.
+
+import functools
+from collections import defaultdict
+from operator import attrgetter
+from typing import Iterable, Optional
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import F, QuerySet
+from rest_framework import serializers
+
+# fields whose to_representation() does not change the value fetched from database
+PASSTHROUGH_FIELDS = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.ReadOnlyField
+)
+# key of parent id in the rows of nested serializer
+PARENT_KEY = 'compiled_parent_id'
+# methods of serializer that can not be overridden (the compiled representation does not call them)
+CUSTOM_METHODS = ('to_representation', 'to_internal_value')
+
+
+class CompiledSerializer:
+
+    def __init__(self, serializer_class) -> None:
+        self.check_methods(serializer_class, serializers.Serializer)
+        serializer = serializer_class()
+        self.serializer_class = serializer_class
+        self.model = serializer.Meta.model
+        # (field_name, lookup of values(), getter of instance, converter)
+        self.values: list[tuple[str, str, attrgetter, Optional[callable]]] = []
+        # (field_name, CompiledSerializer, foreign key of nested model to this one)
+        self.nested: list[tuple[str, 'CompiledSerializer', str]] = []
+        # names of fields in order of serializer
+        self.field_names: list[str] = []
+
+        for field in serializer._readable_fields:
+            self.field_names.append(field.field_name)
+            if isinstance(field, serializers.ListSerializer) and isinstance(field.child, serializers.ModelSerializer):
+                self.check_methods(type(field), serializers.ListSerializer, field)
+                self.check_methods(type(field.child), serializers.Serializer, field)
+                self.nested.append((field.field_name, compile_serializer(type(field.child)), self.get_relation(field)))
+            else:
+                self.values.append((field.field_name, *self.get_accessors(field), self.get_converter(field)))
+
+        self.lookups = [lookup for _, lookup, _, _ in self.values]
+        if self.nested:
+            # rows should have id to be the parents of nested rows
+            self.lookups.append('pk')
+
+    def check_methods(self, serializer_class, base_class, field=None):
+        for name in CUSTOM_METHODS:
+            if getattr(serializer_class, name) is not getattr(base_class, name):
+                reason = f'{serializer_class.__name__}.{name}() is overridden'
+                if field is not None:
+                    self.fail(field, reason)
+                raise ImproperlyConfigured(f'{serializer_class.__name__} can not be compiled, {reason}')
+
+    def fail(self, field, reason: str):
+        raise ImproperlyConfigured(
+            f'{self.serializer_class.__name__}.{field.field_name} ({type(field).__name__}) can not be compiled, {reason}'
+        )
+
+    def get_accessors(self, field) -> tuple[str, attrgetter]:
+        if field.source == '*' or not field.source_attrs:
+            self.fail(field, 'source "*" is not supported')
+        if not isinstance(field, (serializers.PrimaryKeyRelatedField, *PASSTHROUGH_FIELDS)) \
+                and isinstance(field, (serializers.RelatedField, serializers.Serializer)):
+            self.fail(field, 'only PrimaryKeyRelatedField of relations is supported')
+
+        # each part of source should be the field of model (values() can not fetch properties and methods)
+        model, attrs = self.model, list(field.source_attrs)
+        for i, name in enumerate(field.source_attrs):
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                self.fail(field, f'"{name}" is not a field of {model.__name__}')
+            if model_field.is_relation and not model_field.concrete:
+                self.fail(field, f'"{name}" is reverse relation')
+            if model_field.is_relation:
+                if i == len(field.source_attrs) - 1:
+                    # pk of related object - attribute of foreign key
+                    attrs[i] = model_field.attname
+                model = model_field.related_model
+
+        return '__'.join(field.source_attrs), attrgetter('.'.join(attrs))
+
+    def get_converter(self, field) -> Optional[callable]:
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            # value is pk (or value of dotted source)
+            return field.pk_field.to_representation if field.pk_field is not None else None
+        if type(field) in PASSTHROUGH_FIELDS:
+            return None
+        return field.to_representation
+
+    def get_relation(self, field) -> str:
+        try:
+            relation = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            relation = None
+        if relation is None or not relation.one_to_many:
+            self.fail(field, 'only nested serializers of reverse foreign keys are supported')
+        return relation.field.name
+
+    def represent_values(self, get_value, item) -> dict:
+        result = {}
+        for name, lookup, getter, converter in self.values:
+            value = get_value(item, lookup, getter)
+            if value is not None and converter is not None:
+                value = converter(value)
+            result[name] = value
+        return result
+
+    def represent_rows(self, rows: list[dict], get_pk=lambda row: row['pk']) -> list[dict]:
+        return self._represent(rows, lambda row, lookup, getter: row[lookup], get_pk)
+
+    def represent_instances(self, instances: Iterable) -> list[dict]:
+        """
+            Representations of loaded instances, nested serializers are fetched by values()
+        """
+        return self._represent(list(instances), lambda obj, lookup, getter: getter(obj), attrgetter('pk'))
+
+    def represent(self, queryset: QuerySet) -> list[dict]:
+        """
+            Representations of rows of queryset (1 query + 1 query per level of nested serializers)
+        """
+        return self.represent_rows(list(queryset.values(*self.lookups)))
+
+    def _represent(self, items: list, get_value, get_pk) -> list[dict]:
+        nested = []
+        if self.nested and items:
+            parent_ids = [get_pk(item) for item in items]
+            nested = [(name, compiled.children(fk, parent_ids)) for name, compiled, fk in self.nested]
+
+        result = []
+        for item in items:
+            values = self.represent_values(get_value, item)
+            if nested:
+                pk = get_pk(item)
+                values.update((name, children.get(pk, [])) for name, children in nested)
+                # order of fields as in serializer
+                values = {name: values[name] for name in self.field_names}
+            result.append(values)
+        return result
+
+    def children(self, fk: str, parent_ids: list) -> dict[object, list[dict]]:
+        """
+            Representations of the nested rows grouped by id of parent
+        """
+        # default manager and no extra ordering - the same query as prefetch_related() does
+        rows = list(
+            self.model._default_manager.filter(**{f'{fk}__in': parent_ids}).values(
+                *self.lookups, **{PARENT_KEY: F(fk)}
+            )
+        )
+        grouped = defaultdict(list)
+        for row, representation in zip(rows, self.represent_rows(rows)):
+            grouped[row[PARENT_KEY]].append(representation)
+        return grouped
+
+
+@functools.lru_cache(maxsize=None)
+def compile_serializer(serializer_class) -> CompiledSerializer:
+    return CompiledSerializer(serializer_class)
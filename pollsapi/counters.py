@@ -0,0 +1,84 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: counters.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-24 (y-m-d) 10:20 AM
+
+# Maintenance of the denormalized counters (Choice.vote_count, Poll.total_votes).
+# Vote.objects.cast() and .bulk_cast() increment them by their own queries (they do not send post_save),
+# the receivers below count the votes written by save() and the deleted ones, whatever writes them -
+# admin, Vote.objects.create(), cascade of user or choice, QuerySet.delete().
+#
+#   created vote       - vote_count of its choice and total_votes of its poll are incremented by F()
+#   changed vote       - counters of its previous choice and poll are decremented, of the new ones incremented
+#   deleted vote       - vote_count of its choice and total_votes of its poll are decremented by F()
+#   deleted choice     - total_votes of its poll is decremented by the current vote_count of the choice
+#                        (pre_delete, so the row is still there), cascaded votes of it are skipped
+#   deleted poll       - nothing, choices and votes go away with it
+#
+# Poll.last_delete_at is set by the deleted votes and choices (Last-Modified of PollResults).
+#
+# Fixtures (raw save of loaddata) keep their own values of counters.
+
+from django.db.models import F, Subquery, QuerySet
+from django.db.models.signals import pre_delete, post_delete, pre_save, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from pollsapi import models
+
+
+def deleted_with(origin, model) -> bool:
+    """
+        True if the deletion was started by instance or queryset of model (origin argument of delete signals)
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(origin_model, model)
+
+
+def count_vote(choice_id, poll_id, delta: int, **extra) -> None:
+    models.Choice.objects.filter(pk=choice_id).update(vote_count=F('vote_count') + delta)
+    models.Poll.objects.filter(pk=poll_id).update(total_votes=F('total_votes') + delta, **extra)
+
+
+@receiver(pre_delete, sender=models.Choice)
+def choice_deleting(sender, instance: models.Choice, origin=None, **kwargs):
+    if deleted_with(origin, models.Poll):
+        return
+
+    # current value, instance could be loaded before the last votes
+    vote_count = models.Choice.objects.filter(pk=instance.pk).values('vote_count')
+    models.Poll.objects.filter(pk=instance.poll_id).update(
+        total_votes=F('total_votes') - Subquery(vote_count), last_delete_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=models.Vote)
+def vote_saving(sender, instance: models.Vote, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+
+    # (choice, poll) that the vote is counted for now, None - new vote with explicit pk
+    instance._counted_for = models.Vote.objects.filter(pk=instance.pk).values_list('choice', 'poll').first()
+
+
+@receiver(post_save, sender=models.Vote)
+def vote_saved(sender, instance: models.Vote, created, raw=False, **kwargs):
+    counted_for = instance.__dict__.pop('_counted_for', None)
+    if raw:
+        return
+
+    if not created:
+        if counted_for is None or counted_for == (instance.choice_id, instance.poll_id):
+            return
+        count_vote(*counted_for, -1)
+    count_vote(instance.choice_id, instance.poll_id, 1, last_vote_at=timezone.now())
+
+
+@receiver(post_delete, sender=models.Vote)
+def vote_deleted(sender, instance: models.Vote, origin=None, **kwargs):
+    if deleted_with(origin, (models.Poll, models.Choice)):
+        return
+
+    count_vote(instance.choice_id, instance.poll_id, -1, last_delete_at=timezone.now())
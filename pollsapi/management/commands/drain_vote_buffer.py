@@ -0,0 +1,69 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/management/commands
+# File: drain_vote_buffer.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-14 (y-m-d) 11:03 AM
+
+import json
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from pollsapi import models
+
+
+class Command(BaseCommand):
+    help = 'Writes votes that were spooled by the vote buffer on shutdown (see pollsapi.buffer)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--spool', help='Spool file, by default POLLSAPI_VOTE_BUFFER["SPOOL"]')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        spool = options['spool'] or (getattr(settings, 'POLLSAPI_VOTE_BUFFER', None) or {}).get('SPOOL')
+        if not spool:
+            raise CommandError('Spool file is not configured, use --spool')
+
+        spool = Path(spool)
+        draining = spool.with_name(spool.name + '.draining')
+        if draining.exists():
+            # left by the drain that failed partway - it is drained again with the new votes,
+            # its votes that were written already are rejected as duplicates
+            if spool.exists():
+                self.append_spool(spool, draining)
+        elif spool.exists():
+            # file is renamed first, so the running buffer can spool into a new one meanwhile
+            spool.replace(draining)
+        else:
+            self.stdout.write(f'Spool {spool} does not exist, nothing to drain')
+            return
+
+        total = inserted = 0
+        batch = []
+        with draining.open() as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                poll_id, choice_id, voted_by_id = json.loads(line)
+                batch.append(models.Vote(poll_id=poll_id, choice_id=choice_id, voted_by_id=voted_by_id))
+                if len(batch) >= options['batch_size']:
+                    total, inserted = total + len(batch), inserted + len(models.Vote.objects.bulk_cast(batch))
+                    batch = []
+        if batch:
+            total, inserted = total + len(batch), inserted + len(models.Vote.objects.bulk_cast(batch))
+
+        draining.unlink()
+        self.stdout.write(f'{inserted} of {total} votes were written, {total - inserted} were rejected as duplicates')
+
+    def append_spool(self, spool: Path, draining: Path):
+        # renamed first as well, the running buffer does not write into the file that is appended
+        appending = spool.with_name(spool.name + '.appending')
+        spool.replace(appending)
+        with appending.open() as source, draining.open('a') as target:
+            # the last line of interrupted file can be incomplete, the empty lines are skipped
+            target.write('\n')
+            shutil.copyfileobj(source, target)
+        appending.unlink()
@@ -0,0 +1,43 @@
+# Generated by Django 4.1.1 on 2022-10-20 08:16
+
+from django.db import migrations, models
+
+
+# denormalized counters of votes, they are maintained by Vote.objects.cast() (see models.py)
+
+def count_votes(apps, schema_editor):
+    Poll = apps.get_model('pollsapi', 'Poll')
+    Choice = apps.get_model('pollsapi', 'Choice')
+    Vote = apps.get_model('pollsapi', 'Vote')
+    using = schema_editor.connection.alias
+    vote_count = models.Subquery(
+        Vote.objects.using(using).filter(choice=models.OuterRef('pk')).order_by().values('choice')
+        .annotate(count=models.Count('pk')).values('count')
+    )
+    total_votes = models.Subquery(
+        Vote.objects.using(using).filter(poll=models.OuterRef('pk')).order_by().values('poll')
+        .annotate(count=models.Count('pk')).values('count')
+    )
+    Choice.objects.using(using).update(vote_count=models.functions.Coalesce(vote_count, 0))
+    Poll.objects.using(using).update(total_votes=models.functions.Coalesce(total_votes, 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pollsapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='choice',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='total_votes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_votes, migrations.RunPython.noop),
+    ]
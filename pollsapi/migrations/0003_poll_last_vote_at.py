@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2022-10-20 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pollsapi', '0002_vote_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='last_vote_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
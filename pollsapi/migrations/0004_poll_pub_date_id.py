@@ -0,0 +1,17 @@
+# Generated by Django 4.1.1 on 2022-10-20 08:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pollsapi', '0003_poll_last_vote_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['pub_date', 'id'], name='poll_pub_date_id'),
+        ),
+    ]
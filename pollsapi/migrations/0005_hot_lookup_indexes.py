@@ -0,0 +1,35 @@
+# Generated by Django 4.1.1 on 2022-10-20 08:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pollsapi', '0004_poll_pub_date_id'),
+    ]
+
+    operations = [
+        # the composite indexes are created before the FK indexes they replace are dropped
+        migrations.AddIndex(
+            model_name='poll',
+            index=models.Index(fields=['created_by', 'pub_date'], name='poll_created_by_pub_date'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['poll', 'choice'], name='vote_poll_choice'),
+        ),
+        migrations.AlterField(
+            model_name='poll',
+            name='created_by',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='polls', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='vote',
+            name='poll',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='pollsapi.poll'),
+        ),
+    ]
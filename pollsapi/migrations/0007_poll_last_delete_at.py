@@ -0,0 +1,18 @@
+# Generated by Django 4.1.1 on 2022-10-24 12:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pollsapi', '0006_choice_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='poll',
+            name='last_delete_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
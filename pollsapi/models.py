@@ -1,14 +1,35 @@
-from django.db import models
+from collections import Counter
+from typing import Optional
+
+from django.db import models, connections, transaction, IntegrityError
+from django.db.models import F, Case, When, Value
+from django.utils import timezone
 
 # Create your models here.
 
 from django.contrib.auth.models import User
 
+from pollsapi.signals import votes_cast
+
 
 class Poll(models.Model):
     question = models.CharField(max_length=100)
-    created_by = models.ForeignKey(User, related_name='polls', on_delete=models.CASCADE)
+    # db_index=False - the composite index (created_by, pub_date) covers lookups by created_by
+    created_by = models.ForeignKey(User, related_name='polls', on_delete=models.CASCADE, db_index=False)
     pub_date = models.DateTimeField(auto_now=True)
+    # denormalized counters, they are maintained by Vote.objects.cast() and pollsapi.counters (save(), delete)
+    total_votes = models.PositiveIntegerField(default=0, editable=False)
+    last_vote_at = models.DateTimeField(null=True, editable=False)
+    # the latest deleted vote or choice, it is set by pollsapi.counters (Last-Modified of results)
+    last_delete_at = models.DateTimeField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # polls of user ordered by pub_date
+            models.Index(fields=['created_by', 'pub_date'], name='poll_created_by_pub_date'),
+            # cursor pagination of PollList
+            models.Index(fields=['pub_date', 'id'], name='poll_pub_date_id'),
+        ]
 
     def __str__(self):
         return self.question
@@ -17,15 +38,122 @@ class Poll(models.Model):
 class Choice(models.Model):
     poll = models.ForeignKey(Poll, related_name='choices', on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=100)
+    # denormalized counter, it is maintained by Vote.objects.cast() and pollsapi.counters (save(), delete)
+    vote_count = models.PositiveIntegerField(default=0, editable=False)
+    # change of the choice itself (text), it is a part of ETag of poll's views, votes do not touch it
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.choice_text
 
 
+class VoteQuerySet(models.QuerySet):
+
+    def cast(self, poll_id, choice_id, voted_by_id) -> Optional[int]:
+        """
+        Inserts vote by single INSERT ... SELECT without any pre-checks and updates the counters.
+        Row will be inserted only if the choice belongs to the poll, otherwise None is returned.
+        The unique constraint (poll, voted_by) raises IntegrityError if user voted on this poll already.
+        Returns id of the new vote.
+        """
+        connection = connections[self.db]
+        qn = connection.ops.quote_name
+        vote_opts, choice_opts = self.model._meta, Choice._meta
+        columns = [qn(vote_opts.get_field(name).column) for name in ('choice', 'poll', 'voted_by')]
+        choice_pk, choice_poll = [qn(choice_opts.get_field(name).column) for name in ('id', 'poll')]
+
+        sql = (
+            f'INSERT INTO {qn(vote_opts.db_table)} ({", ".join(columns)}) '
+            f'SELECT {choice_pk}, {choice_poll}, %s FROM {qn(choice_opts.db_table)} '
+            f'WHERE {choice_pk} = %s AND {choice_poll} = %s'
+        )
+        params = [voted_by_id, choice_id, poll_id]
+        returning = connection.features.can_return_columns_from_insert
+        if returning:
+            # PostgreSQL (cursor.lastrowid is not the id there), SQLite 3.35+
+            returning_sql, returning_params = connection.ops.return_insert_columns([vote_opts.pk])
+            sql, params = f'{sql} {returning_sql}', [*params, *returning_params]
+
+        with transaction.atomic(using=self.db):
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                if returning:
+                    row = connection.ops.fetch_returned_insert_columns(cursor, returning_params)
+                    if not row:
+                        return None
+                    pk = row[0]
+                else:
+                    if cursor.rowcount != 1:
+                        return None
+                    pk = connection.ops.last_insert_id(cursor, vote_opts.db_table, vote_opts.pk.column)
+
+            Choice.objects.using(self.db).filter(pk=choice_id).update(vote_count=F('vote_count') + 1)
+            Poll.objects.using(self.db).filter(pk=poll_id).update(
+                total_votes=F('total_votes') + 1, last_vote_at=timezone.now()
+            )
+            votes_cast.send(sender=self.model, poll_ids={poll_id})
+
+        return pk
+
+    def bulk_cast(self, votes: list['Vote']) -> list['Vote']:
+        """
+        Inserts votes by bulk_create() and updates the counters.
+        Votes are expected to be validated already (choice belongs to poll, user did not vote),
+        the conflicting ones (voted already or concurrently) are skipped silently.
+        Returns the votes that were really inserted by this call, with pk (if database returns rows of bulk insert).
+        """
+        if not votes:
+            return []
+
+        with transaction.atomic(using=self.db):
+            try:
+                # usual case - nothing conflicts, the whole batch is one INSERT
+                with transaction.atomic(using=self.db):
+                    inserted = self.bulk_create(votes)
+            except IntegrityError:
+                # (poll, voted_by) of some vote exists - each vote by its own savepoint, so only the rows
+                # inserted by this call are counted (the concurrent insert of the same key is not taken for own)
+                inserted = []
+                for vote in votes:
+                    vote.pk = None
+                    try:
+                        with transaction.atomic(using=self.db):
+                            self.bulk_create([vote])
+                    except IntegrityError:
+                        vote.pk = None
+                    else:
+                        inserted.append(vote)
+
+            self._increment_counter(Choice, 'vote_count', Counter(vote.choice_id for vote in inserted))
+            self._increment_counter(
+                Poll, 'total_votes', Counter(vote.poll_id for vote in inserted), last_vote_at=timezone.now()
+            )
+            if inserted:
+                votes_cast.send(sender=self.model, poll_ids={vote.poll_id for vote in inserted})
+
+        return inserted
+
+    def _increment_counter(self, model, field_name: str, counts: Counter, **extra):
+        # single UPDATE ... SET field = field + CASE WHEN pk = .. THEN .. END for all rows
+        if not counts:
+            return
+
+        increment = Case(*[When(pk=pk, then=Value(count)) for pk, count in counts.items()], default=Value(0))
+        model.objects.using(self.db).filter(pk__in=counts).update(**{field_name: F(field_name) + increment}, **extra)
+
+
 class Vote(models.Model):
     choice = models.ForeignKey(Choice, related_name='votes', on_delete=models.CASCADE)
-    poll = models.ForeignKey(Poll, related_name='votes', on_delete=models.CASCADE)
+    # db_index=False - lookups by poll are covered by (poll, voted_by) and (poll, choice)
+    poll = models.ForeignKey(Poll, related_name='votes', on_delete=models.CASCADE, db_index=False)
     voted_by = models.ForeignKey(User, related_name='votes', on_delete=models.CASCADE)
 
+    objects = VoteQuerySet.as_manager()
+
     class Meta:
+        # also the index of votes by (poll, voted_by)
         unique_together = ['poll', 'voted_by']
+        indexes = [
+            # covering index of counting votes per choice of poll (GROUP BY choice without table access)
+            models.Index(fields=['poll', 'choice'], name='vote_poll_choice'),
+        ]
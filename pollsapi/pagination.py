@@ -0,0 +1,23 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: pagination.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-12 (y-m-d) 4:18 PM
+
+from rest_framework.pagination import CursorPagination
+
+from tutorial.pagination import PageNumberOrCursorPagination
+
+
+class VoteCursorPagination(CursorPagination):
+    """
+        Keyset pagination by vote's id, the page costs the same regardless of its position
+    """
+    ordering = 'id'
+
+
+class PollPagination(PageNumberOrCursorPagination):
+    # backed by index Poll(pub_date, id)
+    ordering = ('pub_date', 'id')
+    estimate_count = True
@@ -22,24 +22,54 @@ class VoteSerializer(serializers.ModelSerializer):
         read_only_fields = ['poll', 'choice']
 
 
-class ChoiceSerializer(serializers.ModelSerializer):
-    votes = VoteSerializer(many=True, read_only=True, required=False)
+class BulkVoteSerializer(serializers.Serializer):
+    """
+        Item of bulk vote submission, 'voted_by' is allowed only for staff (importers)
+    """
+    poll = serializers.IntegerField()
+    choice = serializers.IntegerField()
+    voted_by = serializers.IntegerField(required=False)
+
+
+class ChoiceCountSerializer(serializers.ModelSerializer):
+    """
+        Choice without nested votes, only denormalized 'vote_count' is present
+    """
 
     class Meta:
         model = models.Choice
-        fields = '__all__'
+        # updated_at is the part of ETag only
+        exclude = ['updated_at']
         read_only_fields = ['poll']
 
 
-class PollSerializer(serializers.ModelSerializer):
-    choices = ChoiceSerializer(many=True, read_only=True, required=False)
+class ChoiceSerializer(ChoiceCountSerializer):
+    votes = VoteSerializer(many=True, read_only=True, required=False)
+
+    class Meta(ChoiceCountSerializer.Meta):
+        pass
+
+
+class PollCountSerializer(serializers.ModelSerializer):
+    """
+        Poll without nested votes, choices contain only denormalized 'vote_count'
+    """
+    choices = ChoiceCountSerializer(many=True, read_only=True, required=False)
 
     class Meta:
         model = models.Poll
-        fields = '__all__'
+        # last_delete_at is the part of Last-Modified only
+        exclude = ['last_delete_at']
         read_only_fields = ['created_by']
 
 
+class PollSerializer(PollCountSerializer):
+    choices = ChoiceSerializer(many=True, read_only=True, required=False)
+
+    class Meta(PollCountSerializer.Meta):
+        pass
+
+
 class UserSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -0,0 +1,12 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi
+# File: signals.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-16 (y-m-d) 10:05 AM
+
+from django.dispatch import Signal
+
+# Vote.objects.cast() and .bulk_cast() write votes and counters bypassing post_save,
+# so they send this one instead, arguments: sender=Vote, poll_ids=set of affected polls
+votes_cast = Signal()
@@ -0,0 +1,113 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_authentication.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-18 (y-m-d) 9:52 AM
+
+# tests for pollsapi.authentication.CachedTokenAuthentication
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from pollsapi import models
+from pollsapi.authentication import CachedTokenAuthentication, TokenCache, get_token_cache, invalidate_users
+from pollsapi.tests.test_poll_view import PollMixin
+
+
+class TestCachedTokenAuthentication(PollMixin, APITestCase):
+
+    view_name = 'pollsapi:poll_list'
+
+    def get_token_login_url_params(self):
+        return None
+
+    def post_poll(self, user, token_key=None):
+        return self.get_response(
+            'post', data={'question': 'question'}, HTTP_AUTHORIZATION=f'Token {token_key or user.auth_token.key}'
+        )
+
+    def test_perform_cache(self):
+        user = self.users[0]
+        # warm up
+        self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user).status_code)
+
+        stats = get_token_cache().stats()
+        with self.assertNumQueries(2):
+            # insert of poll and its choices for response, no auth queries
+            resp = self.post_poll(user)
+        self.assertEqual(status.HTTP_201_CREATED, resp.status_code)
+        self.assertEqual(user.pk, models.Poll.objects.last().created_by_id)
+        self.assertEqual(stats['hits'] + 1, get_token_cache().stats()['hits'])
+
+        # user is deactivated
+        user.is_active = False
+        user.save()
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.post_poll(user).status_code)
+        user.is_active = True
+        user.save()
+        self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user).status_code)
+
+        # token is rotated
+        old_key = user.auth_token.key
+        user.auth_token.delete()
+        new_token = Token.objects.create(user=user)
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.post_poll(user, old_key).status_code)
+        self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user, new_token.key).status_code)
+
+    @override_settings(POLLSAPI_TOKEN_CACHE={'MAX_SIZE': 2, 'TTL': 300})
+    def test_perform_bounded(self):
+        for user in self.users:
+            self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user).status_code)
+
+        stats = get_token_cache().stats()
+        self.assertEqual(2, stats['size'])
+        self.assertEqual(1, stats['evictions'])
+
+    def test_token_cache_ttl(self):
+        token_cache = TokenCache(max_size=10, ttl=-1)
+        user = self.users[0]
+        token_cache.set(user.auth_token.key, user, user.auth_token, token_cache.get_version(user.auth_token.key))
+        self.assertIsNone(token_cache.get(user.auth_token.key))
+
+        token_cache = TokenCache(max_size=10, ttl=300)
+        token_cache.set(user.auth_token.key, user, user.auth_token, token_cache.get_version(user.auth_token.key))
+        cached_user, _ = token_cache.get(user.auth_token.key)
+        self.assertEqual(user, cached_user)
+        self.assertIsNot(user, cached_user)
+        self.assertDictEqual(
+            {'size': 1, 'max_size': 10, 'ttl': 300, 'hits': 1, 'misses': 0, 'evictions': 0, 'hit_rate': 1.0},
+            token_cache.stats()
+        )
+
+    def test_token_cache_shared_versions(self):
+        user = self.users[0]
+        key = user.auth_token.key
+        token_cache, other_process = TokenCache(max_size=10), TokenCache(max_size=10)
+        token_cache.set(key, user, user.auth_token, token_cache.get_version(key))
+        self.assertIsNotNone(token_cache.get(key))
+
+        # revoked by other process - the version in the shared cache is replaced
+        other_process.replace_versions(key)
+        self.assertIsNone(token_cache.get(key))
+
+        # token is deleted between the read of version and the database
+        version = token_cache.get_version(key)
+        other_process.replace_versions(key)
+        token_cache.set(key, user, user.auth_token, version)
+        self.assertIsNone(token_cache.get(key))
+
+    def test_invalidate_users(self):
+        user = self.users[0]
+        self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user).status_code)
+        authentication = CachedTokenAuthentication()
+        with self.assertNumQueries(0):
+            authentication.authenticate_credentials(user.auth_token.key)
+
+        # update() does not send post_save, the cached user is active still (until TTL)
+        models.User.objects.filter(pk=user.pk).update(is_active=False)
+        self.assertEqual(status.HTTP_201_CREATED, self.post_poll(user).status_code)
+        invalidate_users(user.pk)
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, self.post_poll(user).status_code)
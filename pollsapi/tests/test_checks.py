@@ -0,0 +1,47 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_checks.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 9:05 AM
+
+# tests for pollsapi.checks
+
+from unittest import mock
+
+from django.test import TestCase
+
+from pollsapi import checks, models, views
+
+
+class TestQueryPlanCheck(TestCase):
+
+    databases = {'default'}
+
+    def test_hot_querysets_use_indexes(self):
+        for name, queryset in checks.hot_querysets().items():
+            with self.subTest(name):
+                self.assertListEqual([], checks.plan_problems(queryset))
+
+        self.assertListEqual([], checks.check_query_plans(databases=['default']))
+
+    def test_full_scan_is_reported(self):
+        self.assertEqual(1, len(checks.plan_problems(models.Poll.objects.filter(question='question'))))
+        self.assertEqual(1, len(checks.plan_problems(models.Poll.objects.filter(created_by=1).order_by('question'))))
+
+        hot_querysets = {'polls by question': models.Poll.objects.filter(question='question')}
+        with mock.patch.object(checks, 'hot_querysets', return_value=hot_querysets):
+            errors = checks.check_query_plans(databases=['default'])
+        self.assertListEqual(['pollsapi.W001'], [error.id for error in errors])
+        self.assertIn('polls by question', errors[0].msg)
+
+    def test_querysets_of_views(self):
+        self.assertIn('etag of poll', checks.hot_querysets())
+        # ordering of pagination is taken from the view
+        with mock.patch.object(views.PollList.pagination_class, 'ordering', ('question', 'id')):
+            errors = checks.check_query_plans(databases=['default'])
+        self.assertListEqual(['pollsapi.W001'], [error.id for error in errors])
+        self.assertIn('polls page', errors[0].msg)
+
+    def test_no_databases(self):
+        self.assertListEqual([], checks.check_query_plans())
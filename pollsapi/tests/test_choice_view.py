@@ -9,17 +9,20 @@
 # path("poll/<int:pk>/choice/", views.ChoiceList.as_view(), name="choice_list"),
 # path("poll/<int:pk>/choice/<int:choice_pk>/", views.ChoiceDetail.as_view(), name="choice_detail"),
 
+import warnings
+
+from django.core.paginator import UnorderedObjectListWarning
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.test import APITestCase
 
-from pollsapi import models, serializers
+from pollsapi import models, serializers, views
 from pollsapi.tests.utils import ClientToolMixin
 
 
 class ChoiceMixin(ClientToolMixin):
 
-    serializer_class = serializers.ChoiceSerializer
+    serializer_class = serializers.ChoiceCountSerializer
 
     def create_polls(self) -> list[models.Poll]:
         results = []
@@ -122,7 +125,10 @@ class TestChoiceList(ChoiceMixin, APITestCase):
         data = self.create_fixtures()
         self.assertEqual(2, len(data))
 
-        response = self.get_response('get', data[0].poll)
+        with warnings.catch_warnings():
+            # pages are ordered
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            response = self.get_response('get', data[0].poll)
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertListEqual(self.serializer_class(data, many=True).data, response.data['results'])
 
@@ -252,3 +258,13 @@ class TestChoiceDetail(ChoiceMixin, APITestCase):
 
         qs = self.serializer_class.Meta.model.objects.filter(pk=choice.pk, poll=choice.poll_id)
         self.assertEqual(0, len(qs))
+
+    def test_perform_delete_counters(self):
+        choice = self.create_fixtures()[0]
+        models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[0].pk)
+        stale = models.Choice.objects.get(pk=choice.pk)
+        # vote is cast between get_object() and delete
+        models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[1].pk)
+
+        views.ChoiceDetail().perform_destroy(stale)
+        self.assertEqual(0, models.Poll.objects.get(pk=choice.poll_id).total_votes)
@@ -0,0 +1,119 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_compiled.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-23 (y-m-d) 3:30 PM
+
+# tests for pollsapi.compiled
+
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from rest_framework import serializers as drf_serializers
+
+from pollsapi import models, serializers
+from pollsapi.compiled import CompiledSerializer, compile_serializer
+
+
+class TestCompiledSerializer(TestCase):
+
+    def setUp(self) -> None:
+        users = [User.objects.create_user(username=f'test{i}', password='12345678') for i in range(4)]
+        for i in range(2):
+            poll = models.Poll.objects.create(question=f'question {i}', created_by=users[i])
+            choices = [models.Choice.objects.create(poll=poll, choice_text=f'choice {j}') for j in range(3)]
+            for user, choice in zip(users, choices * 2):
+                models.Vote.objects.cast(poll.pk, choice.pk, user.pk)
+        # poll without choices
+        models.Poll.objects.create(question='empty', created_by=users[0])
+
+    def assertSameRepresentation(self, expected, actual):
+        # the same json, order of keys too
+        self.assertEqual(json.dumps(expected), json.dumps(actual))
+
+    def test_representation(self):
+        cases = [
+            (serializers.PollSerializer, models.Poll.objects.prefetch_related('choices__votes')),
+            (serializers.PollCountSerializer, models.Poll.objects.prefetch_related('choices')),
+            (serializers.ChoiceSerializer, models.Choice.objects.prefetch_related('votes')),
+            (serializers.ChoiceCountSerializer, models.Choice.objects.all()),
+            (serializers.VoteSerializer, models.Vote.objects.all()),
+        ]
+        for serializer_class, queryset in cases:
+            with self.subTest(serializer_class.__name__):
+                expected = serializer_class(queryset, many=True).data
+                compiled = compile_serializer(serializer_class)
+                self.assertSameRepresentation(expected, compiled.represent(queryset.model.objects.all()))
+                self.assertSameRepresentation(expected, compiled.represent_instances(queryset.model.objects.all()))
+
+    def test_queries(self):
+        compiled = compile_serializer(serializers.PollSerializer)
+        # polls, choices, votes (with usernames)
+        with self.assertNumQueries(3):
+            compiled.represent(models.Poll.objects.all())
+        with self.assertNumQueries(2):
+            compiled.represent_instances(list(models.Poll.objects.filter(question='empty')))
+        with self.assertNumQueries(0):
+            self.assertListEqual([], compiled.represent_instances([]))
+
+    def test_unsupported_fields(self):
+        class MethodSerializer(serializers.VoteSerializer):
+            username = drf_serializers.SerializerMethodField()
+
+            def get_username(self, obj):
+                return obj.voted_by.username
+
+        class PropertySerializer(serializers.ChoiceCountSerializer):
+            text = drf_serializers.CharField(source='__str__', read_only=True)
+
+        for serializer_class in (MethodSerializer, PropertySerializer):
+            with self.subTest(serializer_class.__name__):
+                with self.assertRaises(ImproperlyConfigured):
+                    CompiledSerializer(serializer_class)
+
+    def test_overridden_methods(self):
+        class RepresentationSerializer(serializers.VoteSerializer):
+            def to_representation(self, instance):
+                return {'vote': super().to_representation(instance)}
+
+        class InternalValueSerializer(serializers.VoteSerializer):
+            def to_internal_value(self, data):
+                return super().to_internal_value(data)
+
+        class InheritedSerializer(RepresentationSerializer):
+            pass
+
+        class NestedChildSerializer(serializers.ChoiceSerializer):
+            votes = RepresentationSerializer(many=True, read_only=True)
+
+        class VoteListSerializer(drf_serializers.ListSerializer):
+            def to_representation(self, data):
+                return {'votes': super().to_representation(data)}
+
+        class ListedVoteSerializer(serializers.VoteSerializer):
+            class Meta(serializers.VoteSerializer.Meta):
+                list_serializer_class = VoteListSerializer
+
+        class NestedListSerializer(serializers.ChoiceSerializer):
+            votes = ListedVoteSerializer(many=True, read_only=True)
+
+        class NestedPollSerializer(serializers.PollSerializer):
+            choices = NestedChildSerializer(many=True, read_only=True)
+
+        cases = {
+            RepresentationSerializer: 'RepresentationSerializer.to_representation() is overridden',
+            InternalValueSerializer: 'InternalValueSerializer.to_internal_value() is overridden',
+            InheritedSerializer: 'InheritedSerializer.to_representation() is overridden',
+            NestedChildSerializer: 'NestedChildSerializer.votes (ListSerializer) can not be compiled, '
+                                   'RepresentationSerializer.to_representation() is overridden',
+            NestedListSerializer: 'NestedListSerializer.votes (VoteListSerializer) can not be compiled, '
+                                  'VoteListSerializer.to_representation() is overridden',
+            NestedPollSerializer: 'NestedChildSerializer.votes (ListSerializer) can not be compiled',
+        }
+        for serializer_class, message in cases.items():
+            with self.subTest(serializer_class.__name__):
+                with self.assertRaisesMessage(ImproperlyConfigured, message):
+                    CompiledSerializer(serializer_class)
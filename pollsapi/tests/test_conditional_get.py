@@ -0,0 +1,144 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_conditional_get.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-17 (y-m-d) 9:26 AM
+
+# tests for ETag / If-None-Match of
+# path('poll/', views.PollList.as_view(), name='poll_list'),
+# path('poll/<int:pk>/', views.PollDetail.as_view(), name='poll_detail'),
+# path("poll/<int:pk>/choice/", views.ChoiceList.as_view(), name="choice_list"),
+# path("poll/<int:pk>/choice/<int:choice_pk>/", views.ChoiceDetail.as_view(), name="choice_detail"),
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pollsapi import models
+from pollsapi.tests.test_choice_view import ChoiceMixin
+from pollsapi.tests.utils import POLL_CACHE
+
+
+@override_settings(POLLSAPI_CACHE=POLL_CACHE)
+class TestConditionalGet(ChoiceMixin, APITestCase):
+
+    view_name = 'pollsapi:choice_detail'
+    view_name_kwargs_map = {'pk': 'poll_id', 'choice_pk': 'id'}
+
+    views_kwargs_map = {
+        'pollsapi:poll_detail': {'pk': 'poll_id'},
+        'pollsapi:choice_list': {'pk': 'poll_id'},
+        'pollsapi:choice_detail': {'pk': 'poll_id', 'choice_pk': 'id'},
+    }
+
+    def get_token_login_url_params(self):
+        return self.dummy_choice
+
+    def test_perform_token_login(self):
+        self.dummy_choice = self.create_fixtures()[0]
+        super().test_perform_token_login()
+
+    def use_view(self, view_name):
+        self.view_name = view_name
+        self.view_name_kwargs_map = self.views_kwargs_map[view_name]
+
+    def get_etag(self, choice, status_code=status.HTTP_200_OK, **extra) -> str:
+        resp = self.get_response('get', choice, **extra)
+        self.assertEqual(status_code, resp.status_code)
+        return resp.headers['ETag']
+
+    def assertNotModified(self, choice, etag, **extra):
+        resp = self.get_response('get', choice, HTTP_IF_NONE_MATCH=etag, **extra)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, resp.status_code)
+        self.assertEqual(etag, resp.headers['ETag'])
+
+    def test_perform_views(self):
+        choice = self.create_fixtures()[0]
+
+        for view_name in self.views_kwargs_map:
+            with self.subTest(view_name=view_name):
+                self.use_view(view_name)
+                etag = self.get_etag(choice)
+                with self.assertNumQueries(1):
+                    self.assertNotModified(choice, etag)
+
+                # other representation
+                self.assertNotEqual(etag, self.get_etag(choice, data={'votes': 'list'}))
+
+                models.Choice.objects.create(poll=choice.poll, choice_text=f'new choice for {view_name}')
+                self.assertNotEqual(etag, self.get_etag(choice, HTTP_IF_NONE_MATCH=etag))
+
+    def test_perform_changes(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+
+        for change in ('choice_text', 'new_choice', 'question', 'delete_choice', 'vote'):
+            with self.subTest(change=change):
+                etag = self.get_etag(choice)
+                self.assertNotModified(choice, etag)
+
+                if change == 'choice_text':
+                    choice.choice_text = 'modified'
+                    choice.save()
+                elif change == 'new_choice':
+                    models.Choice.objects.create(poll=choice.poll, choice_text='new')
+                elif change == 'question':
+                    choice.poll.question = 'modified'
+                    choice.poll.save()
+                elif change == 'delete_choice':
+                    choices[1].delete()
+                else:
+                    models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[0].pk)
+
+                self.assertNotEqual(etag, self.get_etag(choice, HTTP_IF_NONE_MATCH=etag))
+
+    @override_settings(POLLSAPI_CACHE=None)
+    def test_perform_without_cache(self):
+        choice = self.create_fixtures()[0]
+        for view_name in self.views_kwargs_map:
+            with self.subTest(view_name=view_name):
+                self.use_view(view_name)
+                etag = self.get_etag(choice)
+                self.assertNotModified(choice, etag)
+
+                # text of choice is seen by the aggregate itself
+                choice.choice_text = f'modified for {view_name}'
+                choice.save()
+                self.assertNotEqual(etag, self.get_etag(choice, HTTP_IF_NONE_MATCH=etag))
+
+                models.Choice.objects.create(poll=choice.poll, choice_text=f'new choice for {view_name}')
+                self.assertNotEqual(etag, self.get_etag(choice, HTTP_IF_NONE_MATCH=etag))
+
+    def test_perform_list(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        self.view_name, self.view_name_kwargs_map = 'pollsapi:poll_list', {}
+        etag = self.get_etag(choice)
+        with self.assertNumQueries(1):
+            self.assertNotModified(choice, etag)
+        # other representation or page
+        self.assertNotEqual(etag, self.get_etag(choice, data={'votes': 'list'}))
+        self.assertNotEqual(etag, self.get_etag(choice, data={'pagination': 'cursor'}))
+
+        changes = {
+            'choice_text': lambda: models.Choice.objects.get(pk=choice.pk).save(),
+            'new_choice': lambda: models.Choice.objects.create(poll=choice.poll, choice_text='new'),
+            'question': lambda: models.Poll.objects.get(pk=choice.poll_id).save(),
+            'vote': lambda: models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[0].pk),
+            'delete_vote': lambda: models.Vote.objects.filter(voted_by=self.users[0]).delete(),
+            'delete_choice': lambda: choices[1].delete(),
+            'new_poll': lambda: models.Poll.objects.create(question='new', created_by=self.users[0]),
+            'delete_poll': lambda: models.Poll.objects.filter(question='new').delete(),
+        }
+        for change, perform in changes.items():
+            with self.subTest(change=change):
+                etag = self.get_etag(choice)
+                self.assertNotModified(choice, etag)
+                perform()
+                self.assertNotEqual(etag, self.get_etag(choice, HTTP_IF_NONE_MATCH=etag))
+
+    def test_perform_not_exist(self):
+        resp = self.get_response('get', {'poll_id': 0, 'id': 0})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+        self.assertNotIn('ETag', resp.headers)
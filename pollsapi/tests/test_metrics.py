@@ -0,0 +1,69 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_metrics.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 6:20 PM
+
+# tests for tutorial.metrics
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from pollsapi import models
+from tutorial.metrics import METRIC_NAME, PHASES, ViewMetrics, get_view_metrics
+
+
+class TestViewMetrics(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='test0', password='12345678')
+        self.admin = User.objects.create_user(username='admin', password='12345678', is_staff=True)
+        models.Poll.objects.create(question='question', created_by=self.user)
+        get_view_metrics().clear()
+        self.addCleanup(get_view_metrics().clear)
+
+    def test_histogram(self):
+        metrics = ViewMetrics(buckets=(0.1, 0.01))
+        for value in (0.005, 0.01, 0.05, 1.0):
+            metrics.observe('view', {'queryset': value})
+
+        lines = metrics.export().splitlines()
+        self.assertIn(f'# TYPE {METRIC_NAME} histogram', lines)
+        labels = 'view="view",phase="queryset"'
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="0.01"}} 2', lines)
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="0.1"}} 3', lines)
+        self.assertIn(f'{METRIC_NAME}_bucket{{{labels},le="+Inf"}} 4', lines)
+        self.assertIn(f'{METRIC_NAME}_sum{{{labels}}} 1.065', lines)
+        self.assertIn(f'{METRIC_NAME}_count{{{labels}}} 4', lines)
+
+    def test_export(self):
+        url = reverse('metrics')
+        self.client.force_authenticate(self.user)
+        self.assertEqual(200, self.client.get(reverse('pollsapi:poll_list')).status_code)
+        self.assertEqual(403, self.client.get(url).status_code)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode().splitlines()
+        for phase in PHASES:
+            with self.subTest(phase):
+                self.assertIn(f'{METRIC_NAME}_count{{view="pollsapi:poll_list",phase="{phase}"}} 1', lines)
+
+    def test_object_permissions(self):
+        poll = models.Poll.objects.get()
+        self.client.force_authenticate(User.objects.create_user(username='test1', password='12345678'))
+        self.assertEqual(403, self.client.delete(reverse('pollsapi:poll_detail', kwargs={'pk': poll.pk})).status_code)
+
+        export = get_view_metrics().export()
+        self.assertIn(f'{METRIC_NAME}_count{{view="pollsapi:poll_detail",phase="permissions"}} 1', export)
+
+    @override_settings(VIEW_METRICS=None)
+    def test_disabled(self):
+        self.assertIsNone(get_view_metrics())
+        self.assertEqual(200, self.client.get(reverse('pollsapi:poll_list')).status_code)
@@ -0,0 +1,31 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_migrations.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-24 (y-m-d) 11:40 AM
+
+# tests for data migrations of pollsapi
+
+from tutorial.snippets.tests.test_migrations import MigrationTestCase
+
+
+class TestVoteCountersMigration(MigrationTestCase):
+
+    app_label = 'pollsapi'
+
+    def test_count_votes(self):
+        apps = self.migrate('0001_initial')
+        Poll, Choice, Vote = (apps.get_model('pollsapi', name) for name in ('Poll', 'Choice', 'Vote'))
+        users = [apps.get_model('auth', 'User').objects.create(username=f'test{i}') for i in range(3)]
+        voted = Poll.objects.create(question='voted', created_by=users[0])
+        empty = Poll.objects.create(question='empty', created_by=users[0])
+        choices = [Choice.objects.create(poll=voted, choice_text=f'choice {i}') for i in range(2)]
+        Choice.objects.create(poll=empty, choice_text='no votes')
+        for user, choice in zip(users, (choices[0], choices[0], choices[1])):
+            Vote.objects.create(poll=voted, choice=choice, voted_by=user)
+
+        apps = self.migrate('0002_vote_counters')
+        Poll, Choice = apps.get_model('pollsapi', 'Poll'), apps.get_model('pollsapi', 'Choice')
+        self.assertDictEqual({voted.pk: 3, empty.pk: 0}, dict(Poll.objects.values_list('pk', 'total_votes')))
+        self.assertListEqual([2, 1, 0], list(Choice.objects.order_by('pk').values_list('vote_count', flat=True)))
@@ -0,0 +1,127 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_poll_cache.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-16 (y-m-d) 12:47 PM
+
+# tests for read-through cache of
+# path('poll/<int:pk>/', views.PollDetail.as_view(), name='poll_detail'),
+# path("poll/<int:pk>/choice/", views.ChoiceList.as_view(), name="choice_list"),
+# path("cache/stats/", views.CacheStats.as_view(), name="cache_stats"),
+
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pollsapi import models, serializers
+from pollsapi.cache import check_poll_cache, get_poll_cache
+from pollsapi.tests.test_choice_view import ChoiceMixin
+from pollsapi.tests.utils import POLL_CACHE
+
+
+@override_settings(POLLSAPI_CACHE=POLL_CACHE)
+class TestPollCache(ChoiceMixin, APITestCase):
+
+    view_name = 'pollsapi:poll_detail'
+    view_name_kwargs_map = {'pk': 'poll_id'}
+    serializer_class = serializers.PollCountSerializer
+
+    def get_token_login_url_params(self):
+        return self.dummy_choice
+
+    def test_perform_token_login(self):
+        self.dummy_choice = self.create_fixtures()[0]
+        super().test_perform_token_login()
+
+    def assertCached(self, expected_cache, url_params=None, **extra):
+        resp = self.get_response('get', url_params, **extra)
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertEqual(expected_cache, resp.headers['X-Cache'])
+        return resp
+
+    def test_perform_detail(self):
+        choice = self.create_fixtures()[0]
+        poll = choice.poll
+        # counters are process-wide
+        before = get_poll_cache().stats().get('pollsapi:poll_detail', {'hits': 0, 'misses': 0})
+
+        resp = self.assertCached('MISS', choice)
+        resp = self.assertCached('HIT', choice)
+        self.assertDictEqual(self.serializer_class(poll).data, resp.data)
+        # other representation is cached separately
+        self.assertCached('MISS', choice, data={'votes': 'list'})
+        self.assertCached('HIT', choice, data={'votes': 'list'})
+
+        # vote (bypasses post_save) invalidates
+        models.Vote.objects.cast(poll.pk, choice.pk, self.users[0].pk)
+        resp = self.assertCached('MISS', choice)
+        self.assertEqual(1, resp.data['total_votes'])
+
+        # choice is changed
+        choice.choice_text = 'modified'
+        choice.save()
+        resp = self.assertCached('MISS', choice)
+        self.assertEqual('modified', resp.data['choices'][0]['choice_text'])
+
+        # poll is changed
+        poll.question = 'modified'
+        poll.save()
+        resp = self.assertCached('MISS', choice)
+        self.assertEqual('modified', resp.data['question'])
+
+        # other poll is not affected
+        other = models.Poll.objects.exclude(pk=poll.pk).first()
+        self.assertCached('MISS', {'poll_id': other.pk})
+        other.save()
+        self.assertCached('HIT', choice)
+
+        after = get_poll_cache().stats()['pollsapi:poll_detail']
+        self.assertDictEqual({'hits': 3, 'misses': 6}, {name: after[name] - before[name] for name in after})
+
+    @override_settings(POLLSAPI_CACHE=None)
+    def test_perform_disabled(self):
+        choice = self.create_fixtures()[0]
+        resp = self.get_response('get', choice)
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertNotIn('X-Cache', resp.headers)
+
+    def test_perform_choice_list(self):
+        choice = self.create_fixtures()[0]
+        self.view_name = 'pollsapi:choice_list'
+
+        self.assertCached('MISS', choice)
+        self.assertCached('HIT', choice)
+
+        user = choice.poll.created_by
+        resp = self.get_response(
+            'post', choice, data={'choice_text': 'new one'}, HTTP_AUTHORIZATION=f'Token {user.auth_token.key}'
+        )
+        self.assertEqual(status.HTTP_201_CREATED, resp.status_code)
+        resp = self.assertCached('MISS', choice)
+        self.assertEqual(3, resp.data['count'])
+
+    def test_perform_stats(self):
+        self.view_name = 'pollsapi:cache_stats'
+        user = self.users[0]
+
+        resp = self.get_response('get', HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+        self.assertEqual(status.HTTP_403_FORBIDDEN, resp.status_code)
+
+        user.is_staff = True
+        user.save()
+        resp = self.get_response('get', HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertTrue(resp.data['enabled'])
+
+    def test_check(self):
+        # locmem of POLL_CACHE is fine for the test process only
+        self.assertListEqual(['pollsapi.E002'], [error.id for error in check_poll_cache()])
+        with override_settings(POLLSAPI_CACHE={'ALIAS': 'unknown'}):
+            self.assertListEqual(['pollsapi.E001'], [error.id for error in check_poll_cache()])
+        with override_settings(POLLSAPI_CACHE=None):
+            self.assertListEqual([], check_poll_cache())
+
+        shared = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/nonexistent'}
+        with override_settings(CACHES={'default': shared}):
+            self.assertListEqual([], check_poll_cache())
@@ -0,0 +1,197 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_poll_results_view.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-15 (y-m-d) 3:20 PM
+
+# tests for
+# path('poll/<int:pk>/results/', views.PollResults.as_view(), name='poll_results'),
+
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db.models import F
+from django.utils.http import parse_http_date
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from pollsapi import models, views
+from pollsapi.tests.test_choice_view import ChoiceMixin
+
+
+class TestPollResults(ChoiceMixin, APITestCase):
+
+    view_name = 'pollsapi:poll_results'
+    view_name_kwargs_map = {'pk': 'poll_id'}
+
+    def get_token_login_url_params(self):
+        return self.dummy_choice
+
+    def test_perform_token_login(self):
+        self.dummy_choice = self.create_fixtures()[0]
+        super().test_perform_token_login()
+
+    def test_perform_results(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        # 2 votes for choices[0] and 1 for choices[1]
+        for user, voted_choice in zip(self.users, (choices[0], choices[0], choices[1])):
+            self.assertIsNotNone(models.Vote.objects.cast(voted_choice.poll_id, voted_choice.pk, user.pk))
+
+        resp = self.get_response('get', choice)
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertDictEqual({
+            'id': choice.poll_id,
+            'question': choice.poll.question,
+            'total_votes': 3,
+            'choices': [
+                {'id': choices[0].pk, 'choice_text': choices[0].choice_text, 'vote_count': 2, 'percent': 66.67},
+                {'id': choices[1].pk, 'choice_text': choices[1].choice_text, 'vote_count': 1, 'percent': 33.33},
+            ]
+        }, resp.data)
+        # changed within this second - ETag only
+        with self.frozen_clock(models.Poll.objects.get(pk=choice.poll_id).last_vote_at.timestamp()):
+            self.assertNotIn('Last-Modified', self.get_response('get', choice).headers)
+        self.age(choice.poll_id)
+        resp = self.get_response('get', choice)
+        self.assertIn('Last-Modified', resp.headers)
+
+        # not modified
+        etag = resp.headers['ETag']
+        resp_304 = self.get_response('get', choice, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, resp_304.status_code)
+        self.assertEqual(b'', resp_304.content)
+        resp_304 = self.get_response('get', choice, HTTP_IF_MODIFIED_SINCE=resp.headers['Last-Modified'])
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, resp_304.status_code)
+
+        # new choice changes the results
+        models.Choice.objects.create(poll=choice.poll, choice_text='new choice')
+        resp = self.get_response('get', choice, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertEqual(3, len(resp.data['choices']))
+        self.assertEqual(0.0, resp.data['choices'][2]['percent'])
+
+        # poll without choices and votes
+        poll = models.Poll.objects.filter(choices__isnull=True).get()
+        resp = self.get_response('get', {'poll_id': poll.pk})
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertEqual([], resp.data['choices'])
+
+        # poll that does not exist
+        resp = self.get_response('get', {'poll_id': 0})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, resp.status_code)
+
+    def frozen_clock(self, timestamp: float):
+        # the current time of the view (the second of Last-Modified is not over while it is frozen)
+        return mock.patch.object(views, 'time', mock.Mock(**{'time.return_value': timestamp}))
+
+    def age(self, poll_id, seconds=10):
+        # timestamps of the poll and its choices are moved to the past (Last-Modified is sent for them only)
+        delta = timedelta(seconds=seconds)
+        models.Poll.objects.filter(pk=poll_id).update(**{
+            name: F(name) - delta for name in ('pub_date', 'last_vote_at', 'last_delete_at')
+        })
+        models.Choice.objects.filter(poll=poll_id).update(updated_at=F('updated_at') - delta)
+
+    def test_perform_results_modified_since(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        for user, voted_choice in zip(self.users, (choices[0], choices[0], choices[1])):
+            models.Vote.objects.cast(voted_choice.poll_id, voted_choice.pk, user.pk)
+
+        changes = {
+            'delete_vote': lambda: models.Vote.objects.filter(voted_by=self.users[0]).delete(),
+            'delete_choice': lambda: choices[1].delete(),
+            'new_choice': lambda: models.Choice.objects.create(poll=choice.poll, choice_text='new'),
+            'choice_text': lambda: models.Choice.objects.filter(pk=choice.pk).get().save(),
+            'vote': lambda: models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[0].pk),
+        }
+        for change, perform in changes.items():
+            with self.subTest(change=change):
+                self.age(choice.poll_id)
+                last_modified = self.get_response('get', choice).headers['Last-Modified']
+                resp = self.get_response('get', choice, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(status.HTTP_304_NOT_MODIFIED, resp.status_code)
+
+                # the same second - If-Modified-Since is not used
+                with self.frozen_clock(time.time()):
+                    perform()
+                    resp = self.get_response('get', choice, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(status.HTTP_200_OK, resp.status_code)
+                self.assertNotIn('Last-Modified', resp.headers)
+
+                self.age(choice.poll_id, seconds=5)
+                resp = self.get_response('get', choice, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(status.HTTP_200_OK, resp.status_code)
+                self.assertLess(parse_http_date(last_modified), parse_http_date(resp.headers['Last-Modified']))
+
+    def test_perform_results_vote_deleted(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        for user, voted_choice in zip(self.users, (choices[0], choices[0], choices[1])):
+            models.Vote.objects.cast(voted_choice.poll_id, voted_choice.pk, user.pk)
+        etag = self.get_response('get', choice).headers['ETag']
+
+        # single vote (admin), votes of the user (cascade) and by queryset
+        models.Vote.objects.get(choice=choices[0], voted_by=self.users[0]).delete()
+        resp = self.get_response('get', choice, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, resp.status_code)
+        self.assertEqual(2, resp.data['total_votes'])
+        self.assertEqual([1, 1], [item['vote_count'] for item in resp.data['choices'][:2]])
+        self.assertEqual([50.0, 50.0], [item['percent'] for item in resp.data['choices'][:2]])
+
+        self.users[1].delete()
+        models.Vote.objects.filter(choice=choices[1]).delete()
+        resp = self.get_response('get', choice)
+        self.assertEqual(0, resp.data['total_votes'])
+        self.assertEqual([0, 0], [item['vote_count'] for item in resp.data['choices'][:2]])
+
+        # choice with votes is deleted - its votes are not subtracted twice
+        models.Vote.objects.cast(choice.poll_id, choices[1].pk, self.users[2].pk)
+        choices[1].delete()
+        self.assertEqual(0, models.Poll.objects.get(pk=choice.poll_id).total_votes)
+
+    def assertCounters(self, poll_id):
+        poll = models.Poll.objects.get(pk=poll_id)
+        self.assertEqual(poll.votes.count(), poll.total_votes)
+        for choice in poll.choices.all():
+            self.assertEqual(choice.votes.count(), choice.vote_count)
+
+    def test_perform_results_saved_votes(self):
+        # votes written by save() (admin, Vote.objects.create()) are counted as well as the cast ones
+        choices = self.create_fixtures()
+        poll_id = choices[0].poll_id
+        vote = models.Vote.objects.create(poll_id=poll_id, choice=choices[0], voted_by=self.users[0])
+        models.Vote.objects.cast(poll_id, choices[0].pk, self.users[1].pk)
+        self.assertCounters(poll_id)
+        self.assertEqual(2, models.Poll.objects.get(pk=poll_id).total_votes)
+
+        admin = models.User.objects.create_superuser(username='admin', password=self.password)
+        self.client.force_login(admin)
+        url = reverse('admin:pollsapi_vote_add')
+        resp = self.client.post(url, {'poll': poll_id, 'choice': choices[1].pk, 'voted_by': self.users[2].pk})
+        self.assertEqual(status.HTTP_302_FOUND, resp.status_code)
+        self.assertCounters(poll_id)
+
+        # changed choice of vote
+        url = reverse('admin:pollsapi_vote_change', args=[vote.pk])
+        resp = self.client.post(url, {'poll': poll_id, 'choice': choices[1].pk, 'voted_by': self.users[0].pk})
+        self.assertEqual(status.HTTP_302_FOUND, resp.status_code)
+        self.assertCounters(poll_id)
+        self.assertEqual([1, 2], list(models.Choice.objects.filter(poll=poll_id).order_by('pk').values_list(
+            'vote_count', flat=True
+        ))[:2])
+        vote.refresh_from_db()
+        vote.save()
+        self.assertCounters(poll_id)
+
+        # delete does not go below zero
+        resp = self.client.post(reverse('admin:pollsapi_vote_delete', args=[vote.pk]), {'post': 'yes'})
+        self.assertEqual(status.HTTP_302_FOUND, resp.status_code)
+        models.Vote.objects.filter(poll=poll_id).delete()
+        self.assertCounters(poll_id)
+        self.assertEqual(0, models.Poll.objects.get(pk=poll_id).total_votes)
+
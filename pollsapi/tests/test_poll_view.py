@@ -5,7 +5,13 @@
 # Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
 # Created by ox23 at 2022-10-02 (y-m-d) 10:57 AM
 
+import warnings
+from unittest import mock
+
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connection
 from rest_framework import status
+from rest_framework.reverse import reverse
 from rest_framework.response import Response
 from rest_framework.test import APITestCase
 
@@ -14,9 +20,9 @@ from pollsapi.tests.utils import ClientToolMixin
 
 
 class PollMixin(ClientToolMixin):
-    serializer_class = serializers.PollSerializer
+    serializer_class = serializers.PollCountSerializer
 
-    def create_fixtures(self) -> list[serializers.PollSerializer]:
+    def create_fixtures(self) -> list[serializers.PollCountSerializer]:
         """
         It will create 3 polls 0 - for self.users[0], 1 - for self.users[1] and 2 - for self.users[2]
         It does not test authentication
@@ -76,6 +82,90 @@ class TestPollList(PollMixin, APITestCase):
         self.assertEqual(status.HTTP_200_OK, response.status_code)
         self.assertListEqual(data, response.data['results'])
 
+    def test_perform_list_ordered(self):
+        self.create_fixtures()
+        # the first poll becomes the last one by pub_date
+        models.Poll.objects.order_by('pk').first().save()
+
+        data = self.serializer_class(models.Poll.objects.order_by('pub_date', 'id'), many=True).data
+        for pagination in ('page', 'cursor'):
+            with self.subTest(pagination=pagination), warnings.catch_warnings():
+                warnings.simplefilter('error', UnorderedObjectListWarning)
+                response = self.get_response('get', data={'pagination': pagination})
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+                self.assertListEqual(data, response.data['results'])
+
+    def test_perform_list_cursor(self):
+        polls = [models.Poll(question=f'question {i}', created_by=self.users[i % 3]) for i in range(25)]
+        for poll in polls:
+            poll.save()
+
+        data = self.serializer_class(models.Poll.objects.order_by('pub_date', 'id'), many=True).data
+        response = self.get_response('get', data={'pagination': 'cursor'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn('count', response.data)
+
+        # statistics is collected by ANALYZE
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        response = self.get_response('get', data={'pagination': 'cursor'})
+        self.assertEqual(25, response.data['estimated_count'])
+
+        results = list(response.data['results'])
+        while response.data['next']:
+            with self.assertNumQueries(4):
+                # etag, estimated count, page of polls, choices
+                response = self.client.get(response.data['next'])
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            results.extend(response.data['results'])
+        self.assertListEqual(data, results)
+
+        # page number pagination is default
+        response = self.get_response('get', data={'page': 3})
+        self.assertEqual(25, response.data['count'])
+        self.assertEqual(5, len(response.data['results']))
+
+    def test_perform_list_projection(self):
+        self.create_fixtures()
+        for poll in models.Poll.objects.all():
+            choice = models.Choice.objects.create(poll=poll, choice_text='choice')
+            models.Vote.objects.create(poll=poll, choice=choice, voted_by=self.users[0])
+
+        data = serializers.PollSerializer(models.Poll.objects.all(), many=True).data
+        # polls are not instantiated, rows of values() are represented
+        with mock.patch.object(models.Poll, 'from_db', side_effect=AssertionError('Poll instance was created')):
+            with self.assertNumQueries(5):
+                # etag, count, page of polls, choices, votes
+                response = self.client.get(reverse(self.view_name), data={'votes': 'list'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertListEqual(data, response.data['results'])
+
+    def test_perform_list_count_mode(self):
+        self.create_fixtures()
+        poll = models.Poll.objects.filter(created_by=self.users[1]).get()
+        choice = models.Choice.objects.create(poll=poll, choice_text='choice')
+        models.Vote.objects.create(poll=poll, choice=choice, voted_by=self.users[0])
+
+        response = self.get_response('get', data={'votes': 'list'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        data = serializers.PollSerializer(models.Poll.objects.all(), many=True).data
+        self.assertListEqual(data, response.data['results'])
+        poll_data = [data for data in response.data['results'] if data['id'] == poll.pk][0]
+        self.assertEqual(1, len(poll_data['choices'][0]['votes']))
+
+        # count is default mode
+        response = self.get_response('get')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        data = serializers.PollCountSerializer(models.Poll.objects.all(), many=True).data
+        self.assertListEqual(data, response.data['results'])
+        poll_data = [data for data in response.data['results'] if data['id'] == poll.pk][0]
+        self.assertNotIn('votes', poll_data['choices'][0])
+        self.assertIn('vote_count', poll_data['choices'][0])
+        self.assertIn('total_votes', poll_data)
+
+        response = self.get_response('get', data={'votes': 'fake'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
 
 class TestPollDetail(PollMixin, APITestCase):
     """
@@ -0,0 +1,71 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_query_budget.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 3:40 PM
+
+# tests for tutorial.middleware.QueryBudgetMiddleware
+
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from pollsapi import models, views
+from tutorial.middleware import QueryBudgetExceeded, query_shape
+
+
+class TestQueryBudget(TestCase):
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        user = models.User.objects.create_user(username='test0', password='12345678')
+        for i in range(6):
+            models.Poll.objects.create(question=f'question {i}', created_by=user)
+
+    def test_query_shape(self):
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s)'),
+            query_shape('SELECT * FROM t WHERE id IN (%s)')
+        )
+        self.assertEqual(
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s)'),
+            query_shape('SELECT * FROM t WHERE id IN (%s, %s, %s, %s)')
+        )
+        self.assertEqual(
+            query_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)'),
+            query_shape('INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s), (%s, %s)')
+        )
+
+    def test_headers(self):
+        response = self.client.get(reverse('pollsapi:poll_list'))
+        self.assertEqual(200, response.status_code)
+        self.assertLessEqual(int(response.headers['X-DB-Queries']), views.PollList.query_budget['get'])
+        self.assertEqual(str(views.PollList.query_budget['get']), response.headers['X-DB-Query-Budget'])
+        self.assertEqual('0', response.headers['X-DB-Repeated'])
+        self.assertIn('X-DB-Time-Ms', response.headers)
+
+    def test_exceeded(self):
+        url = reverse('pollsapi:poll_list')
+        with mock.patch.object(views.PollList, 'query_budget', {'get': 1}):
+            with override_settings(QUERY_BUDGET={'RAISE': False}), self.assertLogs('tutorial.queries', 'WARNING'):
+                response = self.client.get(url)
+            self.assertEqual('1', response.headers['X-DB-Query-Budget'])
+
+            with override_settings(QUERY_BUDGET={'RAISE': True}), self.assertLogs('tutorial.queries', 'WARNING'):
+                with self.assertRaises(QueryBudgetExceeded):
+                    self.client.get(url)
+
+    def test_repeated(self):
+        url = reverse('pollsapi:poll_list')
+        # N+1 - choices of each poll are selected separately
+        with mock.patch.object(views.PollList, 'compiled_read', False), \
+                mock.patch.object(views.PollList, 'list_prefetch', ()), \
+                mock.patch.object(views.PollList, 'count_prefetch', ()), \
+                override_settings(QUERY_BUDGET={'REPEATED': 3}), \
+                self.assertLogs('tutorial.queries', 'WARNING') as logs:
+            response = self.client.get(url)
+        self.assertLessEqual(1, int(response.headers['X-DB-Repeated']))
+        self.assertIn('"repeated": [{', logs.output[0])
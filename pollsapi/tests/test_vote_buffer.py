@@ -0,0 +1,126 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_vote_buffer.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-14 (y-m-d) 11:40 AM
+
+# tests for buffered mode of
+# path("poll/<int:pk>/choice/<int:choice_pk>/vote/", views.Vote.as_view(), name="vote"),
+
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pollsapi import models
+from pollsapi.buffer import get_vote_buffer
+from pollsapi.tests.test_vote_view import VoteMixin
+
+
+@override_settings(POLLSAPI_VOTE_BUFFER={'BACKGROUND': False, 'MAX_SIZE': 2, 'PUT_TIMEOUT_MS': 0})
+class TestVoteBuffer(VoteMixin, APITestCase):
+
+    view_name = 'pollsapi:vote'
+    view_name_kwargs_map = {'pk': 'poll_id', 'choice_pk': 'id'}
+
+    def get_token_login_url_params(self):
+        return self.dummy_choice
+
+    def test_perform_token_login(self):
+        self.dummy_choice = self.create_fixtures()[0]
+        resp = self.get_response('post', self.dummy_choice, HTTP_AUTHORIZATION='Token fake_token')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, resp.status_code)
+
+    def test_perform_create(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        buffer = get_vote_buffer()
+
+        token_value = f'Token {self.users[0].auth_token.key}'
+        resp = self.get_response('post', choice, HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_202_ACCEPTED, resp.status_code)
+        self.assertDictEqual(
+            {'id': None, 'voted_by': self.users[0].username, 'choice': choice.pk, 'poll': choice.poll_id},
+            dict(resp.data)
+        )
+        self.assertEqual(0, models.Vote.objects.count())
+
+        # duplicate is rejected by pending set
+        resp = self.get_response('post', choices[1], HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+        self.assertEqual(b'{"non_field_errors":["You are voted on this poll"]}', resp.content)
+
+        # choice is not appropriate - validated synchronously
+        poll = models.Poll.objects.filter(choices__isnull=True).get()
+        resp = self.get_response('post', {'poll_id': poll.pk, 'id': choice.pk}, HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+
+        resp = self.get_response('post', choice, HTTP_AUTHORIZATION=f'Token {self.users[1].auth_token.key}')
+        self.assertEqual(status.HTTP_202_ACCEPTED, resp.status_code)
+
+        # queue is full - backpressure
+        resp = self.get_response('post', choice, HTTP_AUTHORIZATION=f'Token {self.users[2].auth_token.key}')
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, resp.status_code)
+
+        self.assertEqual(2, buffer.flush())
+        self.assertEqual(2, models.Vote.objects.count())
+        choice.refresh_from_db()
+        self.assertEqual(2, choice.vote_count)
+
+        # duplicate is rejected by database now
+        resp = self.get_response('post', choices[1], HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+
+        resp = self.get_response('post', choice, HTTP_AUTHORIZATION=f'Token {self.users[2].auth_token.key}')
+        self.assertEqual(status.HTTP_202_ACCEPTED, resp.status_code)
+        buffer.stop()
+        self.assertEqual(3, models.Vote.objects.count())
+
+    def test_drain_command(self):
+        choice = self.create_fixtures()[0]
+        models.Vote.objects.create(poll=choice.poll, choice=choice, voted_by=self.users[0])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = Path(tmp) / 'votes.spool'
+            spool.write_text(''.join(
+                json.dumps([choice.poll_id, choice.pk, user.pk]) + '\n' for user in self.users
+            ))
+            out = StringIO()
+            call_command('drain_vote_buffer', spool=str(spool), stdout=out)
+            self.assertFalse(spool.exists())
+
+        self.assertIn('2 of 3 votes were written', out.getvalue())
+        self.assertEqual(3, models.Vote.objects.count())
+        choice.refresh_from_db()
+        # vote that was created directly is counted by post_save, the drained ones by bulk_cast()
+        self.assertEqual(3, choice.vote_count)
+
+    def test_drain_leftover(self):
+        choice = self.create_fixtures()[0]
+        lines = [json.dumps([choice.poll_id, choice.pk, user.pk]) + '\n' for user in self.users]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            spool = Path(tmp) / 'votes.spool'
+            draining = spool.with_name('votes.spool.draining')
+            for spooled in (True, False):
+                with self.subTest(spooled=spooled):
+                    models.Vote.objects.all().delete()
+                    # earlier drain failed after the first vote, the buffer spooled the last one after it
+                    models.Vote.objects.cast(choice.poll_id, choice.pk, self.users[0].pk)
+                    draining.write_text(''.join(lines[:2] if spooled else lines))
+                    if spooled:
+                        spool.write_text(lines[2])
+
+                    out = StringIO()
+                    call_command('drain_vote_buffer', spool=str(spool), stdout=out)
+                    self.assertListEqual([], list(Path(tmp).iterdir()))
+                    self.assertIn('2 of 3 votes were written', out.getvalue())
+                    self.assertSetEqual(
+                        {user.pk for user in self.users}, set(models.Vote.objects.values_list('voted_by', flat=True))
+                    )
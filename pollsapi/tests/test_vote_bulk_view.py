@@ -0,0 +1,129 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_vote_bulk_view.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-13 (y-m-d) 10:42 AM
+
+# tests for
+# path("vote/bulk/", views.VoteBulk.as_view(), name="vote_bulk"),
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pollsapi import models, serializers
+from pollsapi.tests.test_choice_view import ChoiceMixin
+
+
+class TestVoteBulk(ChoiceMixin, APITestCase):
+
+    view_name = 'pollsapi:vote_bulk'
+    serializer_class = serializers.BulkVoteSerializer
+
+    def get_token_login_url_params(self):
+        return None
+
+    def test_perform_token_login(self):
+        resp = self.get_response('post', data=[], format='json', HTTP_AUTHORIZATION='Token fake_token')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, resp.status_code)
+
+        user = self.users[0]
+        resp = self.get_response('post', data=[], format='json', HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+        self.assertEqual(status.HTTP_201_CREATED, resp.status_code)
+        self.assertEqual(resp.renderer_context['request'].user, user)
+
+    def test_perform_create(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        empty_poll = models.Poll.objects.filter(choices__isnull=True).get()
+        user = self.users[0]
+        token_value = f'Token {user.auth_token.key}'
+
+        # not a list
+        resp = self.get_response('post', data={'poll': choice.poll_id}, format='json', HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+
+        data = [
+            {'poll': choice.poll_id, 'choice': choice.pk},
+            {'poll': choice.poll_id, 'choice': choices[1].pk},  # second vote on same poll
+            {'poll': empty_poll.pk, 'choice': choice.pk},  # choice is not appropriate
+            {'poll': choice.poll_id, 'choice': 0},  # choice does not exist
+            {'poll': choice.poll_id},  # malformed
+            {'poll': choice.poll_id, 'choice': choice.pk, 'voted_by': self.users[1].pk},  # user is not staff
+        ]
+        # queries of the view only, whatever authentication costs
+        self.client.force_authenticate(user)
+        try:
+            with self.assertNumQueries(9):
+                # choices, existing votes, savepoint,
+                # savepoint of batch, insert, release of batch, choice and poll counters, release
+                resp = self.get_response('post', data=data, format='json')
+        finally:
+            self.client.force_authenticate(None)
+        self.assertEqual(status.HTTP_207_MULTI_STATUS, resp.status_code)
+        self.assertEqual(len(data), len(resp.data))
+
+        vote = models.Vote.objects.get()
+        self.assertDictEqual(
+            {'status': 201, 'vote': serializers.VoteSerializer(vote).data},
+            resp.data[0]
+        )
+        self.assertListEqual([400] * 5, [result['status'] for result in resp.data[1:]])
+        self.assertEqual(['You are voted on this poll'], resp.data[1]['errors']['non_field_errors'])
+        self.assertEqual(
+            ['The choice is not appropriate for a poll\'s question'], resp.data[2]['errors']['non_field_errors']
+        )
+        self.assertIn('choice', resp.data[3]['errors'])
+        self.assertIn('choice', resp.data[4]['errors'])
+        self.assertIn('voted_by', resp.data[5]['errors'])
+
+        choice.refresh_from_db()
+        self.assertEqual(1, choice.vote_count)
+        choice.poll.refresh_from_db()
+        self.assertEqual(1, choice.poll.total_votes)
+
+        # staff imports votes on behalf of other users
+        user.is_staff = True
+        user.save()
+        data = [
+            {'poll': choice.poll_id, 'choice': choice.pk, 'voted_by': self.users[1].pk},
+            {'poll': choice.poll_id, 'choice': choices[1].pk, 'voted_by': self.users[2].pk},
+            {'poll': choice.poll_id, 'choice': choices[1].pk, 'voted_by': user.pk},  # voted already
+            {'poll': choice.poll_id, 'choice': choices[1].pk, 'voted_by': 0},  # user does not exist
+        ]
+        resp = self.get_response('post', data=data, format='json', HTTP_AUTHORIZATION=token_value)
+        self.assertEqual(status.HTTP_207_MULTI_STATUS, resp.status_code)
+        self.assertListEqual([201, 201, 400, 400], [result['status'] for result in resp.data])
+        self.assertEqual(self.users[2].username, resp.data[1]['vote']['voted_by'])
+
+        for choice, count in zip(choices, (2, 1)):
+            choice.refresh_from_db()
+            self.assertEqual(count, choice.vote_count)
+        choice.poll.refresh_from_db()
+        self.assertEqual(3, choice.poll.total_votes)
+        self.assertEqual(3, models.Vote.objects.count())
+
+    def test_bulk_cast_existing(self):
+        choices = self.create_fixtures()
+        poll_id = choices[0].poll_id
+        models.Vote.objects.cast(poll_id, choices[0].pk, self.users[0].pk)
+
+        # the first vote exists already (voted concurrently after validation), the second one is new
+        votes = [
+            models.Vote(poll_id=poll_id, choice_id=choices[1].pk, voted_by_id=self.users[0].pk),
+            models.Vote(poll_id=poll_id, choice_id=choices[1].pk, voted_by_id=self.users[1].pk),
+        ]
+        inserted = models.Vote.objects.bulk_cast(votes)
+        self.assertListEqual([votes[1]], inserted)
+        self.assertIsNotNone(inserted[0].pk)
+        self.assertIsNone(votes[0].pk)
+
+        for choice, count in zip(choices, (1, 1)):
+            choice.refresh_from_db()
+            self.assertEqual(count, choice.vote_count)
+        self.assertEqual(2, models.Poll.objects.get(pk=poll_id).total_votes)
+        self.assertEqual(2, models.Vote.objects.filter(poll=poll_id).count())
+
+        # nothing is inserted - counters are not changed
+        self.assertListEqual([], models.Vote.objects.bulk_cast(votes[:1]))
+        self.assertEqual(2, models.Poll.objects.get(pk=poll_id).total_votes)
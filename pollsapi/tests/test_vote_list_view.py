@@ -0,0 +1,72 @@
+# IDE: PyCharm
+# Project: drf
+# Path: pollsapi/tests
+# File: test_vote_list_view.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-12 (y-m-d) 4:31 PM
+
+# tests for
+# path("poll/<int:pk>/choice/<int:choice_pk>/votes/", views.VoteList.as_view(), name="vote_list"),
+
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from pollsapi import models
+from pollsapi.tests.test_vote_view import VoteMixin
+
+
+class TestVoteList(VoteMixin, APITestCase):
+
+    view_name = 'pollsapi:vote_list'
+    view_name_kwargs_map = {'pk': 'poll_id', 'choice_pk': 'id'}
+
+    def get_token_login_url_params(self):
+        return self.dummy_choice
+
+    def test_perform_token_login(self):
+        self.dummy_choice = self.create_fixtures()[0]
+        super().test_perform_token_login()
+
+    def create_votes(self, choice: models.Choice, count: int) -> list[models.Vote]:
+        User.objects.bulk_create(User(username=f'voter{i}') for i in range(count))
+        users = User.objects.filter(username__startswith='voter').order_by('id')
+        return [models.Vote.objects.create(poll=choice.poll, choice=choice, voted_by=user) for user in users]
+
+    def test_perform_list(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+        votes = self.create_votes(choice, 25)
+
+        # walk through all pages using 'next' link
+        response = self.get_response('get', choice)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn('count', response.data)
+        results = list(response.data['results'])
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            results.extend(response.data['results'])
+
+        self.assertListEqual(self.serializer_class(votes, many=True).data, results)
+
+        # choice without votes
+        response = self.get_response('get', choices[1])
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertListEqual([], response.data['results'])
+
+        # choice that is not appropriate to poll - error
+        poll = models.Poll.objects.filter(choices__isnull=True).get()
+        response = self.get_response('get', {'poll_id': poll.pk, 'id': choice.pk})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        test_content = f'{{"non_field_errors":["Choice {choice.pk} of poll {poll.pk} does not exists"]}}'
+        self.assertEqual(test_content.encode(), response.content)
+
+    def test_perform_other(self):
+        choice = self.create_fixtures()[0]
+
+        token_value = f'Token {choice.poll.created_by.auth_token.key}'
+        for method in ('post', 'put', 'patch', 'delete'):
+            with self.subTest(method=method):
+                resp = self.get_response(method, choice, HTTP_AUTHORIZATION=token_value)
+                self.assertEqual(status.HTTP_405_METHOD_NOT_ALLOWED, resp.status_code)
@@ -9,6 +9,9 @@
 # path("poll/<int:pk>/choice/<int:choice_pk>/vote/", views.Vote.as_view(), name="vote"),
 # class Vote(generics.CreateAPIView):
 
+from unittest import mock
+
+from django.db import connection
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.test import APITestCase
@@ -68,6 +71,7 @@ class TestChoiceList(VoteMixin, APITestCase):
         resp = self.get_response('post', choice, HTTP_AUTHORIZATION=token_value)
         self.assertEqual(status.HTTP_201_CREATED, resp.status_code)
         self.assertEqual(1, models.Vote.objects.count())
+        self.assertDictEqual(dict(self.serializer_class(models.Vote.objects.get()).data), dict(resp.data))
 
         # test authenticated - unsuccessful - cause second attempt on same poll
         resp = self.get_response('post', choice, HTTP_AUTHORIZATION=token_value)
@@ -125,3 +129,47 @@ class TestChoiceList(VoteMixin, APITestCase):
         test_resp_content = b'{"non_field_errors":["The choice is not appropriate for a poll\'s question"]}'
         self.assertEqual(test_resp_content, resp.content)
         self.assertEqual(2, models.Vote.objects.count())
+
+    def test_vote_counters(self):
+        choices = self.create_fixtures()
+        choice = choices[0]
+
+        for user in self.users:
+            resp = self.get_response('post', choice, HTTP_AUTHORIZATION=f'Token {user.auth_token.key}')
+            self.assertEqual(status.HTTP_201_CREATED, resp.status_code)
+
+        # unsuccessful attempt does not change counters
+        resp = self.get_response('post', choices[1], HTTP_AUTHORIZATION=f'Token {self.users[0].auth_token.key}')
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, resp.status_code)
+
+        choice.refresh_from_db()
+        self.assertEqual(len(self.users), choice.vote_count)
+        self.assertEqual(choice.votes.count(), choice.vote_count)
+        choices[1].refresh_from_db()
+        self.assertEqual(0, choices[1].vote_count)
+        choice.poll.refresh_from_db()
+        self.assertEqual(len(self.users), choice.poll.total_votes)
+
+        # delete of choice decreases the poll's counter
+        token_value = f'Token {choice.poll.created_by.auth_token.key}'
+        resp = self.client.delete(
+            f'/api-polls/poll/{choice.poll_id}/choice/{choice.pk}/', HTTP_AUTHORIZATION=token_value
+        )
+        self.assertEqual(status.HTTP_204_NO_CONTENT, resp.status_code)
+        choice.poll.refresh_from_db()
+        self.assertEqual(0, choice.poll.total_votes)
+
+    def test_cast_returning(self):
+        choice = self.create_fixtures()[0]
+        other_poll = models.Poll.objects.exclude(pk=choice.poll_id).first()
+        other_choice = models.Choice.objects.create(poll=other_poll, choice_text='other poll')
+        features = connection.features
+        # RETURNING of the database (PostgreSQL, SQLite 3.35+) and cursor.lastrowid of the others
+        for i, can_return in enumerate(dict.fromkeys((features.can_return_columns_from_insert, False))):
+            with self.subTest(can_return=can_return), \
+                    mock.patch.object(features, 'can_return_columns_from_insert', can_return):
+                user = self.users[i]
+                pk = models.Vote.objects.cast(choice.poll_id, choice.pk, user.pk)
+                self.assertEqual(models.Vote.objects.get(poll=choice.poll_id, voted_by=user).pk, pk)
+                # choice of other poll is not inserted
+                self.assertIsNone(models.Vote.objects.cast(choice.poll_id, other_choice.pk, self.users[2].pk))
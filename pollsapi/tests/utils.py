@@ -8,6 +8,7 @@
 from typing import Optional
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 
 from rest_framework import status
 from rest_framework.response import Response
@@ -16,6 +17,9 @@ from rest_framework.serializers import Serializer
 from rest_framework.test import APIClient
 from rest_framework.authtoken.models import Token
 
+# settings.POLLSAPI_CACHE of the tests that use it (disabled by default), locmem is enough for the test process
+POLL_CACHE = {'ALIAS': 'default', 'TIMEOUT': 300}
+
 
 class ClientToolMixin:
     # url_pattern something like
@@ -36,6 +40,9 @@ class ClientToolMixin:
         assert issubclass(self.serializer_class, Serializer),\
             f'"serializer_class" is not subclass of {type(Serializer).__module__}.{type(Serializer).__name__}'
 
+        # cache is not rolled back with database, but ids are reused
+        cache.clear()
+
         self.users = []
         for i in range(3):
             credentials = {'username': f'test{i}', 'password': self.password}
@@ -23,8 +23,12 @@ urlpatterns = [
     path('login/', views.Login.as_view(), name='login'),
     path('poll/', views.PollList.as_view(), name='poll_list'),
     path('poll/<int:pk>/', views.PollDetail.as_view(), name='poll_detail'),
+    path('poll/<int:pk>/results/', views.PollResults.as_view(), name='poll_results'),
     path("poll/<int:pk>/choice/", views.ChoiceList.as_view(), name="choice_list"),
     path("poll/<int:pk>/choice/<int:choice_pk>/", views.ChoiceDetail.as_view(), name="choice_detail"),
 
     path("poll/<int:pk>/choice/<int:choice_pk>/vote/", views.Vote.as_view(), name="vote"),
+    path("poll/<int:pk>/choice/<int:choice_pk>/votes/", views.VoteList.as_view(), name="vote_list"),
+    path("vote/bulk/", views.VoteBulk.as_view(), name="vote_bulk"),
+    path("cache/stats/", views.CacheStats.as_view(), name="cache_stats"),
 ]
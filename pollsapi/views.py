@@ -1,6 +1,16 @@
 # Create your views here.
 
+import hashlib
+import json
+import time
+from typing import Optional
+
+from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError
+from django.db.models import Count, Max, QuerySet
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 
 from rest_framework.authtoken.models import Token
 
@@ -8,32 +18,255 @@ from rest_framework.exceptions import ValidationError, PermissionDenied
 from rest_framework.relations import PrimaryKeyRelatedField
 
 from rest_framework.settings import api_settings
-from rest_framework import generics, views, permissions
+from rest_framework import generics, views, permissions, status
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
 from pollsapi import models, serializers
+from pollsapi.authentication import get_token_cache
+from pollsapi.buffer import VoteBuffer, get_vote_buffer
+from pollsapi.cache import get_poll_cache
+from pollsapi.compiled import CompiledSerializer, compile_serializer
+from pollsapi.pagination import VoteCursorPagination, PollPagination
 from pollsapi.permissions import PollsChoiceIsOwnerOrStaff
+from tutorial.metrics import ViewMetricsMixin
+
+
+class VotesModeMixin:
+    """
+        Chooses representation of votes by query parameter
+        ?votes=count - only denormalized counters, votes are not fetched at all (default)
+        ?votes=list - nested list of votes
+        GET representations are built by CompiledSerializer (see pollsapi.compiled) - instances are not
+        prefetched, nested choices and votes are fetched by values() and represented as plain dicts.
+    """
+    votes_query_param = 'votes'
+    votes_modes = ('list', 'count')
+    # votes can be streamed page by page through VoteList
+    default_votes_mode = 'count'
+
+    count_serializer_class = None
+    # lookups that will be prefetched for appropriate mode
+    list_prefetch: tuple = ()
+    count_prefetch: tuple = ()
+    # False - GET is served by serializer_class / count_serializer_class as is
+    compiled_read = True
+    # True - list is paginated over values() rows (projection), instances are not created at all
+    projection_list = False
+
+    def get_votes_mode(self) -> str:
+        if self.request is None:
+            # schema generation
+            return self.default_votes_mode
+
+        mode = self.request.query_params.get(self.votes_query_param, self.default_votes_mode)
+        if mode not in self.votes_modes:
+            raise ValidationError({
+                self.votes_query_param: [f'"{mode}" is not one of {", ".join(self.votes_modes)}']
+            })
+        return mode
+
+    def get_serializer_class(self):
+        if self.get_votes_mode() == 'count':
+            assert self.count_serializer_class is not None, \
+                f'"{type(self).__name__}" should include a `count_serializer_class` attribute'
+            return self.count_serializer_class
+        return super().get_serializer_class()
+
+    def get_compiled_serializer(self) -> Optional[CompiledSerializer]:
+        if not self.compiled_read or self.request is None or self.request.method not in ('GET', 'HEAD'):
+            return None
+        return compile_serializer(self.get_serializer_class())
 
-
-class PollBaseMixin:
-    queryset = models.Poll.objects.prefetch_related('choices__votes').all()
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_compiled_serializer() is not None:
+            # nested representations are fetched by CompiledSerializer
+            return queryset
+
+        prefetch = self.count_prefetch if self.get_votes_mode() == 'count' else self.list_prefetch
+        return queryset.prefetch_related(*prefetch)
+
+    def list(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        represent = compiled.represent_instances
+        if self.projection_list:
+            queryset = queryset.values(*compiled.lookups, *self.get_projection_extra(compiled))
+            represent = compiled.represent_rows
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(represent(page))
+        return Response(represent(queryset))
+
+    def get_projection_extra(self, compiled: CompiledSerializer) -> tuple[str, ...]:
+        # cursor pagination reads the position from the ordering fields of rows
+        ordering = getattr(self.pagination_class, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        return tuple(name for name in (field.lstrip('-') for field in ordering) if name not in compiled.lookups)
+
+    def retrieve(self, request, *args, **kwargs):
+        compiled = self.get_compiled_serializer()
+        if compiled is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(compiled.represent_instances([self.get_object()])[0])
+
+
+class PollBaseMixin(VotesModeMixin):
+    queryset = models.Poll.objects.all()
     serializer_class = serializers.PollSerializer
+    count_serializer_class = serializers.PollCountSerializer
+    list_prefetch = ('choices__votes',)
+    count_prefetch = ('choices',)
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, PollsChoiceIsOwnerOrStaff]
 
 
-class PollList(PollBaseMixin, generics.ListCreateAPIView):
+class ConditionalGetMixin:
+    """
+        ETag of GET response is computed by one small aggregate query of the poll or polls (see get_etag_parts),
+        so the request with matching If-None-Match gets 304 before queryset and serializer are evaluated.
+        It is read from database only (any cache and process see the same ETag).
+    """
+
+    def get_etag_queryset(self) -> QuerySet:
+        # parts of the poll (url kwarg 'pk')
+        return models.Poll.objects.filter(pk=self.kwargs['pk']).annotate(
+            choices_count=Count('choices'), max_choice=Max('choices'), choice_updated_at=Max('choices__updated_at')
+        ).values('pub_date', 'total_votes', 'last_vote_at', 'choices_count', 'max_choice', 'choice_updated_at')
+
+    def get_etag_parts(self) -> Optional[dict]:
+        # None - poll does not exist
+        return self.get_etag_queryset().first()
+
+    def get_etag(self, request) -> Optional[str]:
+        parts = self.get_etag_parts()
+        if parts is None:
+            return None
+
+        representation = [request.build_absolute_uri(), request.accepted_renderer.format, parts]
+        digest = hashlib.md5(json.dumps(representation, default=str).encode(), usedforsecurity=False)
+        return quote_etag(digest.hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is not None:
+            response = get_conditional_response(request, etag=etag)
+            if response is not None:
+                response.headers['ETag'] = etag
+                return response
+
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == status.HTTP_200_OK:
+            response.headers['ETag'] = etag
+        return response
+
+
+class PollCacheMixin:
+    """
+        Read-through cache of serialized data of GET response (see pollsapi.cache),
+        it is invalidated by any change of the poll (url kwarg 'pk'), its choices or votes
+    """
+
+    def get(self, request, *args, **kwargs):
+        poll_cache = get_poll_cache()
+        if poll_cache is None:
+            return super().get(request, *args, **kwargs)
+
+        name = request.resolver_match.view_name if request.resolver_match else type(self).__name__
+        # serialized data contains absolute urls (pagination), so the full url is representation
+        key = poll_cache.make_key(self.kwargs['pk'], request.build_absolute_uri())
+        data = poll_cache.get(key, name)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            poll_cache.set(key, response.data)
+        response.headers['X-Cache'] = 'MISS'
+        return response
+
+
+class PollList(ViewMetricsMixin, ConditionalGetMixin, PollBaseMixin, generics.ListCreateAPIView):
+    pagination_class = PollPagination
+    # polls, choices and votes of page are values() rows - 3 queries (+ etag, count of page number pagination)
+    projection_list = True
+    query_budget = {'get': 6, 'post': 4}
+
+    def get_etag_parts(self) -> Optional[dict]:
+        # one aggregate of the filtered polls (page is a part of url): new or deleted poll changes count / max id,
+        # change of poll - pub_date (auto_now), vote - last_vote_at, deleted vote or choice - last_delete_at,
+        # choice - its count, max id or updated_at
+        return self.filter_queryset(models.Poll.objects.all()).aggregate(
+            polls_count=Count('id', distinct=True), max_poll=Max('id'), pub_date=Max('pub_date'),
+            last_vote_at=Max('last_vote_at'), last_delete_at=Max('last_delete_at'),
+            choices_count=Count('choices'), max_choice=Max('choices'), choice_updated_at=Max('choices__updated_at')
+        )
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
 
-class PollDetail(PollBaseMixin, generics.RetrieveUpdateDestroyAPIView):
-    pass
+class PollDetail(ViewMetricsMixin, ConditionalGetMixin, PollCacheMixin, PollBaseMixin,
+                 generics.RetrieveUpdateDestroyAPIView):
+    # get - session, user, etag, poll, choices (without cache)
+    query_budget = {'get': 5, 'put': 5, 'patch': 4, 'delete': 6}
+
+
+class PollResults(ViewMetricsMixin, generics.GenericAPIView):
+    """
+        Per-choice counts and percentages, they are read from the denormalized counters.
+        Response has ETag and Last-Modified (the latest vote, deleted vote or choice, change of poll or choice),
+        so the repeated requests with If-None-Match / If-Modified-Since get 304.
+    """
+    queryset = models.Poll.objects.annotate(choice_updated_at=Max('choices__updated_at'))
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 3
+
+    def get_choices_queryset(self, poll: models.Poll) -> QuerySet:
+        return poll.choices.order_by('pk').values('id', 'choice_text', 'vote_count')
+
+    def get_results(self, poll: models.Poll) -> dict:
+        choices = list(self.get_choices_queryset(poll))
+        total = sum(choice['vote_count'] for choice in choices)
+        for choice in choices:
+            choice['percent'] = round(choice['vote_count'] * 100 / total, 2) if total else 0.0
+
+        return {'id': poll.pk, 'question': poll.question, 'total_votes': total, 'choices': choices}
+
+    def get_last_modified(self, poll: models.Poll) -> Optional[int]:
+        changed_at = max(filter(None, (poll.pub_date, poll.last_vote_at, poll.last_delete_at, poll.choice_updated_at)))
+        last_modified = int(changed_at.timestamp())
+        # http date has one-second resolution - the next change within this second would have the same one,
+        # so until the second is over only ETag validates
+        return last_modified if last_modified < int(time.time()) else None
+
+    def get(self, request, *args, **kwargs):
+        poll = self.get_object()
+        results = self.get_results(poll)
+
+        etag = quote_etag(hashlib.md5(json.dumps(results).encode(), usedforsecurity=False).hexdigest())
+        last_modified = self.get_last_modified(poll)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = Response(results)
 
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
 
-class ChoiceBaseMixin:
+
+class ChoiceBaseMixin(VotesModeMixin):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, PollsChoiceIsOwnerOrStaff]
     serializer_class = serializers.ChoiceSerializer
+    count_serializer_class = serializers.ChoiceCountSerializer
+    list_prefetch = ('votes',)
     _poll: models.Poll = None
 
     def get_poll(self):
@@ -53,8 +286,10 @@ class ChoiceBaseMixin:
         return super().get_queryset().filter(poll=poll)
 
 
-class ChoiceList(ChoiceBaseMixin, generics.ListCreateAPIView):
-    queryset = models.Choice.objects.prefetch_related('votes').select_related('poll')
+class ChoiceList(ViewMetricsMixin, ConditionalGetMixin, PollCacheMixin, ChoiceBaseMixin,
+                 generics.ListCreateAPIView):
+    queryset = models.Choice.objects.select_related('poll').order_by('pk')
+    query_budget = {'get': 5, 'post': 4}
 
     def perform_create(self, serializer):
         poll = self.get_poll()
@@ -63,15 +298,18 @@ class ChoiceList(ChoiceBaseMixin, generics.ListCreateAPIView):
         serializer.save(poll=self._poll)
 
 
-class ChoiceDetail(ChoiceBaseMixin, generics.RetrieveUpdateDestroyAPIView):
+class ChoiceDetail(ViewMetricsMixin, ConditionalGetMixin, ChoiceBaseMixin,
+                   generics.RetrieveUpdateDestroyAPIView):
     lookup_url_kwarg = 'choice_pk'
     queryset = models.Choice.objects.select_related('poll').all()
+    query_budget = {'get': 5, 'put': 4, 'patch': 3, 'delete': 8}
 
 
-class Vote(generics.CreateAPIView):
+class Vote(ViewMetricsMixin, generics.CreateAPIView):
 
     serializer_class = serializers.VoteSerializer
     queryset = serializer_class.Meta.model.objects.all()
+    query_budget = {'post': 7}
 
     def validate_poll_choice(self, serializer: serializers.VoteSerializer) -> models.Choice:
         choice_id = self.kwargs.get('choice_pk')
@@ -105,28 +343,168 @@ class Vote(generics.CreateAPIView):
     def perform_create(self, serializer: serializers.VoteSerializer):
         # add automatically poll, choice and user objects
 
+        user = self.request.user
+        if not user.is_authenticated:
+            raise ValidationError({'user': ['Allowed only authenticated users']})
+
+        poll_id, choice_id = self.kwargs.get('pk'), self.kwargs.get('choice_pk')
+        try:
+            vote_id = models.Vote.objects.cast(poll_id, choice_id, user.pk)
+        except IntegrityError:
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['You are voted on this poll']})
+
+        if vote_id is None:
+            # nothing was inserted - the slow path is used only to explain why
+            try:
+                self.validate_poll_choice(serializer)
+                raise ValidationError(['The choice is not appropriate for a poll\'s question'])
+            except ValidationError as exc:
+                raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: exc.detail})
+
+        serializer.instance = models.Vote(pk=vote_id, poll_id=poll_id, choice_id=choice_id, voted_by=user)
+
+    def create(self, request, *args, **kwargs):
+        buffer = get_vote_buffer()
+        if buffer is None:
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_buffered_create(serializer, buffer)
+        # vote will be written later by buffer
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
+    def perform_buffered_create(self, serializer: serializers.VoteSerializer, buffer: VoteBuffer):
+        user = self.request.user
+        if not user.is_authenticated:
+            raise ValidationError({'user': ['Allowed only authenticated users']})
+
         try:
             poll, choice = self.validate_poll_choice(serializer)
         except ValidationError as exc:
             raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: exc.detail})
 
-        errors = {}
-        user = self.request.user
-        if not user.is_authenticated:
-            errors.setdefault('user', []).append('Allowed only authenticated users')
+        if buffer.is_pending(poll.pk, user.pk) or poll.votes.filter(voted_by=user).exists() \
+                or not buffer.add(poll.pk, choice.pk, user.pk):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['You are voted on this poll']})
+
+        serializer.instance = models.Vote(poll=poll, choice=choice, voted_by=user)
+
+
+class VoteBulk(ViewMetricsMixin, generics.GenericAPIView):
+    """
+        Accepts list of {"poll": .., "choice": ..} (staff can add "voted_by": user_id)
+        and returns the result for each item in the same order
+    """
+    serializer_class = serializers.BulkVoteSerializer
+    max_items = 1000
+
+    def get_voted_queryset(self, poll_ids, user_ids) -> QuerySet:
+        # (poll, voted_by) of the existing votes
+        return models.Vote.objects.filter(poll__in=poll_ids, voted_by__in=user_ids).values_list('poll', 'voted_by')
+
+    def validate_items(self, items: list) -> tuple[list[Optional[models.Vote]], list[dict]]:
+        votes, errors = [], []
+        for item in items:
+            serializer = self.get_serializer(data=item)
+            if serializer.is_valid():
+                data = serializer.validated_data
+                votes.append(models.Vote(
+                    poll_id=data['poll'],
+                    choice_id=data['choice'],
+                    voted_by_id=data.get('voted_by', self.request.user.pk)
+                ))
+                errors.append({})
+            else:
+                votes.append(None)
+                errors.append(dict(serializer.errors))
+        return votes, errors
+
+    def post(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Expected a list of items']})
+        if len(items) > self.max_items:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'Ensure this list has no more than {self.max_items} items']
+            })
+
+        votes, errors = self.validate_items(items)
+        valid = [vote for vote in votes if vote is not None]
+
+        # one query for each: choices, users (only if somebody votes on behalf of others), existing votes
+        choices = dict(models.Choice.objects.filter(
+            pk__in={vote.choice_id for vote in valid}
+        ).values_list('pk', 'poll'))
+
+        users = {request.user.pk: request.user}
+        user_ids = {vote.voted_by_id for vote in valid} - users.keys()
+        if user_ids and request.user.is_staff:
+            users.update((user.pk, user) for user in User.objects.filter(pk__in=user_ids).only('username'))
+
+        voted = set(self.get_voted_queryset(
+            {vote.poll_id for vote in valid}, {vote.voted_by_id for vote in valid}
+        ))
+
+        for i, vote in enumerate(votes):
+            if vote is None:
+                continue
+
+            if vote.voted_by_id != request.user.pk and not request.user.is_staff:
+                errors[i] = {'voted_by': ['Only staff can vote on behalf of other users']}
+            elif vote.voted_by_id not in users:
+                errors[i] = {'voted_by': [f'Invalid pk "{vote.voted_by_id}" - object does not exist.']}
+            elif vote.choice_id not in choices:
+                errors[i] = {'choice': [f'Invalid pk "{vote.choice_id}" - object does not exist.']}
+            elif choices[vote.choice_id] != vote.poll_id:
+                errors[i] = {api_settings.NON_FIELD_ERRORS_KEY: ['The choice is not appropriate for a poll\'s question']}
+            elif (vote.poll_id, vote.voted_by_id) in voted:
+                errors[i] = {api_settings.NON_FIELD_ERRORS_KEY: ['You are voted on this poll']}
+            else:
+                # next items of same user and poll in this batch are duplicates
+                voted.add((vote.poll_id, vote.voted_by_id))
+                vote.voted_by = users[vote.voted_by_id]
+                continue
+
+            votes[i] = None
+
+        # pk is set only for the votes that were really inserted
+        inserted = models.Vote.objects.bulk_cast([vote for vote in votes if vote is not None])
+
+        results = []
+        for vote, error in zip(votes, errors):
+            if vote is not None and vote.pk is not None:
+                results.append({'status': status.HTTP_201_CREATED, 'vote': serializers.VoteSerializer(vote).data})
+            else:
+                # vote was rejected by database (concurrent request) after validation
+                error = error or {api_settings.NON_FIELD_ERRORS_KEY: ['You are voted on this poll']}
+                results.append({'status': status.HTTP_400_BAD_REQUEST, 'errors': error})
+
+        all_created = len(inserted) == len(results)
+        return Response(results, status=status.HTTP_201_CREATED if all_created else status.HTTP_207_MULTI_STATUS)
+
+
+class VoteList(ViewMetricsMixin, generics.ListAPIView):
+    serializer_class = serializers.VoteSerializer
+    queryset = models.Vote.objects.select_related('voted_by')
+    pagination_class = VoteCursorPagination
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    query_budget = 3
 
-        if poll.votes.filter(voted_by=user).exists():
-            errors.setdefault(api_settings.NON_FIELD_ERRORS_KEY, []).append(
-                'You are voted on this poll'
-            )
+    def list(self, request, *args, **kwargs):
+        poll_id, choice_id = self.kwargs['pk'], self.kwargs['choice_pk']
+        if not models.Choice.objects.filter(pk=choice_id, poll=poll_id).exists():
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [f'Choice {choice_id} of poll {poll_id} does not exists']
+            })
 
-        if errors:
-            raise ValidationError(errors)
+        return super().list(request, *args, **kwargs)
 
-        serializer.save(poll=poll, choice=choice, voted_by=user)
+    def get_queryset(self):
+        return super().get_queryset().filter(choice=self.kwargs['choice_pk'])
 
 
-class UserCreate(generics.CreateAPIView):
+class UserCreate(ViewMetricsMixin, generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = serializers.UserSerializer
 
@@ -136,11 +514,27 @@ class UserCreate(generics.CreateAPIView):
         Token.objects.create(user=instance)
 
 
-class Login(generics.CreateAPIView):
+class Login(ViewMetricsMixin, generics.CreateAPIView):
     permission_classes = (permissions.AllowAny,)
     serializer_class = serializers.LoginSerializer
 
 
+class CacheStats(ViewMetricsMixin, views.APIView):
+    """
+        Hit/miss counters of the poll's cache by view name and of the token cache
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        poll_cache = get_poll_cache()
+        if poll_cache is None:
+            stats = {'enabled': False}
+        else:
+            stats = {'enabled': True, 'timeout': poll_cache.timeout, 'views': poll_cache.stats()}
+
+        return Response(stats | {'tokens': get_token_cache().stats()})
+
+
 class ApiRootView(views.APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -148,7 +542,10 @@ class ApiRootView(views.APIView):
         return Response({
             'poll list': reverse('pollsapi:poll_list', request=request),
             'poll detail': 'poll/<int:pk>/',
+            'poll results': 'poll/<int:pk>/results/',
             'choices for poll': 'poll/<int:pk>/choice/',
             'vote': 'poll/<int:pk>/choice/<int:choice_pk>/vote/',
+            'votes of choice': 'poll/<int:pk>/choice/<int:choice_pk>/votes/',
+            'bulk vote': 'vote/bulk/',
         })
 
@@ -0,0 +1,240 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial
+# File: metrics.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 5:05 PM
+
+# Latency histograms of the phases of APIView.dispatch by url name (pollsapi:poll_list, snippets:snippet-highlight ...)
+# Views that include ViewMetricsMixin are measured, the histograms are exported in Prometheus text format
+# by MetricsView (admin only, /metrics/).
+#
+# Phases:
+#     authentication - perform_authentication() (lookup of token, session ...)
+#     permissions    - check_permissions() and check_object_permissions()
+#     queryset       - time of database queries outside of the phases above
+#     serialization  - the rest of the handler (serializers, pagination, view code)
+#     rendering      - response.render() (it runs after dispatch)
+#
+# settings.VIEW_METRICS = {
+#     'BUCKETS': (0.001, 0.005, ...),   # upper bounds of the histogram buckets, seconds
+# }
+#
+# settings.VIEW_METRICS = None - views are not measured
+
+import threading
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework import permissions, views
+
+DEFAULTS = {
+    'BUCKETS': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+}
+
+PHASES = ('authentication', 'permissions', 'queryset', 'serialization', 'rendering')
+METRIC_NAME = 'drf_view_phase_seconds'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    """
+        Counts of observations by buckets (not cumulative), their sum and count
+    """
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = buckets
+        # the last one is +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class ViewMetrics:
+
+    def __init__(self, buckets=DEFAULTS['BUCKETS']) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # (view name, phase) -> Histogram
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, view_name: str, times: dict[str, float]) -> None:
+        with self._lock:
+            for phase, value in times.items():
+                histogram = self._histograms.get((view_name, phase))
+                if histogram is None:
+                    histogram = self._histograms[(view_name, phase)] = Histogram(self.buckets)
+                histogram.observe(value)
+
+    def export(self) -> str:
+        """
+            Prometheus text exposition format
+        """
+        lines = [
+            f'# HELP {METRIC_NAME} Duration of the phases of API views by url name.',
+            f'# TYPE {METRIC_NAME} histogram',
+        ]
+        bounds = [repr(float(bound)) for bound in self.buckets] + ['+Inf']
+        with self._lock:
+            for (view_name, phase), histogram in sorted(self._histograms.items()):
+                labels = f'view="{escape_label(view_name)}",phase="{phase}"'
+                cumulative = 0
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_sum{{{labels}}} {histogram.sum!r}')
+                lines.append(f'{METRIC_NAME}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+_view_metrics: Optional[ViewMetrics] = None
+_view_metrics_lock = threading.Lock()
+
+
+def get_view_metrics() -> Optional[ViewMetrics]:
+    """
+        Returns the process-wide metrics or None if views are not measured (settings.VIEW_METRICS = None)
+    """
+    global _view_metrics
+
+    options = getattr(settings, 'VIEW_METRICS', {})
+    if options is None:
+        return None
+
+    if _view_metrics is None:
+        with _view_metrics_lock:
+            if _view_metrics is None:
+                options = DEFAULTS | options
+                _view_metrics = ViewMetrics(**{key.lower(): value for key, value in options.items()})
+    return _view_metrics
+
+
+@receiver(setting_changed)
+def reset_view_metrics(*, setting, **kwargs):
+    global _view_metrics
+
+    if setting == 'VIEW_METRICS':
+        _view_metrics = None
+
+
+class PhaseTimer:
+    """
+        Times of the phases of one request. It is execute_wrapper of connections too,
+        the queries of the running phase (authentication ...) are accounted to it, the others to 'queryset'.
+    """
+
+    def __init__(self) -> None:
+        self.times = dict.fromkeys(PHASES[:-1], 0.0)
+        self.phase: Optional[str] = None
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.phase is not None:
+            return execute(sql, params, many, context)
+
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.times['queryset'] += perf_counter() - started
+
+    @contextmanager
+    def measure(self, phase: str):
+        outer, self.phase = self.phase, phase
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.times[phase] += perf_counter() - started
+            self.phase = outer
+
+
+class ViewMetricsMixin:
+    """
+        Feeds the phases of dispatch() into ViewMetrics by url name of request
+    """
+
+    _phase_timer: Optional[PhaseTimer] = None
+
+    def dispatch(self, request, *args, **kwargs):
+        metrics = get_view_metrics()
+        resolver_match = request.resolver_match
+        if metrics is None or resolver_match is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        timer = self._phase_timer = PhaseTimer()
+        started = perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = super().dispatch(request, *args, **kwargs)
+        elapsed = perf_counter() - started
+
+        times = timer.times
+        times['serialization'] = max(
+            elapsed - times['authentication'] - times['permissions'] - times['queryset'], 0.0
+        )
+        view_name = resolver_match.view_name
+        metrics.observe(view_name, times)
+
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render = self._timed_render(response.render, metrics, view_name)
+        return response
+
+    @staticmethod
+    def _timed_render(render, metrics: ViewMetrics, view_name: str):
+        def timed_render():
+            started = perf_counter()
+            try:
+                return render()
+            finally:
+                metrics.observe(view_name, {'rendering': perf_counter() - started})
+        return timed_render
+
+    def perform_authentication(self, request):
+        if self._phase_timer is None:
+            return super().perform_authentication(request)
+        with self._phase_timer.measure('authentication'):
+            return super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        if self._phase_timer is None:
+            return super().check_permissions(request)
+        with self._phase_timer.measure('permissions'):
+            return super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        if self._phase_timer is None:
+            return super().check_object_permissions(request, obj)
+        with self._phase_timer.measure('permissions'):
+            return super().check_object_permissions(request, obj)
+
+
+class MetricsView(views.APIView):
+    """
+        Latency histograms of the views in Prometheus text format
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        metrics = get_view_metrics()
+        return HttpResponse(metrics.export() if metrics is not None else '', content_type=CONTENT_TYPE)
@@ -0,0 +1,132 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial
+# File: middleware.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 2:10 PM
+
+# Counting of the queries of request through connection.execute_wrapper (works with DEBUG = False,
+# no sql logging is needed). Repeated shapes of query (N+1) are detected.
+# Results are in the response headers X-DB-Queries, X-DB-Time-Ms, X-DB-Repeated and in the log line
+# of 'tutorial.queries' logger (json).
+#
+# Views declare the budget of queries by `query_budget` attribute:
+#     query_budget = 5                            # any request
+#     query_budget = {'get': 4, 'post': 3}        # by method
+#     query_budget = {'list': 3, 'retrieve': 2}   # by action of viewset (method is used if action is absent)
+#
+# settings.QUERY_BUDGET = {
+#     'REPEATED': 5,     # query shape executed so many times is reported as N+1
+#     'RAISE': False,    # True - QueryBudgetExceeded is raised (tests), False - warning in log only
+# }
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('tutorial.queries')
+
+DEFAULTS = {
+    'REPEATED': 5,
+    'RAISE': False,
+}
+
+# lists of placeholders (IN (%s, %s, ...), VALUES (...), (...)) of different length are the same shape
+PLACEHOLDERS_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+ROWS_RE = re.compile(r'\((?:%s\.\.\.|%s)\)(?:\s*,\s*\((?:%s\.\.\.|%s)\))+')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql: str) -> str:
+    shape = PLACEHOLDERS_RE.sub('%s...', sql)
+    return ROWS_RE.sub('(%s...)...', shape)
+
+
+class QueryStats:
+    """
+        execute_wrapper that counts queries, their time and shapes
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+class QueryBudgetMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        options = DEFAULTS | getattr(settings, 'QUERY_BUDGET', {})
+        stats = QueryStats()
+        request.query_budget = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        repeated = stats.repeated(options['REPEATED'])
+        budget = request.query_budget
+        response.headers['X-DB-Queries'] = str(stats.count)
+        response.headers['X-DB-Time-Ms'] = f'{stats.duration * 1000:.2f}'
+        response.headers['X-DB-Repeated'] = str(len(repeated))
+        if budget is not None:
+            response.headers['X-DB-Query-Budget'] = str(budget)
+
+        exceeded = budget is not None and stats.count > budget
+        view_name = request.resolver_match.view_name if request.resolver_match else None
+        logger.log(logging.WARNING if exceeded or repeated else logging.INFO, json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 2),
+            'budget': budget,
+            'repeated': [{'sql': shape, 'count': count} for shape, count in repeated],
+        }))
+
+        if exceeded and options['RAISE']:
+            raise QueryBudgetExceeded(
+                f'{request.method} {request.path} ({view_name}) made {stats.count} queries, budget is {budget}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = self.get_budget(request, view_func)
+
+    def get_budget(self, request, view_func) -> Optional[int]:
+        # class based views (DRF too) keep the class in view_func.cls (view_class for django)
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        budget = getattr(view_class, 'query_budget', None)
+        if not isinstance(budget, dict):
+            return budget
+
+        method = request.method.lower()
+        # viewsets keep mapping of methods to actions
+        action = (getattr(view_func, 'actions', None) or {}).get(method)
+        return budget.get(action, budget.get(method))
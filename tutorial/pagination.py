@@ -0,0 +1,107 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial
+# File: pagination.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-19 (y-m-d) 7:48 AM
+
+from typing import Optional
+
+from django.db import connections, DatabaseError
+from django.db.models import QuerySet
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+def estimated_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Number of rows of the table from statistics of database, without COUNT(*).
+    Only for not filtered querysets, None - if estimation is not available
+    (sqlite - ANALYZE was never run, other than sqlite and postgresql).
+    """
+    if queryset.query.where:
+        return None
+
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql, params = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table]
+    elif connection.vendor == 'sqlite':
+        # stat of table (or of its any index) starts from the number of rows
+        sql, params = 'SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]
+    else:
+        return None
+
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+
+    if row is None:
+        return None
+    count = int(str(row[0]).split()[0])
+    return count if count >= 0 else None
+
+
+class EstimatedCountCursorPagination(CursorPagination):
+    """
+        CursorPagination that adds 'estimated_count' (if it is available and `estimate_count` is set)
+        instead of exact count
+    """
+    estimate_count = False
+    estimated_count = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.estimate_count:
+            self.estimated_count = estimated_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.estimated_count is not None:
+            response.data['estimated_count'] = self.estimated_count
+        return response
+
+
+class PageNumberOrCursorPagination(PageNumberPagination):
+    """
+        PageNumberPagination by default, ?pagination=cursor switches to cursor pagination by `ordering`.
+        Cursor pagination makes no COUNT(*) and no OFFSET, so the deep page costs the same as the first one.
+        `ordering` should be backed by index, pages of not ordered queryset are ordered by it in both modes.
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    ordering = None
+    # cursor mode - one more (cheap) query to statistics of database
+    estimate_count = False
+    cursor = None
+
+    def get_cursor_paginator(self) -> CursorPagination:
+        paginator = EstimatedCountCursorPagination()
+        paginator.ordering = self.ordering
+        paginator.page_size = self.page_size
+        paginator.estimate_count = self.estimate_count
+        return paginator
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.mode_query_param) == self.cursor_mode:
+            self.cursor = self.get_cursor_paginator()
+            page = self.cursor.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor.display_page_controls
+            return page
+
+        if self.ordering and not queryset.ordered:
+            ordering = (self.ordering,) if isinstance(self.ordering, str) else self.ordering
+            queryset = queryset.order_by(*ordering)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor is not None:
+            return self.cursor.to_html()
+        return super().to_html()
@@ -0,0 +1,27 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial
+# File: runner.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 5:20 PM
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class QueryBudgetTestRunner(DiscoverRunner):
+    """
+        Requests over the `query_budget` of views fail the tests of all apps (see tutorial/middleware.py)
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.query_budget_settings = override_settings(
+            QUERY_BUDGET=getattr(settings, 'QUERY_BUDGET', {}) | {'RAISE': True}
+        )
+        self.query_budget_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.query_budget_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # counts queries of request and checks `query_budget` of views, see tutorial/middleware.py
+    'tutorial.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,21 +142,40 @@ LOGGING = {
         }
     },
     'loggers': {
+        # DEBUG - every sql statement (slow), the number of queries of request is logged by 'tutorial.queries'
         'django.db.backends': {
             'handlers': ["console"],
-            'level': 'DEBUG',
+            'level': 'INFO',
             'propagate': True,
-        }
+        },
+        'tutorial.queries': {
+            'handlers': ["console"],
+            'level': 'WARNING',
+        },
     }
 }
 
+# Query budgets of views and N+1 detection, see tutorial/middleware.py
+QUERY_BUDGET = {
+    'REPEATED': 5,
+    'RAISE': False,
+}
+# RAISE is enabled while testing, see tutorial/runner.py
+TEST_RUNNER = 'tutorial.runner.QueryBudgetTestRunner'
+
+# Latency histograms of the phases of views (/metrics/), see tutorial/metrics.py
+VIEW_METRICS = {
+    'BUCKETS': (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # 'rest_framework.authentication.TokenAuthentication' with cache, see pollsapi/authentication.py
+        'pollsapi.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -162,3 +183,50 @@ REST_FRAMEWORK = {
     ],
 }
 
+
+# Cache of token -> user for pollsapi.authentication.CachedTokenAuthentication, versions of tokens are kept
+# in ALIAS (it should be shared between processes). Changes that bypass signals are seen after TTL
+POLLSAPI_TOKEN_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 30,
+    'ALIAS': 'default',
+}
+
+# Buffered (asynchronous) writes of votes, see pollsapi/buffer.py for options. None - disabled
+POLLSAPI_VOTE_BUFFER = None
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # production (shared between processes)
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': BASE_DIR / 'cache',
+    # },
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    #     'LOCATION': 'redis://127.0.0.1:6379',
+    # },
+}
+
+# Deferred (in worker pool) highlighting of snippets, see snippets/highlighting.py for options.
+# None - synchronous inside Snippet.save()
+SNIPPETS_HIGHLIGHTER = None
+# SNIPPETS_HIGHLIGHTER = {
+#     'WORKERS': 2,
+#     'PROCESSES': 0,
+# }
+
+# Cache file of the lazy choices of languages and styles of snippets (see snippets/choices.py),
+# in the directory that only the project writes. None - choices are computed by each process
+# (system checks of runserver, migrate, check iterate choices of model fields, so they are loaded by each command)
+SNIPPETS_CHOICES_CACHE = BASE_DIR / 'cache' / 'snippets-choices.json'
+
+# Read-through cache of poll's representations, see pollsapi/cache.py for options. None - disabled.
+# The alias should be shared between processes (not locmem), it is checked by `manage.py check`
+POLLSAPI_CACHE = None
+# POLLSAPI_CACHE = {
+#     'ALIAS': 'default',
+#     'TIMEOUT': 300,
+# }
@@ -0,0 +1,142 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets
+# File: choices.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-21 (y-m-d) 8:20 AM
+
+# Lazy choices of languages and styles of Pygments.
+# get_all_lexers() / get_all_styles() import every lexer and style module (~0.5 sec), so they are called
+# only on the first access to choices and the result can be kept in the cache file, which is stamped
+# by versions of Pygments and its plugins. The next processes just read the file.
+#
+# settings.SNIPPETS_CHOICES_CACHE = BASE_DIR / 'cache' / 'snippets-choices.json'   # None (or not set) - no cache file
+#
+# The file should be in the directory that is writable by the project only (not the shared temporary one),
+# its content becomes the choices of model fields.
+
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections.abc import Sequence
+from importlib.metadata import entry_points
+from pathlib import Path
+from typing import Callable, Optional
+
+import pygments
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def version_stamp() -> dict:
+    plugins = sorted(
+        f'{entry_point.group}:{entry_point.name}={entry_point.value}'
+        for group in ('pygments.lexers', 'pygments.styles')
+        for entry_point in entry_points(group=group)
+    )
+    return {'pygments': pygments.__version__, 'plugins': plugins}
+
+
+def compute_choices() -> dict[str, list[tuple[str, str]]]:
+    from pygments.lexers import get_all_lexers
+    from pygments.styles import get_all_styles
+
+    lexers = [item for item in get_all_lexers() if item[1]]
+    return {
+        'languages': sorted([(item[1][0], item[0]) for item in lexers]),
+        'styles': sorted([(item, item) for item in get_all_styles()]),
+    }
+
+
+def get_cache_file() -> Optional[Path]:
+    cache_file = getattr(settings, 'SNIPPETS_CHOICES_CACHE', None)
+    return Path(cache_file) if cache_file else None
+
+
+def read_cache(cache_file: Path, stamp: dict) -> Optional[dict]:
+    try:
+        data = json.loads(cache_file.read_text())
+    except (OSError, ValueError):
+        return None
+
+    if data.get('stamp') != stamp:
+        return None
+    return {name: [tuple(item) for item in items] for name, items in data['choices'].items()}
+
+
+def write_cache(cache_file: Path, stamp: dict, choices: dict) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        # concurrent processes could write it at the same time, so through the temporary file
+        fd, tmp = tempfile.mkstemp(dir=cache_file.parent, prefix=cache_file.name)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'stamp': stamp, 'choices': choices}, f)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_file)
+    except OSError:
+        logger.warning('Snippets choices: cache file %s was not written', cache_file, exc_info=True)
+
+
+_choices: Optional[dict] = None
+_choices_lock = threading.Lock()
+
+
+def load_choices() -> dict[str, list[tuple[str, str]]]:
+    global _choices
+
+    if _choices is None:
+        with _choices_lock:
+            if _choices is None:
+                cache_file = get_cache_file()
+                stamp = version_stamp()
+                choices = read_cache(cache_file, stamp) if cache_file else None
+                if choices is None:
+                    choices = compute_choices()
+                    if cache_file:
+                        write_cache(cache_file, stamp, choices)
+                _choices = choices
+    return _choices
+
+
+class LazyChoices(Sequence):
+    """
+        Sequence of (value, name) that is loaded on the first access
+    """
+
+    def __init__(self, loader: Callable[[], list[tuple[str, str]]]) -> None:
+        self._loader = loader
+        self._items: Optional[list[tuple[str, str]]] = None
+        self._keys: Optional[frozenset[str]] = None
+
+    @property
+    def items(self) -> list[tuple[str, str]]:
+        if self._items is None:
+            self._items = self._loader()
+        return self._items
+
+    def keys(self) -> frozenset[str]:
+        if self._keys is None:
+            self._keys = frozenset(value for value, _ in self.items)
+        return self._keys
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __eq__(self, other):
+        return list(self) == list(other) if isinstance(other, (list, tuple, LazyChoices)) else NotImplemented
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({"not loaded" if self._items is None else len(self._items)})'
+
+
+LANGUAGE_CHOICES = LazyChoices(lambda: load_choices()['languages'])
+STYLE_CHOICES = LazyChoices(lambda: load_choices()['styles'])
@@ -0,0 +1,126 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets
+# File: fields.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-21 (y-m-d) 10:35 AM
+
+import codecs
+import zlib
+from typing import Iterable, Iterator
+
+from django.db import models
+
+# prefixes of the stored values, utf-8 text never starts with \x00 in practice
+COMPRESSED = b'\x00z'
+RAW = b'\x00r'
+
+
+class CompressedTextField(models.TextField):
+    """
+        Text that is stored zlib compressed in the binary column (BLOB, bytea ...).
+        Values shorter than `min_length` are stored as is (utf-8), compression does not pay for them.
+        Legacy plain text values (before migration to this field) are read as is.
+        It is opt-in per field, the column type is changed by migration (see snippets 0004 for the safe order).
+    """
+
+    def __init__(self, *args, min_length=256, level=6, **kwargs):
+        self.min_length = min_length
+        self.level = level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.min_length != 256:
+            kwargs['min_length'] = self.min_length
+        if self.level != 6:
+            kwargs['level'] = self.level
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        # binary column
+        return 'BinaryField'
+
+    @classmethod
+    def compress(cls, value: str, min_length=256, level=6) -> bytes:
+        data = value.encode()
+        if len(data) >= min_length:
+            return COMPRESSED + zlib.compress(data, level)
+        return RAW + data if data.startswith(b'\x00') else data
+
+    @classmethod
+    def decompress(cls, value) -> str:
+        if isinstance(value, str):
+            # legacy text value
+            return value
+
+        data = bytes(value)
+        if data.startswith(COMPRESSED):
+            return zlib.decompress(data[len(COMPRESSED):]).decode()
+        if data.startswith(RAW):
+            data = data[len(RAW):]
+        return data.decode()
+
+    @classmethod
+    def iter_decompress(cls, chunks: Iterable) -> Iterator[str]:
+        """
+            Incremental decompress() of the stored value that is read by chunks (see RenderingQuerySet.iter_html)
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        decompressor = None
+        head = b''
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                # legacy text value
+                yield chunk
+                continue
+
+            if head is not None:
+                # format is not known yet, it is decided by prefix
+                head += bytes(chunk)
+                if len(head) < len(COMPRESSED):
+                    continue
+                chunk, head = head, None
+                if chunk.startswith(COMPRESSED):
+                    decompressor = zlib.decompressobj()
+                    chunk = chunk[len(COMPRESSED):]
+                elif chunk.startswith(RAW):
+                    chunk = chunk[len(RAW):]
+
+            if decompressor is None:
+                parts = [chunk]
+            else:
+                parts = cls._iter_inflate(decompressor, chunk)
+            for part in parts:
+                text = decoder.decode(bytes(part))
+                if text:
+                    yield text
+
+        tail = head or (decompressor.flush() if decompressor is not None else b'')
+        text = decoder.decode(tail, final=True)
+        if text:
+            yield text
+
+    @staticmethod
+    def _iter_inflate(decompressor, data: bytes, max_length=256 * 1024) -> Iterator[bytes]:
+        # well compressed chunk could expand many times, so the output is limited
+        while data:
+            yield decompressor.decompress(data, max_length)
+            data = decompressor.unconsumed_tail
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return self.decompress(value)
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return value
+        return self.compress(value, self.min_length, self.level)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        value = super().get_db_prep_value(value, connection, prepared)
+        if value is not None:
+            return connection.Database.Binary(value)
+        return value
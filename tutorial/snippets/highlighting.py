@@ -0,0 +1,258 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets
+# File: highlighting.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 11:10 AM
+
+# Highlighting of snippets.
+#
+# Renderings are content addressed - Rendering.digest is sha256 of the source fields of snippet,
+# so identical snippets share one stored rendering and a re-save with unchanged source skips Pygments.
+# The recently used renderings are kept in the in-process LRU (RenderCache).
+#
+# Renderings are html fragments with css classes only, they do not depend on style (and title).
+# Stylesheet of each style is generated once (style_css) and is referenced by page() through <link>.
+#
+# settings.SNIPPETS_RENDER_CACHE = {
+#     'MAX_SIZE': 16 * 1024 * 1024,    # total length of cached html
+# }
+#
+# Deferred highlighting - Snippet.save() stores the raw code and marks the snippet as pending,
+# Pygments renders it after commit in the worker pool, so large code does not block the request thread.
+#
+# settings.SNIPPETS_HIGHLIGHTER = {
+#     'WORKERS': 2,      # threads that load and store the snippets
+#     'PROCESSES': 0,    # > 0 - Pygments runs in the pool of processes (CPU bound), 0 - in the worker threads
+# }
+#
+# settings.SNIPPETS_HIGHLIGHTER = None - highlighting is synchronous inside Snippet.save()
+
+import functools
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction
+from django.dispatch import receiver
+from django.utils.html import escape
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'PROCESSES': 0,
+}
+
+RENDER_CACHE_DEFAULTS = {
+    'MAX_SIZE': 16 * 1024 * 1024,
+}
+
+# fields of Snippet that the highlighted html depends on
+SOURCE_FIELDS = ('code', 'language', 'linenos')
+# should be increased when output of render() is changed
+RENDERING_FORMAT = 'fragment-1'
+# selector of the container of fragment in the stylesheets
+CSS_CLASS = 'highlight'
+
+
+def render(code: str, language: str, linenos: bool) -> str:
+    lexer = get_lexer_by_name(language)
+    formatter = HtmlFormatter(cssclass=CSS_CLASS, linenos='table' if linenos else False)
+    return highlight(code, lexer, formatter)
+
+
+def source_digest(code: str, language: str, linenos: bool) -> str:
+    """
+        Key of rendering - sha256 of the source fields
+    """
+    source = json.dumps([RENDERING_FORMAT, code, language, bool(linenos)], ensure_ascii=False)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def style_css(style: str) -> str:
+    return HtmlFormatter(style=style).get_style_defs(f'.{CSS_CLASS}')
+
+
+def page_parts(title: str, css_url: str) -> tuple[str, str]:
+    """
+        Parts of html document of highlighted snippet before and after the fragment,
+        the stylesheet is linked (it is cached by browser)
+    """
+    title = escape(title)
+    head = (
+        '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n<link rel="stylesheet" href="{escape(css_url)}">\n</head>\n<body>\n'
+        f'{f"<h2>{title}</h2>" if title else ""}\n'
+    )
+    return head, '\n</body>\n</html>\n'
+
+
+def page(fragment: str, title: str, css_url: str) -> str:
+    head, tail = page_parts(title, css_url)
+    return head + fragment + tail
+
+
+class RenderCache:
+    """
+        LRU of digest -> html, it is limited by the total length of html
+    """
+
+    def __init__(self, max_size=16 * 1024 * 1024) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest: str) -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(digest)
+            if html is not None:
+                self._entries.move_to_end(digest)
+            return html
+
+    def set(self, digest: str, html: str) -> None:
+        if len(html) > self.max_size:
+            return
+
+        with self._lock:
+            old = self._entries.pop(digest, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[digest] = html
+            self.size += len(html)
+            while self.size > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_render_cache: Optional[RenderCache] = None
+_render_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+
+    if _render_cache is None:
+        with _render_cache_lock:
+            if _render_cache is None:
+                options = RENDER_CACHE_DEFAULTS | getattr(settings, 'SNIPPETS_RENDER_CACHE', {})
+                _render_cache = RenderCache(**{key.lower(): value for key, value in options.items()})
+    return _render_cache
+
+
+def store_rendering(digest: str, source: dict, using='default', renderer=render) -> str:
+    """
+        Makes sure that rendering of source exists in database, Pygments runs only if it does not exist
+        and is not in the RenderCache. Returns digest.
+    """
+    from tutorial.snippets.models import Rendering
+
+    renderings = Rendering.objects.using(using)
+    if renderings.filter(pk=digest).exists():
+        return digest
+
+    render_cache = get_render_cache()
+    html = render_cache.get(digest)
+    if html is None:
+        html = renderer(**source)
+        render_cache.set(digest, html)
+
+    # concurrent save of identical snippet could create it meanwhile
+    renderings.get_or_create(digest=digest, defaults={'html': html})
+    return digest
+
+
+class Highlighter:
+
+    def __init__(self, workers=2, processes=0) -> None:
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='snippets-highlighter')
+        self.processes: Optional[Executor] = ProcessPoolExecutor(processes) if processes else None
+
+    def schedule(self, snippet_id, using='default') -> None:
+        """
+            Snippet will be rendered after commit of the current transaction (immediately in autocommit mode)
+        """
+        transaction.on_commit(lambda: self.executor.submit(self._run, snippet_id, using), using=using)
+
+    def _run(self, snippet_id, using) -> None:
+        close_old_connections()
+        try:
+            self.highlight(snippet_id, using)
+        except Exception:
+            logger.exception('Snippets highlighter: snippet %s was not rendered', snippet_id)
+        finally:
+            close_old_connections()
+
+    def render(self, **source) -> str:
+        if self.processes is not None:
+            return self.processes.submit(render, **source).result()
+        return render(**source)
+
+    def highlight(self, snippet_id, using='default') -> bool:
+        """
+            Renders the current state of snippet. Returns False if snippet was deleted or changed meanwhile
+            (the later save has scheduled its own rendering).
+        """
+        from tutorial.snippets.models import Snippet
+
+        queryset = Snippet.objects.using(using).filter(pk=snippet_id)
+        source = queryset.values(*SOURCE_FIELDS).first()
+        if source is None:
+            return False
+
+        digest = store_rendering(source_digest(**source), source, using, renderer=self.render)
+        return queryset.filter(**source).update(rendering=digest, highlight_pending=False) == 1
+
+    def shutdown(self) -> None:
+        self.executor.shutdown()
+        if self.processes is not None:
+            self.processes.shutdown()
+
+
+_highlighter: Optional[Highlighter] = None
+_highlighter_lock = threading.Lock()
+
+
+def get_highlighter() -> Optional[Highlighter]:
+    """
+    Returns the process-wide highlighter or None if highlighting is synchronous (settings.SNIPPETS_HIGHLIGHTER = None)
+    """
+    global _highlighter
+
+    options = getattr(settings, 'SNIPPETS_HIGHLIGHTER', None)
+    if options is None:
+        return None
+
+    if _highlighter is None:
+        with _highlighter_lock:
+            if _highlighter is None:
+                options = DEFAULTS | options
+                _highlighter = Highlighter(**{key.lower(): value for key, value in options.items()})
+    return _highlighter
+
+
+@receiver(setting_changed)
+def reset_highlighter(*, setting, **kwargs):
+    global _highlighter, _render_cache
+
+    if setting == 'SNIPPETS_HIGHLIGHTER' and _highlighter is not None:
+        _highlighter.shutdown()
+        _highlighter = None
+    elif setting == 'SNIPPETS_RENDER_CACHE':
+        _render_cache = None
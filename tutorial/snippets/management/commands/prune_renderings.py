@@ -0,0 +1,26 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/management/commands
+# File: prune_renderings.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 3:05 PM
+
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from tutorial.snippets.models import Rendering
+
+
+class Command(BaseCommand):
+    help = 'Deletes renderings of snippets that are not used by any snippet (see snippets.highlighting)'
+
+    def add_arguments(self, parser):
+        # the fresh ones could be just created for the snippet that is not saved yet
+        parser.add_argument('--older-than', type=int, default=3600, help='Age of rendering in seconds')
+
+    def handle(self, *args, **options):
+        created_before = timezone.now() - timedelta(seconds=options['older_than'])
+        deleted, _ = Rendering.objects.unused().filter(created__lt=created_before).delete()
+        self.stdout.write(f'{deleted} unused renderings were deleted')
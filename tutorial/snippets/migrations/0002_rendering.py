@@ -0,0 +1,68 @@
+# Generated by Django 4.1.1 on 2022-10-20 14:15
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def source_digest(snippet) -> str:
+    # copy of highlighting.source_digest at the moment of migration
+    source = [snippet.code, snippet.language, snippet.style, bool(snippet.linenos), snippet.title]
+    return hashlib.sha256(json.dumps(source, ensure_ascii=False).encode()).hexdigest()
+
+
+def move_highlighted(apps, schema_editor):
+    Snippet = apps.get_model('snippets', 'Snippet')
+    Rendering = apps.get_model('snippets', 'Rendering')
+    using = schema_editor.connection.alias
+
+    for snippet in Snippet.objects.using(using).iterator():
+        if not snippet.highlighted:
+            continue
+        digest = source_digest(snippet)
+        Rendering.objects.using(using).get_or_create(digest=digest, defaults={'html': snippet.highlighted})
+        Snippet.objects.using(using).filter(pk=snippet.pk).update(rendering=digest)
+
+
+def move_rendering(apps, schema_editor):
+    Snippet = apps.get_model('snippets', 'Snippet')
+    using = schema_editor.connection.alias
+
+    for snippet in Snippet.objects.using(using).select_related('rendering').filter(rendering__isnull=False):
+        Snippet.objects.using(using).filter(pk=snippet.pk).update(highlighted=snippet.rendering.html)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Rendering',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('html', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='rendering',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='snippets', to='snippets.rendering'),
+        ),
+        migrations.RunPython(move_highlighted, move_rendering),
+        # default - for the reverse migration, the column is restored before the renderings are moved back
+        migrations.AlterField(
+            model_name='snippet',
+            name='highlighted',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='snippet',
+            name='highlighted',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.1.1 on 2022-10-20 16:40
+
+import hashlib
+import json
+
+from django.db import migrations
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+
+def render_fragments(apps, schema_editor):
+    # copies of highlighting.source_digest and highlighting.render at the moment of migration
+    Snippet = apps.get_model('snippets', 'Snippet')
+    Rendering = apps.get_model('snippets', 'Rendering')
+    using = schema_editor.connection.alias
+
+    rendered = set()
+    for snippet in Snippet.objects.using(using).only('code', 'language', 'linenos').iterator():
+        source = json.dumps(['fragment-1', snippet.code, snippet.language, bool(snippet.linenos)], ensure_ascii=False)
+        digest = hashlib.sha256(source.encode()).hexdigest()
+        if digest not in rendered:
+            formatter = HtmlFormatter(cssclass='highlight', linenos='table' if snippet.linenos else False)
+            html = highlight(snippet.code, get_lexer_by_name(snippet.language), formatter)
+            Rendering.objects.using(using).get_or_create(digest=digest, defaults={'html': html})
+            rendered.add(digest)
+        Snippet.objects.using(using).filter(pk=snippet.pk).update(rendering=digest, highlight_pending=False)
+
+    # full documents with inline css
+    Rendering.objects.using(using).exclude(digest__in=rendered).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0002_rendering'),
+    ]
+
+    operations = [
+        # reverse keeps the fragments
+        migrations.RunPython(render_fragments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.1.1 on 2022-10-21 11:20
+
+from django.db import migrations, models
+import tutorial.snippets.fields
+
+
+# html is copied between the text column and the new binary one, so each column gets the values
+# of its own type in both directions (text is never written to bytea / BLOB and vice versa)
+
+def compress(apps, schema_editor):
+    Rendering = apps.get_model('snippets', 'Rendering')
+    using = schema_editor.connection.alias
+    for digest, html in Rendering.objects.using(using).values_list('pk', 'html').iterator():
+        Rendering.objects.using(using).filter(pk=digest).update(compressed_html=html)
+
+
+def decompress(apps, schema_editor):
+    Rendering = apps.get_model('snippets', 'Rendering')
+    using = schema_editor.connection.alias
+    for digest, html in Rendering.objects.using(using).values_list('pk', 'compressed_html').iterator():
+        Rendering.objects.using(using).filter(pk=digest).update(html=html)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0003_rendering_fragments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='rendering',
+            name='compressed_html',
+            field=tutorial.snippets.fields.CompressedTextField(null=True),
+        ),
+        migrations.RunPython(compress, decompress),
+        # default - for the reverse migration, the column is restored before the values are copied back
+        migrations.AlterField(
+            model_name='rendering',
+            name='html',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='rendering',
+            name='html',
+        ),
+        migrations.RenameField(
+            model_name='rendering',
+            old_name='compressed_html',
+            new_name='html',
+        ),
+        migrations.AlterField(
+            model_name='rendering',
+            name='html',
+            field=tutorial.snippets.fields.CompressedTextField(),
+        ),
+    ]
@@ -1,18 +1,60 @@
-from django.db import models
+from typing import Iterator
+
+from django.db import models, router
+from django.db.models.functions import Substr
 
 # Create your models here.
 
-from pygments.lexers import get_all_lexers
-from pygments.styles import get_all_styles
 from django.contrib.auth.models import User
 
-from pygments.lexers import get_lexer_by_name
-from pygments.formatters.html import HtmlFormatter
-from pygments import highlight
+# lazy, they are loaded on the first access (see choices.py)
+from tutorial.snippets.choices import LANGUAGE_CHOICES, STYLE_CHOICES
+from tutorial.snippets.fields import CompressedTextField
+from tutorial.snippets.highlighting import (
+    SOURCE_FIELDS, get_highlighter, get_render_cache, source_digest, store_rendering
+)
+
+
+class RenderingQuerySet(models.QuerySet):
+
+    def unused(self):
+        return self.filter(snippets__isnull=True)
+
+    def iter_html(self, digest: str, chunk_size=64 * 1024) -> Iterator[str]:
+        """
+            Html of rendering by parts, the stored (compressed) value is read by chunks of chunk_size bytes,
+            so the whole html is never in memory. Nothing if rendering does not exist.
+        """
+        return CompressedTextField.iter_decompress(self._iter_chunks(digest, chunk_size))
+
+    def _iter_chunks(self, digest: str, chunk_size: int):
+        queryset = self.filter(pk=digest)
+        position = 1
+        while True:
+            chunk = queryset.values_list(
+                Substr('html', position, chunk_size, output_field=models.BinaryField()), flat=True
+            ).first()
+            if not chunk:
+                return
+            yield chunk
+            if len(chunk) < chunk_size:
+                return
+            position += chunk_size
+
 
-LEXERS = [item for item in get_all_lexers() if item[1]]
-LANGUAGE_CHOICES = sorted([(item[1][0], item[0]) for item in LEXERS])
-STYLE_CHOICES = sorted([(item, item) for item in get_all_styles()])
+class Rendering(models.Model):
+    """
+        Highlighted html of snippet, it is shared by all snippets with the same source (see highlighting.py)
+    """
+    digest = models.CharField(max_length=64, primary_key=True)
+    # compressed - highlighted html is many times larger than the code (which is stored as is)
+    html = CompressedTextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = RenderingQuerySet.as_manager()
+
+    def __str__(self):
+        return self.digest
 
 
 class Snippet(models.Model):
@@ -23,17 +65,49 @@ class Snippet(models.Model):
     language = models.CharField(choices=LANGUAGE_CHOICES, default='python', max_length=100)
     style = models.CharField(choices=STYLE_CHOICES, default='friendly', max_length=100)
     owner = models.ForeignKey(User, related_name='snippets', on_delete=models.CASCADE)
-    highlighted = models.TextField()
+    rendering = models.ForeignKey(Rendering, related_name='snippets', on_delete=models.PROTECT, null=True,
+                                  editable=False)
+    # rendering is not actual yet (deferred highlighting, see highlighting.py)
+    highlight_pending = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            # cursor pagination of SnippetViewSet
+            models.Index(fields=['created', 'id'], name='snippet_created_id'),
+        ]
+
+    @property
+    def source(self) -> dict:
+        return {name: getattr(self, name) for name in SOURCE_FIELDS}
+
+    @property
+    def highlighted(self) -> str:
+        if self.rendering_id is None:
+            return ''
+
+        render_cache = get_render_cache()
+        html = render_cache.get(self.rendering_id)
+        if html is None:
+            html = self.rendering.html
+            render_cache.set(self.rendering_id, html)
+        return html
 
     def save(self, *args, **kwargs):
-        lexer = get_lexer_by_name(self.language)
-        linenos = 'table' if self.linenos else False
-        options = {'title': self.title} if self.title else {}
-        formatter = HtmlFormatter(style=self.style, linenos=linenos,
-                                  full=True, **options)
-        self.highlighted = highlight(self.code, lexer, formatter)
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        source = self.source
+        digest = source_digest(**source)
+        highlighter = get_highlighter()
+
+        if digest != self.rendering_id:
+            if highlighter is None:
+                self.rendering_id = store_rendering(digest, source, using)
+            elif Rendering.objects.using(using).filter(pk=digest).exists():
+                # identical snippet is rendered already
+                self.rendering_id = digest
 
+        # raw code is stored immediately, rendering (and highlight_pending) are set by the worker
+        self.highlight_pending = digest != self.rendering_id
         super().save(*args, **kwargs)
+        if self.highlight_pending:
+            highlighter.schedule(self.pk, using=using)
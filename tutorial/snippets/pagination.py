@@ -0,0 +1,14 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets
+# File: pagination.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-19 (y-m-d) 8:35 AM
+
+from tutorial.pagination import PageNumberOrCursorPagination
+
+
+class SnippetPagination(PageNumberOrCursorPagination):
+    # backed by index Snippet(created, id)
+    ordering = ('created', 'id')
+    estimate_count = True
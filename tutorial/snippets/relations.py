@@ -0,0 +1,87 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets
+# File: relations.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 9:15 AM
+
+# Hyperlinked fields that build urls by the templates of URLBuilder instead of reverse() per link.
+# URLBuilder is kept in request, each (view_name, lookup kwarg, format) is resolved by reverse() once,
+# its absolute url with the placeholder becomes prefix + <lookup value> + suffix.
+
+from typing import Optional
+from urllib.parse import quote
+
+from django.urls import NoReverseMatch
+from django.utils.http import RFC3986_SUBDELIMS
+from rest_framework import serializers
+from rest_framework.reverse import reverse
+
+# placeholder of lookup value, it should be accepted by lookup regex (converter) of url
+LOOKUP_PLACEHOLDER = 'lookup-value'
+# lookup value is quoted as django.urls.resolvers does (`pchar` of RFC 3986)
+LOOKUP_SAFE = RFC3986_SUBDELIMS + '/~:@'
+
+
+class URLBuilder:
+
+    def __init__(self, request) -> None:
+        self.request = request
+        # (view_name, lookup_url_kwarg, format) -> (prefix, suffix) or None if url can not be templated
+        self.templates: dict[tuple, Optional[tuple[str, str]]] = {}
+
+    def get_template(self, view_name: str, lookup_url_kwarg: str, format=None) -> Optional[tuple[str, str]]:
+        key = (view_name, lookup_url_kwarg, format)
+        try:
+            return self.templates[key]
+        except KeyError:
+            pass
+
+        try:
+            url = reverse(view_name, kwargs={lookup_url_kwarg: LOOKUP_PLACEHOLDER}, request=self.request, format=format)
+        except NoReverseMatch:
+            # placeholder is not accepted by url pattern (int converter ...)
+            template = None
+        else:
+            prefix, _, suffix = url.partition(LOOKUP_PLACEHOLDER)
+            template = (prefix, suffix)
+
+        self.templates[key] = template
+        return template
+
+    def build(self, view_name: str, lookup_url_kwarg: str, lookup_value, format=None) -> str:
+        template = self.get_template(view_name, lookup_url_kwarg, format)
+        if template is None:
+            return reverse(view_name, kwargs={lookup_url_kwarg: lookup_value}, request=self.request, format=format)
+        return f'{template[0]}{quote(str(lookup_value), safe=LOOKUP_SAFE)}{template[1]}'
+
+
+def get_url_builder(request) -> URLBuilder:
+    """
+        URLBuilder of request, it is created by the first call
+    """
+    builder = request.__dict__.get('_url_builder')
+    if builder is None:
+        builder = request.__dict__['_url_builder'] = URLBuilder(request)
+    return builder
+
+
+class TemplatedURLMixin:
+    """
+        get_url() of HyperlinkedRelatedField through URLBuilder of request
+    """
+
+    def get_url(self, obj, view_name, request, format):
+        if request is None or (hasattr(obj, 'pk') and obj.pk in (None, '')):
+            return super().get_url(obj, view_name, request, format)
+
+        lookup_value = getattr(obj, self.lookup_field)
+        return get_url_builder(request).build(view_name, self.lookup_url_kwarg, lookup_value, format)
+
+
+class TemplatedHyperlinkedRelatedField(TemplatedURLMixin, serializers.HyperlinkedRelatedField):
+    pass
+
+
+class TemplatedHyperlinkedIdentityField(TemplatedURLMixin, serializers.HyperlinkedIdentityField):
+    pass
@@ -9,10 +9,13 @@ from django.db.models import Model
 from django.contrib.auth.models import User, AnonymousUser
 
 from rest_framework import serializers
+from rest_framework.fields import flatten_choices_dict, to_choices_dict
 from rest_framework.settings import api_settings
 from rest_framework.exceptions import ValidationError
 
-from tutorial.snippets.models import LANGUAGE_CHOICES, STYLE_CHOICES, Snippet
+from tutorial.snippets.choices import LANGUAGE_CHOICES, STYLE_CHOICES
+from tutorial.snippets.models import Snippet
+from tutorial.snippets.relations import TemplatedHyperlinkedIdentityField, TemplatedHyperlinkedRelatedField
 
 # implementation of
 # https://www.django-rest-framework.org/tutorial/4-authentication-and-permissions/
@@ -23,13 +26,34 @@ from tutorial.snippets.models import LANGUAGE_CHOICES, STYLE_CHOICES, Snippet
 #     Unauthenticated requests should have full read-only access.
 
 
+class LazyChoiceField(serializers.ChoiceField):
+    """
+        ChoiceField that iterates choices on the first use instead of __init__ (see snippets.choices)
+    """
+
+    def _get_resolved(self):
+        if self._resolved is None:
+            grouped_choices = to_choices_dict(self._lazy_choices)
+            choices = flatten_choices_dict(grouped_choices)
+            self._resolved = grouped_choices, choices, {str(key): key for key in choices}
+        return self._resolved
+
+    def _set_choices(self, choices):
+        self._lazy_choices = choices
+        self._resolved = None
+
+    choices = property(lambda self: self._get_resolved()[1], _set_choices)
+    grouped_choices = property(lambda self: self._get_resolved()[0])
+    choice_strings_to_values = property(lambda self: self._get_resolved()[2])
+
+
 class SnippetSerializer(serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     title = serializers.CharField(required=True, allow_blank=True, max_length=100)
     code = serializers.CharField(style={'base_template': 'textarea.html'})
     linenos = serializers.BooleanField(default=False)
-    language = serializers.ChoiceField(choices=LANGUAGE_CHOICES, default='python')
-    style = serializers.ChoiceField(choices=STYLE_CHOICES, default='friendly')
+    language = LazyChoiceField(choices=LANGUAGE_CHOICES, default='python')
+    style = LazyChoiceField(choices=STYLE_CHOICES, default='friendly')
     owner = serializers.ReadOnlyField(source='owner.username')
 
     def create(self, validated_data):
@@ -61,7 +85,9 @@ class SnippetSerializer(serializers.Serializer):
 
 
 class UserModelSerializer(serializers.HyperlinkedModelSerializer):
-    snippets = serializers.HyperlinkedRelatedField(many=True, view_name='snippets:snippet-detail', read_only=True)
+    serializer_url_field = TemplatedHyperlinkedIdentityField
+    # only pk-s of snippets are needed (see UserViewSet)
+    snippets = TemplatedHyperlinkedRelatedField(many=True, view_name='snippets:snippet-detail', read_only=True)
 
     class Meta:
         model = User
@@ -72,13 +98,28 @@ class UserModelSerializer(serializers.HyperlinkedModelSerializer):
 
 
 class SnippetModelSerializer(serializers.HyperlinkedModelSerializer):
+    """
+        fields - names of the fields that will be kept (sparse fieldset), None - all fields
+    """
+    serializer_choice_field = LazyChoiceField
+    # urls are built by templates of request (see relations.py)
+    serializer_url_field = TemplatedHyperlinkedIdentityField
 
     owner = serializers.ReadOnlyField(source='owner.username')
-    highlight = serializers.HyperlinkedIdentityField(view_name='snippets:snippet-highlight', format='html')
+    highlight = TemplatedHyperlinkedIdentityField(view_name='snippets:snippet-highlight', format='html')
+    # html fragment of shared rendering (Snippet.highlighted property), css is served by snippets:snippet-style
+    highlighted = serializers.ReadOnlyField()
 
     class Meta:
         model = Snippet
-        fields = '__all__'  # ['url', 'id', 'highlight', 'owner', 'title', 'code', 'linenos', 'language', 'style']
+        # ['url', 'id', 'highlight', 'owner', 'title', 'code', 'linenos', 'language', 'style', 'highlighted', ...]
+        exclude = ['rendering']
         extra_kwargs = {
             'url': {'view_name': 'snippets:snippet-detail'}
         }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
@@ -0,0 +1,107 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_choices.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-21 (y-m-d) 9:15 AM
+
+# tests for lazy choices of languages and styles (tutorial.snippets.choices)
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+from unittest import mock
+
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from tutorial.snippets import choices
+
+
+class TestLazyChoices(SimpleTestCase):
+
+    def test_lazy(self):
+        loader = mock.Mock(return_value=[('python', 'Python'), ('sql', 'SQL')])
+        lazy = choices.LazyChoices(loader)
+        self.assertEqual('LazyChoices(not loaded)', repr(lazy))
+        loader.assert_not_called()
+
+        self.assertEqual(2, len(lazy))
+        self.assertEqual(('python', 'Python'), lazy[0])
+        self.assertEqual([('python', 'Python'), ('sql', 'SQL')], list(lazy))
+        self.assertEqual(frozenset({'python', 'sql'}), lazy.keys())
+        self.assertEqual(lazy, [('python', 'Python'), ('sql', 'SQL')])
+        loader.assert_called_once()
+
+    def test_not_loaded_by_setup(self):
+        # models and urls of snippets are imported, but Pygments lexers and styles are not enumerated
+        code = (
+            'import django; django.setup()\n'
+            'from django.urls import reverse; reverse("snippets:snippet-list")\n'
+            'from tutorial.snippets import choices; print(choices._choices is None)\n'
+        )
+        env = os.environ | {'DJANGO_SETTINGS_MODULE': 'tutorial.settings'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+        )
+        self.assertEqual('True', result.stdout.strip().splitlines()[-1])
+
+
+class TestChoicesCacheFile(SimpleTestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_file = Path(self.tmp.name) / 'cache' / 'choices.json'
+        # each load_choices() is the first one of process
+        patcher = mock.patch.object(choices, '_choices', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self, stamp: Optional[dict] = None) -> tuple[dict, mock.Mock]:
+        choices._choices = None
+        stamp = stamp or choices.version_stamp()
+        with mock.patch.object(choices, 'version_stamp', return_value=stamp), \
+                mock.patch.object(choices, 'compute_choices', wraps=choices.compute_choices) as compute:
+            return choices.load_choices(), compute
+
+    def test_default_cache_file(self):
+        # under the project directory, not the shared temporary one
+        self.assertEqual(settings.BASE_DIR, choices.get_cache_file().parents[1])
+
+    @override_settings(SNIPPETS_CHOICES_CACHE=None)
+    def test_no_cache_file(self):
+        self.assertIsNone(choices.get_cache_file())
+        with mock.patch.object(choices, 'write_cache') as write_cache:
+            loaded, compute = self.load()
+        compute.assert_called_once()
+        write_cache.assert_not_called()
+        self.assertIn(('python', 'Python'), loaded['languages'])
+
+    def test_cache_file(self):
+        with override_settings(SNIPPETS_CHOICES_CACHE=self.cache_file):
+            computed, compute = self.load()
+            compute.assert_called_once()
+            self.assertTrue(self.cache_file.exists())
+            self.assertEqual(0o644, self.cache_file.stat().st_mode & 0o777)
+
+            # next process reads the file
+            loaded, compute = self.load()
+            compute.assert_not_called()
+            self.assertDictEqual(computed, loaded)
+
+            # other version of Pygments (or its plugins) - file is rewritten
+            stamp = choices.version_stamp() | {'pygments': '0.0'}
+            loaded, compute = self.load(stamp)
+            compute.assert_called_once()
+            self.assertEqual(stamp, json.loads(self.cache_file.read_text())['stamp'])
+
+            # broken file
+            self.cache_file.write_text('{')
+            loaded, compute = self.load()
+            compute.assert_called_once()
+            self.assertDictEqual(computed, loaded)
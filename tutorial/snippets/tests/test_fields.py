@@ -0,0 +1,74 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_fields.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-21 (y-m-d) 12:10 PM
+
+# tests for tutorial.snippets.fields.CompressedTextField
+
+from django.db import connection
+from django.test import TestCase
+
+from tutorial.snippets.fields import COMPRESSED, RAW, CompressedTextField
+from tutorial.snippets.models import Rendering
+
+# multi-byte characters, so the chunks split them
+LONG_TEXT = '<span class="s">Привіт, світ € 𝄞</span>\n' * 500
+
+
+class TestCompressedTextField(TestCase):
+
+    values = {
+        'short': '<p>short</p>',
+        'empty': '',
+        'long': LONG_TEXT,
+        # looks like the prefix of stored value
+        'zero prefix': '\x00z not compressed',
+    }
+
+    def stored(self, digest: str) -> bytes:
+        table = Rendering._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT html FROM {table} WHERE digest = %s', [digest])
+            return bytes(cursor.fetchone()[0])
+
+    def test_round_trip(self):
+        for name, value in self.values.items():
+            with self.subTest(name):
+                Rendering.objects.create(digest=name, html=value)
+                self.assertEqual(value, Rendering.objects.get(pk=name).html)
+
+        self.assertEqual(b'<p>short</p>', self.stored('short'))
+        self.assertEqual(RAW + b'\x00z not compressed', self.stored('zero prefix'))
+        stored = self.stored('long')
+        self.assertTrue(stored.startswith(COMPRESSED))
+        self.assertLess(len(stored), len(LONG_TEXT.encode()) / 10)
+
+    def test_exact_lookup(self):
+        for name, value in self.values.items():
+            Rendering.objects.create(digest=name, html=value)
+
+        for name, value in self.values.items():
+            with self.subTest(name):
+                self.assertListEqual([name], list(Rendering.objects.filter(html=value).values_list('pk', flat=True)))
+        self.assertFalse(Rendering.objects.filter(html=LONG_TEXT + ' ').exists())
+
+    def test_legacy_text(self):
+        self.assertEqual('legacy', CompressedTextField.decompress('legacy'))
+        self.assertEqual('legacy', ''.join(CompressedTextField.iter_decompress(['leg', 'acy'])))
+
+    def test_iter_decompress(self):
+        for name, value in self.values.items():
+            stored = CompressedTextField.compress(value)
+            for chunk_size in (1, 2, 3, 7, 1024, len(stored) + 1):
+                with self.subTest(name, chunk_size=chunk_size):
+                    chunks = [stored[i:i + chunk_size] for i in range(0, len(stored), chunk_size)]
+                    self.assertEqual(value, ''.join(CompressedTextField.iter_decompress(chunks)))
+
+    def test_iter_html(self):
+        Rendering.objects.create(digest='long', html=LONG_TEXT)
+        for chunk_size in (5, 64, 64 * 1024):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(LONG_TEXT, ''.join(Rendering.objects.iter_html('long', chunk_size)))
+        self.assertListEqual([], list(Rendering.objects.iter_html('does not exist')))
@@ -0,0 +1,125 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_fieldsets.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 3:40 PM
+
+# tests for sparse fieldsets (?fields=) of
+# router.register('snippets', views.SnippetViewSet)
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from tutorial.snippets import views
+from tutorial.snippets.models import Snippet
+
+
+class TestSparseFieldsets(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test', password='12345678')
+        self.snippets = [
+            Snippet.objects.create(code=f'foo = {i}\n', title=f'title {i}', owner=self.user) for i in range(3)
+        ]
+
+    def get_snippet_queries(self, url, data=None) -> tuple:
+        """
+            response and SELECT-s of snippets table (COUNT(*) of pagination is not included)
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, data)
+        table = f'FROM "{Snippet._meta.db_table}"'
+        return response, [query['sql'] for query in queries
+                          if table in query['sql'] and 'COUNT(*)' not in query['sql']]
+
+    def assertColumns(self, sql: str, included=(), excluded=()):
+        for column in included:
+            self.assertIn(column, sql)
+        for column in excluded:
+            self.assertNotIn(column, sql)
+
+    def test_list(self):
+        url = reverse('snippets:snippet-list')
+        response, queries = self.get_snippet_queries(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for item in response.data['results']:
+            self.assertListEqual(list(views.SnippetFieldsetMixin.list_fields), list(item))
+
+        # heavy columns are not selected by default
+        self.assertColumns(queries[-1], included=('"title"',), excluded=('"code"', '"html"'))
+
+        response, queries = self.get_snippet_queries(url, {'fields': 'title, owner,title'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertListEqual(
+            [{'title': snippet.title, 'owner': 'test'} for snippet in self.snippets],
+            [dict(item) for item in response.data['results']]
+        )
+        # the ordering of pagination is selected too, so nothing is loaded per instance
+        self.assertEqual(1, len(queries))
+        self.assertColumns(
+            queries[0],
+            included=('"title"', '"username"', '"created"'),
+            excluded=('"code"', '"language"', '"style"', '"html"')
+        )
+
+    def test_list_cursor(self):
+        response, queries = self.get_snippet_queries(
+            reverse('snippets:snippet-list'), {'fields': 'title', 'pagination': 'cursor'}
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertListEqual([{'title': snippet.title} for snippet in self.snippets], response.data['results'])
+        self.assertEqual(1, len(queries))
+        self.assertColumns(queries[0], included=('"title"', '"created"'), excluded=('"code"', '"owner_id"'))
+
+    def test_highlighted(self):
+        response, queries = self.get_snippet_queries(
+            reverse('snippets:snippet-list'), {'fields': 'code,highlighted'}
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertListEqual(
+            [{'code': snippet.code, 'highlighted': snippet.highlighted} for snippet in self.snippets],
+            response.data['results']
+        )
+        # rendering is joined
+        self.assertEqual(1, len(queries))
+        self.assertColumns(queries[0], included=('"code"', '"html"'), excluded=('"title"',))
+
+    def test_retrieve(self):
+        snippet = self.snippets[0]
+        url = reverse('snippets:snippet-detail', kwargs={'pk': snippet.pk})
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertIn('code', response.data)
+        self.assertIn('highlighted', response.data)
+
+        response, queries = self.get_snippet_queries(url, {'fields': 'language,title'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertDictEqual({'language': snippet.language, 'title': snippet.title}, response.data)
+        self.assertEqual(1, len(queries))
+        self.assertColumns(queries[0], included=('"language"', '"title"'), excluded=('"code"', '"style"', '"html"'))
+
+    def test_unknown(self):
+        for url in (reverse('snippets:snippet-list'),
+                    reverse('snippets:snippet-detail', kwargs={'pk': self.snippets[0].pk})):
+            with self.subTest(url=url):
+                response, queries = self.get_snippet_queries(url, {'fields': 'title,unknown,rendering'})
+                self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+                self.assertDictEqual({'fields': ['Unknown fields: rendering, unknown']}, response.data)
+                self.assertListEqual([], queries)
+
+    def test_writes(self):
+        # ?fields= is ignored by writes
+        snippet = self.snippets[0]
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            f'{reverse("snippets:snippet-detail", kwargs={"pk": snippet.pk})}?fields=unknown', {'title': 'new'}
+        )
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('new', response.data['title'])
+        self.assertEqual(snippet.code, response.data['code'])
+        self.assertIn('highlighted', response.data)
@@ -0,0 +1,99 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_highlighting.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 2:35 PM
+
+# tests for deferred highlighting (tutorial.snippets.highlighting.Highlighter) and
+# path('snippets/<pk>/highlight/', ..., name='snippet-highlight')
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from tutorial.snippets import highlighting, views
+from tutorial.snippets.models import Snippet
+
+
+@override_settings(SNIPPETS_HIGHLIGHTER={'WORKERS': 1, 'PROCESSES': 0})
+class TestHighlighter(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test', password='12345678')
+        highlighting.get_render_cache().clear()
+
+    def create_snippet(self, code: str) -> Snippet:
+        # scheduled jobs are not run - the tests run them by highlight()
+        with self.captureOnCommitCallbacks() as callbacks:
+            snippet = Snippet.objects.create(code=code, owner=self.user)
+        self.assertEqual(1, len(callbacks))
+        return snippet
+
+    def test_synchronous_by_default(self):
+        with override_settings(SNIPPETS_HIGHLIGHTER=None):
+            snippet = Snippet.objects.create(code='foo = "bar"\n', owner=self.user)
+        self.assertFalse(snippet.highlight_pending)
+        self.assertIn('<span', snippet.highlighted)
+
+    def test_highlight(self):
+        snippet = self.create_snippet('foo = "bar"\n')
+        self.assertTrue(snippet.highlight_pending)
+        self.assertIsNone(snippet.rendering_id)
+
+        self.assertTrue(highlighting.get_highlighter().highlight(snippet.pk))
+        snippet.refresh_from_db()
+        self.assertFalse(snippet.highlight_pending)
+        self.assertEqual(highlighting.source_digest(**snippet.source), snippet.rendering_id)
+
+    def test_later_save_wins(self):
+        snippet = self.create_snippet('first = 1\n')
+        highlighter = highlighting.get_highlighter()
+
+        def save_during_render(**source):
+            # the snippet is saved again while the job of the first save renders it
+            second = Snippet.objects.get(pk=snippet.pk)
+            second.code = 'second = 2\n'
+            with self.captureOnCommitCallbacks():
+                second.save()
+            return highlighting.render(**source)
+
+        with mock.patch.object(highlighter, 'render', side_effect=save_during_render):
+            self.assertFalse(highlighter.highlight(snippet.pk))
+
+        # rendering of the first code is not assigned to the second one
+        snippet.refresh_from_db()
+        self.assertTrue(snippet.highlight_pending)
+        self.assertIsNone(snippet.rendering_id)
+
+        # job of the second save
+        self.assertTrue(highlighter.highlight(snippet.pk))
+        snippet.refresh_from_db()
+        self.assertFalse(snippet.highlight_pending)
+        self.assertEqual(highlighting.source_digest('second = 2\n', 'python', False), snippet.rendering_id)
+        self.assertIn('second', snippet.highlighted)
+
+    def test_deleted_meanwhile(self):
+        snippet = self.create_snippet('foo = 1\n')
+        Snippet.objects.filter(pk=snippet.pk).delete()
+        self.assertFalse(highlighting.get_highlighter().highlight(snippet.pk))
+
+    def test_pending_response(self):
+        snippet = self.create_snippet('foo = "bar"\n')
+        url = reverse('snippets:snippet-highlight', kwargs={'pk': snippet.pk})
+
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+        self.assertEqual(str(views.HIGHLIGHT_RETRY_AFTER), response.headers['Retry-After'])
+        self.assertEqual(views.HIGHLIGHT_PENDING_HTML, response.content.decode())
+
+        highlighting.get_highlighter().highlight(snippet.pk)
+        response = self.client.get(url)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotIn('Retry-After', response.headers)
+        html = b''.join(response.streaming_content).decode()
+        self.assertIn('<span', html)
@@ -0,0 +1,116 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_migrations.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 4:10 PM
+
+# tests for data migrations of snippets
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TransactionTestCase
+
+from tutorial.snippets.fields import COMPRESSED
+
+
+class MigrationTestCase(TransactionTestCase):
+
+    app_label = 'snippets'
+
+    def migrate(self, name: str):
+        """
+            Migrates snippets to migration `name` (forward or backward), returns apps of its state
+        """
+        executor = MigrationExecutor(connection)
+        target = [(self.app_label, name)]
+        executor.migrate(target)
+        return MigrationExecutor(connection).loader.project_state(target).apps
+
+    def tearDown(self) -> None:
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes(self.app_label))
+        super().tearDown()
+
+    def create_user(self, apps):
+        return apps.get_model('auth', 'User').objects.create(username='test')
+
+
+class TestRenderingMigration(MigrationTestCase):
+
+    def test_move_highlighted(self):
+        apps = self.migrate('0001_initial')
+        Snippet = apps.get_model('snippets', 'Snippet')
+        owner = self.create_user(apps)
+        same = [Snippet.objects.create(code='a = 1', highlighted='<html>a</html>', owner=owner) for _ in range(2)]
+        other = Snippet.objects.create(code='b = 2', highlighted='<html>b</html>', owner=owner)
+        empty = Snippet.objects.create(code='c = 3', highlighted='', owner=owner)
+
+        apps = self.migrate('0002_rendering')
+        Snippet, Rendering = apps.get_model('snippets', 'Snippet'), apps.get_model('snippets', 'Rendering')
+        # identical snippets share one rendering
+        self.assertEqual(2, Rendering.objects.count())
+        renderings = dict(Snippet.objects.values_list('pk', 'rendering'))
+        self.assertEqual(renderings[same[0].pk], renderings[same[1].pk])
+        self.assertNotEqual(renderings[same[0].pk], renderings[other.pk])
+        self.assertIsNone(renderings[empty.pk])
+        self.assertEqual('<html>b</html>', Rendering.objects.get(pk=renderings[other.pk]).html)
+
+        apps = self.migrate('0001_initial')
+        Snippet = apps.get_model('snippets', 'Snippet')
+        self.assertDictEqual(
+            {same[0].pk: '<html>a</html>', same[1].pk: '<html>a</html>', other.pk: '<html>b</html>', empty.pk: ''},
+            dict(Snippet.objects.values_list('pk', 'highlighted'))
+        )
+
+
+class TestFragmentsMigration(MigrationTestCase):
+
+    def test_render_fragments(self):
+        apps = self.migrate('0002_rendering')
+        Snippet, Rendering = apps.get_model('snippets', 'Snippet'), apps.get_model('snippets', 'Rendering')
+        owner = self.create_user(apps)
+        # full documents with inline css per style
+        for digest, style in (('a' * 64, 'friendly'), ('b' * 64, 'monokai')):
+            rendering = Rendering.objects.create(digest=digest, html=f'<html>{style}</html>')
+            Snippet.objects.create(code='a = 1\n', style=style, owner=owner, rendering=rendering)
+        pending = Snippet.objects.create(code='b = 2\n', linenos=True, owner=owner, highlight_pending=True)
+
+        apps = self.migrate('0003_rendering_fragments')
+        Snippet, Rendering = apps.get_model('snippets', 'Snippet'), apps.get_model('snippets', 'Rendering')
+        # fragments do not depend on style, old documents are deleted
+        self.assertEqual(2, Rendering.objects.count())
+        self.assertEqual(1, Snippet.objects.filter(code='a = 1\n').values('rendering').distinct().count())
+        for rendering in Rendering.objects.all():
+            self.assertTrue(rendering.html.startswith('<div class="highlight">'))
+        pending = Snippet.objects.select_related('rendering').get(pk=pending.pk)
+        self.assertFalse(pending.highlight_pending)
+        self.assertIn('linenos', pending.rendering.html)
+
+
+class TestCompressedTextMigration(MigrationTestCase):
+
+    def column_values(self) -> dict:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT digest, html FROM snippets_rendering')
+            return dict(cursor.fetchall())
+
+    def test_compress(self):
+        long_html = '<span>Привіт</span>\n' * 1000
+        apps = self.migrate('0003_rendering_fragments')
+        Rendering = apps.get_model('snippets', 'Rendering')
+        Rendering.objects.create(digest='long', html=long_html)
+        Rendering.objects.create(digest='short', html='<p>short</p>')
+
+        apps = self.migrate('0004_compressed_text')
+        Rendering = apps.get_model('snippets', 'Rendering')
+        self.assertDictEqual(
+            {'long': long_html, 'short': '<p>short</p>'}, dict(Rendering.objects.values_list('pk', 'html'))
+        )
+        stored = self.column_values()
+        self.assertIsInstance(stored['long'], bytes)
+        self.assertTrue(stored['long'].startswith(COMPRESSED))
+
+        # text is written into the text column
+        self.migrate('0003_rendering_fragments')
+        self.assertDictEqual({'long': long_html, 'short': '<p>short</p>'}, self.column_values())
@@ -0,0 +1,69 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_query_budget.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 5:35 PM
+
+# tests for `query_budget` of
+# router.register('snippets', views.SnippetViewSet)
+# they are enforced by the test runner (see tutorial/runner.py)
+
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from tutorial.middleware import QueryBudgetExceeded
+from tutorial.snippets import highlighting, views
+from tutorial.snippets.models import Snippet
+
+
+class TestSnippetsQueryBudget(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test', password='12345678')
+        self.snippets = [
+            Snippet.objects.create(code=f'foo = {i}\n', title=f'title {i}', owner=self.user) for i in range(15)
+        ]
+        highlighting.get_render_cache().clear()
+
+    def get_urls(self) -> dict:
+        pk = self.snippets[0].pk
+        return {
+            'list': reverse('snippets:snippet-list'),
+            'retrieve': reverse('snippets:snippet-detail', kwargs={'pk': pk}),
+            'highlight': reverse('snippets:snippet-highlight', kwargs={'pk': pk}),
+        }
+
+    def assertWithinBudget(self, data=None):
+        for action, url in self.get_urls().items():
+            with self.subTest(action=action, data=data):
+                # QueryBudgetExceeded is raised by the middleware otherwise
+                response = self.client.get(url, data)
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+                self.assertEqual(str(views.SnippetViewSet.query_budget[action]),
+                                 response.headers['X-DB-Query-Budget'])
+                self.assertLessEqual(int(response.headers['X-DB-Queries']),
+                                     views.SnippetViewSet.query_budget[action])
+
+    def test_enforced(self):
+        self.assertTrue(settings.QUERY_BUDGET['RAISE'])
+        with mock.patch.object(views.SnippetViewSet, 'query_budget', {'list': 0}), \
+                self.assertLogs('tutorial.queries', 'WARNING'), self.assertRaises(QueryBudgetExceeded):
+            self.client.get(self.get_urls()['list'])
+
+    def test_anonymous(self):
+        self.assertWithinBudget()
+        self.assertWithinBudget({'pagination': 'cursor'})
+        self.assertWithinBudget({'fields': 'title,owner,highlighted'})
+
+    def test_session(self):
+        # authentication takes 2 queries (session and user)
+        self.client.login(username='test', password='12345678')
+        self.assertWithinBudget()
+        self.assertWithinBudget({'pagination': 'cursor'})
+        self.assertWithinBudget({'fields': 'title,owner,highlighted'})
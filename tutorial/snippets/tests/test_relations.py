@@ -0,0 +1,103 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_relations.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 4:45 PM
+
+# tests for urls of tutorial.snippets.relations.URLBuilder (templated hyperlinks)
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import clear_script_prefix, set_script_prefix
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from tutorial.snippets import relations
+from tutorial.snippets.models import Snippet
+from tutorial.snippets.serializers import SnippetModelSerializer, UserModelSerializer
+
+
+class TestURLBuilder(APITestCase):
+
+    # view_name, lookup_url_kwarg, format
+    routes = [
+        ('snippets:snippet-detail', 'pk', None),
+        ('snippets:snippet-detail', 'pk', 'json'),
+        ('snippets:snippet-highlight', 'pk', 'html'),
+        ('snippets:user-detail', 'pk', None),
+        ('snippets:snippet-style', 'style', None),
+    ]
+    lookup_values = [1, 1234567, 'monokai', 'a b', 'a:b@c', 'ünï', "a'(b)*"]
+
+    def get_request(self, path='/', **extra) -> Request:
+        return Request(APIRequestFactory().get(path, **extra))
+
+    def assertReversed(self, request):
+        builder = relations.get_url_builder(request)
+        for view_name, lookup_url_kwarg, format in self.routes:
+            for value in self.lookup_values:
+                with self.subTest(view_name=view_name, format=format, value=value):
+                    self.assertEqual(
+                        reverse(view_name, kwargs={lookup_url_kwarg: value}, request=request, format=format),
+                        builder.build(view_name, lookup_url_kwarg, value, format)
+                    )
+
+    def test_build(self):
+        self.assertReversed(self.get_request())
+        with override_settings(ALLOWED_HOSTS=['example.com']):
+            self.assertReversed(self.get_request(secure=True, HTTP_HOST='example.com:8443'))
+        try:
+            set_script_prefix('/prefix/')
+            self.assertReversed(self.get_request())
+        finally:
+            clear_script_prefix()
+
+    def test_templates(self):
+        request = self.get_request()
+        builder = relations.get_url_builder(request)
+        self.assertIs(builder, relations.get_url_builder(request))
+        self.assertIsNot(builder, relations.get_url_builder(self.get_request()))
+
+        with mock.patch.object(relations, 'reverse', wraps=relations.reverse) as reverse_mock:
+            for pk in range(5):
+                builder.build('snippets:snippet-detail', 'pk', pk)
+                builder.build('snippets:snippet-highlight', 'pk', pk, 'html')
+            # each route is resolved once
+            self.assertEqual(2, reverse_mock.call_count)
+
+            # placeholder is not accepted by <int:pk>, reverse() per url
+            for pk in range(3):
+                self.assertEqual(
+                    reverse('pollsapi:poll_detail', kwargs={'pk': pk}, request=request),
+                    builder.build('pollsapi:poll_detail', 'pk', pk)
+                )
+            self.assertEqual(2 + 1 + 3, reverse_mock.call_count)
+        self.assertIsNone(builder.templates[('pollsapi:poll_detail', 'pk', None)])
+
+    def test_serializers(self):
+        # the same urls as stock hyperlinked fields
+        user = User.objects.create_user(username='test', password='12345678')
+        snippets = [Snippet.objects.create(code=f'foo = {i}\n', owner=user) for i in range(3)]
+        detail = serializers.HyperlinkedIdentityField(view_name='snippets:snippet-detail')
+        highlight = serializers.HyperlinkedIdentityField(view_name='snippets:snippet-highlight', format='html')
+        user_detail = serializers.HyperlinkedIdentityField(view_name='snippets:user-detail')
+
+        for context in ({'request': self.get_request()}, {'request': self.get_request(), 'format': 'json'},
+                        {'request': None}):
+            with self.subTest(format=context.get('format'), request=context['request']):
+                for field in (detail, highlight, user_detail):
+                    field._context = context
+
+                for snippet in snippets:
+                    data = SnippetModelSerializer(snippet, context=context).data
+                    self.assertEqual(detail.to_representation(snippet), data['url'])
+                    self.assertEqual(highlight.to_representation(snippet), data['highlight'])
+
+                data = UserModelSerializer(user, context=context).data
+                self.assertEqual(user_detail.to_representation(user), data['url'])
+                self.assertListEqual([detail.to_representation(snippet) for snippet in snippets], data['snippets'])
@@ -0,0 +1,136 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_renderings.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 3:30 PM
+
+# tests for content addressed renderings of snippets (tutorial.snippets.highlighting)
+# streamed html of
+# router.register('snippets', views.SnippetViewSet) - action highlight
+# and management command prune_renderings
+
+import io
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.functions import Length
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from tutorial.snippets import highlighting, views
+from tutorial.snippets.models import Rendering, RenderingQuerySet, Snippet
+
+
+class TestRenderings(TestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test', password='12345678')
+        highlighting.get_render_cache().clear()
+
+    def create_snippet(self, code='foo = "bar"\n', **kwargs) -> Snippet:
+        return Snippet.objects.create(code=code, owner=self.user, **kwargs)
+
+    def test_digest_dedup(self):
+        with mock.patch.object(highlighting, 'highlight', wraps=highlighting.highlight) as pygments:
+            first = self.create_snippet(title='first')
+            # the same source - other title (and style) are not the part of rendering
+            second = self.create_snippet(title='second', style='monokai')
+            self.assertEqual(1, pygments.call_count)
+
+            self.assertEqual(first.rendering_id, second.rendering_id)
+            self.assertEqual(highlighting.source_digest(**first.source), first.rendering_id)
+            self.assertEqual(1, Rendering.objects.count())
+
+            # re-save with unchanged source skips Pygments even if rendering is not in the render cache
+            highlighting.get_render_cache().clear()
+            first.title = 'changed'
+            first.save()
+            self.assertEqual(1, pygments.call_count)
+
+            # changed source - new rendering, the old one is still used by the second snippet
+            first.linenos = True
+            first.save()
+            self.assertEqual(2, pygments.call_count)
+            self.assertNotEqual(first.rendering_id, second.rendering_id)
+            self.assertEqual(2, Rendering.objects.count())
+            self.assertIn('linenos', first.highlighted)
+
+    def test_render_cache(self):
+        snippet = Snippet.objects.get(pk=self.create_snippet().pk)
+        # html is cached by save()
+        with self.assertNumQueries(0):
+            html = snippet.highlighted
+        self.assertIn('class="highlight"', html)
+
+        highlighting.get_render_cache().clear()
+        snippet = Snippet.objects.get(pk=snippet.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(html, snippet.highlighted)
+        # the other instance of snippet reads it from the render cache
+        other = Snippet.objects.get(pk=snippet.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(html, other.highlighted)
+
+    def test_highlight_streaming(self):
+        # many lines that are not compressed to nothing
+        snippet = self.create_snippet(code=''.join(f'value_{i} = {i * 7919}\n' for i in range(300)), title='big')
+        url = reverse('snippets:snippet-highlight', kwargs={'pk': snippet.pk})
+        fragment = snippet.highlighted
+        expected = highlighting.page(fragment, 'big', f'http://testserver{views.style_url(snippet.style)}')
+        # size of the stored (compressed) value
+        stored = Rendering.objects.filter(pk=snippet.rendering_id).values_list(Length('html'), flat=True).get()
+        chunk_size = 256
+
+        highlighting.get_render_cache().clear()
+        with mock.patch.object(RenderingQuerySet.iter_html, '__defaults__', (chunk_size,)):
+            response = self.client.get(url)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            self.assertIsInstance(response, StreamingHttpResponse)
+            # html is read from the database while the response is consumed, one query per chunk
+            with CaptureQueriesContext(connection) as queries:
+                parts = [part.decode() for part in response.streaming_content]
+
+        self.assertEqual(stored // chunk_size + 1, len(queries))
+        self.assertGreater(len(parts), 4)
+        self.assertLess(max(len(part) for part in parts[1:-1]), len(fragment))
+        self.assertEqual(expected, ''.join(parts))
+        # streamed html is not put in the render cache
+        self.assertIsNone(highlighting.get_render_cache().get(snippet.rendering_id))
+
+        # from the render cache - as the whole
+        highlighting.get_render_cache().set(snippet.rendering_id, fragment)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+            parts = [part.decode() for part in response.streaming_content]
+        self.assertEqual(3, len(parts))
+        self.assertEqual(expected, ''.join(parts))
+
+    def test_prune_renderings(self):
+        used = self.create_snippet()
+        unused_old = self.create_snippet(code='old = 1\n')
+        unused_fresh = self.create_snippet(code='fresh = 1\n')
+        old = timezone.now() - timedelta(hours=2)
+        Rendering.objects.filter(pk__in=[used.rendering_id, unused_old.rendering_id]).update(created=old)
+        Snippet.objects.filter(pk__in=[unused_old.pk, unused_fresh.pk]).delete()
+        self.assertSetEqual(
+            {unused_old.rendering_id, unused_fresh.rendering_id},
+            set(Rendering.objects.unused().values_list('pk', flat=True))
+        )
+
+        stdout = io.StringIO()
+        call_command('prune_renderings', stdout=stdout)
+        self.assertEqual('1 unused renderings were deleted', stdout.getvalue().strip())
+        self.assertSetEqual(
+            {used.rendering_id, unused_fresh.rendering_id}, set(Rendering.objects.values_list('pk', flat=True))
+        )
+
+        call_command('prune_renderings', older_than=0, stdout=io.StringIO())
+        self.assertListEqual([used.rendering_id], list(Rendering.objects.values_list('pk', flat=True)))
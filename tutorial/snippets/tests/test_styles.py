@@ -0,0 +1,61 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_styles.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-20 (y-m-d) 5:20 PM
+
+# tests for highlighted fragments and
+# path('styles/<str:style>.css', views.snippet_style, name='snippet-style'),
+
+import pygments
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from tutorial.snippets import highlighting, views
+from tutorial.snippets.models import Snippet
+
+
+class TestStyles(APITestCase):
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username='test', password='12345678')
+
+    def test_fragment(self):
+        snippet = Snippet.objects.create(code='foo = "bar"\n', title='<b>title</b>', style='monokai', owner=self.user)
+        html = snippet.highlighted
+        # fragment with css classes only
+        self.assertTrue(html.startswith(f'<div class="{highlighting.CSS_CLASS}">'))
+        self.assertNotIn('<html', html)
+        self.assertNotIn('style=', html)
+
+        response = self.client.get(reverse('snippets:snippet-highlight', kwargs={'pk': snippet.pk}))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        page = b''.join(response.streaming_content).decode()
+        css_url = reverse('snippets:snippet-style', kwargs={'style': 'monokai'})
+        self.assertIn(f'<link rel="stylesheet" href="http://testserver{css_url}?v={pygments.__version__}">', page)
+        self.assertIn(html, page)
+        # title is escaped
+        self.assertIn('<title>&lt;b&gt;title&lt;/b&gt;</title>', page)
+
+    def test_style(self):
+        response = self.client.get(reverse('snippets:snippet-style', kwargs={'style': 'monokai'}))
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual('text/css; charset=utf-8', response.headers['Content-Type'])
+        self.assertEqual(highlighting.style_css('monokai'), response.content.decode())
+        self.assertIn(f'.{highlighting.CSS_CLASS} ', response.content.decode())
+        self.assertSetEqual(
+            {'public', f'max-age={views.STYLE_MAX_AGE}', 'immutable'},
+            {part.strip() for part in response.headers['Cache-Control'].split(',')}
+        )
+
+        self.assertEqual(
+            status.HTTP_404_NOT_FOUND,
+            self.client.get(reverse('snippets:snippet-style', kwargs={'style': 'unknown'})).status_code
+        )
+        self.assertEqual(
+            status.HTTP_405_METHOD_NOT_ALLOWED,
+            self.client.post(reverse('snippets:snippet-style', kwargs={'style': 'monokai'})).status_code
+        )
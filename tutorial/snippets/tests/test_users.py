@@ -0,0 +1,71 @@
+# IDE: PyCharm
+# Project: drf
+# Path: tutorial/snippets/tests
+# File: test_users.py
+# Contact: Semyon Mamonov <semyon.mamonov@gmail.com>
+# Created by ox23 at 2022-10-22 (y-m-d) 4:10 PM
+
+# tests for hyperlinked snippets of users
+# router.register('users', views.UserViewSet)
+
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from tutorial.snippets.models import Snippet
+
+
+class TestUsers(APITestCase):
+
+    def setUp(self) -> None:
+        # users are visible to the authenticated ones only (default permission)
+        self.client.force_authenticate(User.objects.create_user(username='test', password='12345678'))
+
+    def create_users(self, count, snippets_per_user=3) -> list[User]:
+        users = []
+        for i in range(count):
+            user = User.objects.create_user(username=f'user {len(users)} of {count}', password='12345678')
+            for j in range(snippets_per_user):
+                Snippet.objects.create(code=f'foo = {i * snippets_per_user + j}\n', owner=user)
+            users.append(user)
+        return users
+
+    def get_snippet_urls(self, user: User) -> list[str]:
+        return sorted(
+            reverse('snippets:snippet-detail', kwargs={'pk': pk}, request=self.response.wsgi_request)
+            for pk in Snippet.objects.filter(owner=user).values_list('pk', flat=True)
+        )
+
+    def test_list(self):
+        url = reverse('snippets:user-list')
+        # the same number of queries for 2 and 10 users (count, users, snippets of page)
+        for count in (1, 8):
+            with self.subTest(users=User.objects.count() + count):
+                self.create_users(count)
+                with self.assertNumQueries(3):
+                    self.response = self.client.get(url)
+                self.assertEqual(status.HTTP_200_OK, self.response.status_code)
+
+                results = self.response.data['results']
+                self.assertEqual(User.objects.count(), len(results))
+                for item in results:
+                    user = User.objects.get(pk=item['id'])
+                    self.assertEqual(user.username, item['username'])
+                    self.assertEqual(
+                        reverse('snippets:user-detail', kwargs={'pk': user.pk}, request=self.response.wsgi_request),
+                        item['url']
+                    )
+                    self.assertListEqual(self.get_snippet_urls(user), sorted(item['snippets']))
+
+    def test_retrieve(self):
+        user = self.create_users(1, snippets_per_user=5)[0]
+        with self.assertNumQueries(2):
+            self.response = self.client.get(reverse('snippets:user-detail', kwargs={'pk': user.pk}))
+        self.assertEqual(status.HTTP_200_OK, self.response.status_code)
+        self.assertListEqual(self.get_snippet_urls(user), sorted(self.response.data['snippets']))
+
+        # without snippets
+        user = User.objects.create_user(username='empty', password='12345678')
+        self.response = self.client.get(reverse('snippets:user-detail', kwargs={'pk': user.pk}))
+        self.assertListEqual([], self.response.data['snippets'])
@@ -17,5 +17,6 @@ router.register('users', views.UserViewSet)
 app_name = 'snippets'
 
 urlpatterns = [
+    path('styles/<str:style>.css', views.snippet_style, name='snippet-style'),
     *router.urls
 ]
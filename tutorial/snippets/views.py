@@ -1,16 +1,28 @@
+import itertools
+from typing import Optional
+
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from django.shortcuts import render
 
 # Create your views here.
 from django.views.decorators.csrf import csrf_exempt
 from rest_framework import status, permissions, renderers
 from rest_framework.decorators import api_view, action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import JSONParser
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+import pygments
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 
-from tutorial.snippets.models import Snippet
+from tutorial.metrics import ViewMetricsMixin
+from tutorial.snippets import highlighting
+from tutorial.snippets.choices import STYLE_CHOICES
+from tutorial.snippets.models import Rendering, Snippet
+from tutorial.snippets.pagination import SnippetPagination
 from tutorial.snippets.permissions import IsOwnerOrReadOnly
 from tutorial.snippets.serializers import SnippetSerializer, SnippetModelSerializer, UserModelSerializer
 from rest_framework.urlpatterns import format_suffix_patterns
@@ -64,6 +76,10 @@ def snippet_detail(request, pk):
         return HttpResponse(status=status.HTTP_204_NO_CONTENT)
 
 
+# pk-s of snippets for hyperlinks of UserModelSerializer, in one query for all users of page
+USER_SNIPPETS_PREFETCH = Prefetch('snippets', queryset=Snippet.objects.only('pk', 'owner'))
+
+
 class SnippetCreateList(ListModelMixin, CreateModelMixin, generics.GenericAPIView):
     queryset = Snippet.objects.all()
     serializer_class = SnippetSerializer
@@ -89,7 +105,72 @@ class SnippetRetrieveUpdateDelete(RetrieveModelMixin, UpdateModelMixin, DestroyM
         return super().destroy(request, *args, **kwargs)
 
 
-class SnippetCreateListConcise(generics.ListCreateAPIView):
+class SparseFieldsetMixin:
+    """
+        ?fields=title,owner - only these fields are serialized and only their columns are selected (GET only).
+        Without it the list is serialized by `list_fields` (heavy columns are not selected), retrieve - by all.
+    """
+    fields_query_param = 'fields'
+    # fields of list without ?fields=, None - all
+    list_fields: Optional[tuple] = None
+    # serializer field -> columns of model (related ones through '__'), by default the column with the same name
+    field_columns: dict = {}
+
+    def get_sparse_fields(self) -> Optional[tuple]:
+        if self.request is None or self.request.method != 'GET':
+            # schema generation, writes
+            return None
+
+        fields = self.request.query_params.get(self.fields_query_param)
+        if fields is None:
+            # generic views (not viewsets) with this mixin are the list views
+            return self.list_fields if getattr(self, 'action', 'list') == 'list' else None
+
+        fields = tuple(dict.fromkeys(name.strip() for name in fields.split(',') if name.strip()))
+        unknown = set(fields) - set(self.get_serializer_class()(context=self.get_serializer_context()).fields)
+        if unknown:
+            raise ValidationError({
+                self.fields_query_param: [f'Unknown fields: {", ".join(sorted(unknown))}']
+            })
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_sparse_fields()
+        if fields is None:
+            columns = {column for columns in self.field_columns.values() for column in columns}
+        else:
+            # cursor pagination reads its position from ordering fields of the last item
+            ordering = getattr(self.paginator, 'ordering', None) or queryset.query.order_by or \
+                queryset.model._meta.ordering
+            columns = {'pk', *(name.lstrip('-') for name in ordering)}
+            for name in fields:
+                columns.update(self.field_columns.get(name, (name,)))
+
+        related = {column.split('__')[0] for column in columns if '__' in column}
+        if related:
+            # select_related() without arguments follows all relations
+            queryset = queryset.select_related(*related)
+        return queryset if fields is None else queryset.only(*columns, *related)
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+
+class SnippetFieldsetMixin(SparseFieldsetMixin):
+    # code and highlighted are heavy, they are in list only by ?fields=
+    list_fields = ('url', 'owner', 'highlight', 'created', 'title', 'linenos', 'language', 'style',
+                   'highlight_pending')
+    field_columns = {
+        'url': (),
+        'highlight': (),
+        'owner': ('owner__username',),
+        'highlighted': ('rendering__html',),
+    }
+
+
+class SnippetCreateListConcise(SnippetFieldsetMixin, generics.ListCreateAPIView):
     queryset = Snippet.objects.all()
     serializer_class = SnippetModelSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
@@ -99,18 +180,18 @@ class SnippetCreateListConcise(generics.ListCreateAPIView):
 
 
 class SnippetRetrieveUpdateDeleteConcise(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Snippet.objects.all()
+    queryset = Snippet.objects.select_related('rendering')
     serializer_class = SnippetModelSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
 
 class UserListConcise(generics.ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.only('id', 'username').order_by('pk').prefetch_related(USER_SNIPPETS_PREFETCH)
     serializer_class = UserModelSerializer
 
 
 class UserDetailConcise(generics.RetrieveAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.only('id', 'username').prefetch_related(USER_SNIPPETS_PREFETCH)
     serializer_class = UserModelSerializer
 
 
@@ -124,30 +205,88 @@ def api_root(request, format=None):
     )
 
 
+# placeholder of highlighted snippet that is not rendered yet (deferred highlighting)
+HIGHLIGHT_PENDING_HTML = '<!DOCTYPE html><html><body><p>Highlighting is in progress, try again later.</p></body></html>'
+HIGHLIGHT_RETRY_AFTER = 1
+# stylesheets change only with Pygments, so its version is in their urls
+STYLE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def style_url(style: str, request=None) -> str:
+    url = reverse('snippets:snippet-style', kwargs={'style': style}, request=request)
+    return f'{url}?v={pygments.__version__}'
+
+
+# fields of Snippet that are needed for highlighted page, html of rendering is streamed separately
+HIGHLIGHT_FIELDS = ('title', 'style', 'rendering', 'highlight_pending')
+
+
+def highlighted_response(snippet: Snippet, request=None):
+    """
+        Html of rendering is streamed by chunks (see RenderingQuerySet.iter_html), multi-MB snippets
+        are never in memory of worker as a whole, unless they are in the render cache already.
+    """
+    if snippet.highlight_pending:
+        return Response(HIGHLIGHT_PENDING_HTML, status=status.HTTP_202_ACCEPTED,
+                        headers={'Retry-After': str(HIGHLIGHT_RETRY_AFTER)})
+
+    head, tail = highlighting.page_parts(snippet.title, style_url(snippet.style, request))
+    html = highlighting.get_render_cache().get(snippet.rendering_id) if snippet.rendering_id else ''
+    if html is None:
+        html = Rendering.objects.iter_html(snippet.rendering_id)
+    else:
+        html = [html]
+    return StreamingHttpResponse(itertools.chain([head], html, [tail]), content_type='text/html; charset=utf-8')
+
+
+@require_safe
+def snippet_style(request, style):
+    """
+        Stylesheet of Pygments style for the highlighted snippets, it is cached by browsers for a long time
+    """
+    if style not in STYLE_CHOICES.keys():
+        raise Http404(f'Style "{style}" does not exist')
+
+    response = HttpResponse(highlighting.style_css(style), content_type='text/css; charset=utf-8')
+    patch_cache_control(response, public=True, max_age=STYLE_MAX_AGE, immutable=True)
+    return response
+
+
 class SnippetHighlight(generics.GenericAPIView):
-    queryset = Snippet.objects.all()
+    queryset = Snippet.objects.only(*HIGHLIGHT_FIELDS)
     renderer_classes = [renderers.StaticHTMLRenderer]
 
     def get(self, request, pk):
         obj = self.get_object()
-        return Response(obj.highlighted)
+        return highlighted_response(obj, request)
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = User.objects.all()
+class UserViewSet(ViewMetricsMixin, viewsets.ReadOnlyModelViewSet):
+    # ordered - the list is paginated
+    queryset = User.objects.only('id', 'username').order_by('pk').prefetch_related(USER_SNIPPETS_PREFETCH)
     serializer_class = UserModelSerializer
 
 
-class SnippetViewSet(viewsets.ModelViewSet):
+class SnippetViewSet(ViewMetricsMixin, SnippetFieldsetMixin, viewsets.ModelViewSet):
     queryset = Snippet.objects.all()
     serializer_class = SnippetModelSerializer
+    pagination_class = SnippetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
+    # authentication takes up to 2 queries (session and user)
+    query_budget = {'list': 4, 'retrieve': 3, 'highlight': 3}
+
+    def get_queryset(self):
+        if self.action == 'highlight':
+            # html of rendering is streamed separately
+            return self.queryset.only(*HIGHLIGHT_FIELDS)
+        return super().get_queryset()
 
     @action(['GET'], detail=True, renderer_classes=[renderers.StaticHTMLRenderer])
     def highlight(self, request, *args, **kwargs):
         """
             Some function description - SnippetViewSet.highlight
+            202 with placeholder while highlighting is pending
         """
         obj = self.get_object()
-        return Response(obj.highlighted)
+        return highlighted_response(obj, request)
 
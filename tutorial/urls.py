@@ -18,11 +18,15 @@ from django.urls import path, include
 from django.views.generic import RedirectView
 from rest_framework.documentation import include_docs_urls
 
+from tutorial.metrics import MetricsView
+
 api_polls_path_prefix = 'api-polls/'
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api-auth/', include('rest_framework.urls')),
+    # latency histograms of views in Prometheus text format, admin only
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     # path('api-comment/', include('comment.urls')),
     path('api-snippets/', include('tutorial.snippets.urls')),
     path('', RedirectView.as_view(url='/%s' % api_polls_path_prefix)),